@@ -1,35 +1,24 @@
 from django.contrib import admin
-from .models import APIPrompt, GeneratedContent
+from .models import APIPrompt, GeneratedContent, PipelineOutbox
 
 @admin.register(APIPrompt)
 class APIPromptAdmin(admin.ModelAdmin):
     """
     Admin interface for APIPrompt. Allows manual prompting.
     """
-    list_display = ('prompt_text', 'status', 'created_at')
+    list_display = ('prompt_text', 'status', 'created_at', 'finished_at')
+    list_filter = ('status',)
     search_fields = ('prompt_text',)
     actions = ['trigger_generation']
 
     def trigger_generation(self, request, queryset):
-        for prompt in queryset.filter(status='pending'):
-            from .utils import generate_content_from_prompt
-            try:
-                result = generate_content_from_prompt(
-                    prompt.prompt_text,
-                    temperature=prompt.temperature,
-                    token_limit=prompt.token_limit
-                )
-                prompt.generated_contents.create(
-                    title=result.get('title', 'Untitled'),
-                    body=result.get('body', '')
-                )
-                prompt.status = 'completed'
-                prompt.save()
-                self.message_user(request, f"Content generated for prompt: {prompt.prompt_text[:50]}...")
-            except Exception as e:
-                prompt.status = 'error'
-                prompt.save()
-                self.message_user(request, f"Error for prompt: {prompt.prompt_text[:50]}: {str(e)}")
+        from .jobs import enqueue_prompt
+        # Hand the prompts to the generation queue instead of generating them in the request;
+        # workers claim each prompt atomically, so one that is already queued isn't generated twice.
+        prompt_ids = list(queryset.filter(status='pending').values_list('id', flat=True))
+        for prompt_id in prompt_ids:
+            enqueue_prompt(prompt_id)
+        self.message_user(request, f"Queued {len(prompt_ids)} prompt(s) for generation.")
     trigger_generation.short_description = "Trigger content generation for selected prompts"
 
 @admin.register(GeneratedContent)
@@ -37,5 +26,22 @@ class GeneratedContentAdmin(admin.ModelAdmin):
     """
     Admin interface for GeneratedContent.
     """
-    list_display = ('title', 'prompt', 'created_at')
+    list_display = ('title', 'prompt', 'duplicate_of', 'created_at')
     search_fields = ('title', 'body')
+    raw_id_fields = ('prompt', 'duplicate_of')
+
+@admin.register(PipelineOutbox)
+class PipelineOutboxAdmin(admin.ModelAdmin):
+    """
+    Admin interface for pipeline outbox events. Failed events can be retried.
+    """
+    list_display = ('content', 'status', 'attempts', 'available_at', 'created_at')
+    list_filter = ('status',)
+    raw_id_fields = ('content',)
+    actions = ['retry_events']
+
+    def retry_events(self, request, queryset):
+        from django.utils import timezone
+        updated = queryset.filter(status='failed').update(status='pending', attempts=0, available_at=timezone.now())
+        self.message_user(request, f"Requeued {updated} pipeline event(s).")
+    retry_events.short_description = "Retry selected failed pipeline events"
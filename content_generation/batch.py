@@ -0,0 +1,210 @@
+"""
+Batch content generation: fan a list of prompts out to the LLM with a bounded
+number of concurrent requests, then persist every result in a few bulk inserts.
+"""
+import asyncio
+import logging
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from dailynews_backend.background_loop import run_coroutine
+
+from .jobs import heartbeat, owned_prompts, submit_background
+from .models import APIPrompt, GeneratedContent
+from .outbox import enqueue_pipeline
+from .ratelimit import BATCH
+from .utils import agenerate_content_from_prompt
+
+logger = logging.getLogger(__name__)
+
+
+class BatchValidationError(ValueError):
+    """Raised when a batch request is malformed."""
+
+
+def normalize_batch_items(prompts, default_temperature=0.7, default_token_limit=256):
+    """
+    Accept prompts as plain strings or dicts with prompt_text/temperature/token_limit
+    and return a list of dicts. Raises BatchValidationError on bad input.
+    """
+    if not isinstance(prompts, (list, tuple)) or not prompts:
+        raise BatchValidationError("A non-empty list of prompts is required.")
+    max_size = getattr(settings, 'CONTENT_GENERATION_BATCH_MAX_SIZE', 500)
+    if len(prompts) > max_size:
+        raise BatchValidationError(f"A batch may contain at most {max_size} prompts.")
+
+    items = []
+    for index, prompt in enumerate(prompts):
+        if isinstance(prompt, str):
+            prompt = {'prompt_text': prompt}
+        if not isinstance(prompt, dict) or not prompt.get('prompt_text'):
+            raise BatchValidationError(f"Prompt {index} is missing prompt_text.")
+        try:
+            items.append({
+                'prompt_text': prompt['prompt_text'],
+                'temperature': float(prompt.get('temperature', default_temperature)),
+                'token_limit': int(prompt.get('token_limit', default_token_limit)),
+            })
+        except (TypeError, ValueError):
+            raise BatchValidationError(f"Prompt {index} has an invalid temperature or token_limit.")
+    return items
+
+
+async def _fan_out(prompts, concurrency, use_cache):
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def _generate(prompt):
+        async with semaphore:
+            try:
+                return await agenerate_content_from_prompt(
+                    prompt.prompt_text,
+                    temperature=prompt.temperature,
+                    token_limit=prompt.token_limit,
+                    use_cache=use_cache,
+                    priority=BATCH
+                ), None
+            except Exception as e:
+                return None, e
+
+    return await asyncio.gather(*(_generate(prompt) for prompt in prompts))
+
+
+def generate_batch(items, concurrency=None, use_cache=True):
+    """
+    Generate content for every item concurrently (at most `concurrency` in flight,
+    never more than CONTENT_GENERATION_BATCH_CONCURRENCY) and persist prompts and
+    generated content with bulk_create. Repeated prompts are served from the
+    response cache unless use_cache is False.
+
+    Returns one result dict per item, in input order:
+        {'index', 'status': 'completed'|'error', 'prompt_id', 'content_id', 'title', 'error'}
+    """
+    now = timezone.now()
+    # Prompts are bulk-created as already claimed: bulk_create skips post_save, and
+    # no worker picks up a 'running' prompt, so none of them is generated twice.
+    prompts = APIPrompt.objects.bulk_create([
+        APIPrompt(
+            prompt_text=item['prompt_text'],
+            temperature=item['temperature'],
+            token_limit=item['token_limit'],
+            status='running',
+            started_at=now,
+            heartbeat_at=now,
+        )
+        for item in items
+    ])
+    return _generate_prompts(prompts, concurrency, use_cache)
+
+
+def queue_batch(items, concurrency=None, use_cache=True):
+    """
+    Record every item as a pending prompt and, once committed, hand them to a
+    background worker as one batch (see dispatch_batch). Returns the prompts, whose
+    ids are the job ids to poll.
+    """
+    with transaction.atomic():
+        prompts = APIPrompt.objects.bulk_create([
+            APIPrompt(
+                prompt_text=item['prompt_text'],
+                temperature=item['temperature'],
+                token_limit=item['token_limit'],
+                status='pending',
+            )
+            for item in items
+        ])
+        prompt_ids = [prompt.id for prompt in prompts]
+        transaction.on_commit(lambda: dispatch_batch(prompt_ids, concurrency, use_cache))
+    return prompts
+
+
+def dispatch_batch(prompt_ids, concurrency=None, use_cache=True):
+    """
+    Dispatch queued batch prompts according to settings.CONTENT_GENERATION_BACKEND:
+    the whole batch runs as one job on the background pool ('thread') or in one
+    Celery task ('celery'). With 'db' the prompts stay pending for the
+    process_prompts workers, which generate them one at a time.
+    """
+    backend = getattr(settings, 'CONTENT_GENERATION_BACKEND', 'db')
+    if backend == 'celery':
+        from .tasks import generate_batch_task
+        generate_batch_task.delay(prompt_ids, concurrency=concurrency, use_cache=use_cache)
+    elif backend == 'thread':
+        submit_background(run_batch, prompt_ids, concurrency=concurrency, use_cache=use_cache)
+    elif backend != 'db':
+        raise ValueError(f"Unknown CONTENT_GENERATION_BACKEND: {backend}")
+
+
+def run_batch(prompt_ids, concurrency=None, use_cache=True):
+    """
+    Claim the queued prompts that are still pending and generate them as one batch.
+    Prompts another worker already claimed are skipped. Returns generate_batch's
+    result dicts for the claimed prompts, in id order.
+    """
+    with transaction.atomic():
+        claimed = list(
+            APIPrompt.objects.select_for_update(skip_locked=True)
+            .filter(id__in=prompt_ids, status='pending')
+            .values_list('id', flat=True)
+        )
+        now = timezone.now()
+        APIPrompt.objects.filter(id__in=claimed).update(status='running', started_at=now, heartbeat_at=now)
+    prompts = list(APIPrompt.objects.filter(id__in=claimed).order_by('id'))
+    if not prompts:
+        return []
+    return _generate_prompts(prompts, concurrency, use_cache)
+
+
+def _generate_prompts(prompts, concurrency, use_cache):
+    """
+    Generate content for claimed prompts, record each outcome on its prompt and
+    bulk-insert the generated content. Prompts that were requeued and claimed by
+    another worker while the batch ran are left to that worker.
+    """
+    cap = getattr(settings, 'CONTENT_GENERATION_BATCH_CONCURRENCY', 8)
+    concurrency = cap if concurrency is None else max(1, min(int(concurrency), cap))
+
+    # On the shared background loop, not asyncio.run(): the providers keep one pooled
+    # AsyncClient per loop, and a fresh loop per batch would leave each one unclosed.
+    with heartbeat([prompt.id for prompt in prompts]):
+        outcomes = run_coroutine(_fan_out(prompts, concurrency, use_cache))
+
+    with transaction.atomic():
+        owned = owned_prompts(prompts)
+        now = timezone.now()
+        for prompt, (_, error) in zip(prompts, outcomes):
+            if prompt.id in owned:
+                prompt.status = 'completed' if error is None else 'error'
+                prompt.error_message = '' if error is None else str(error)
+                prompt.finished_at = now
+        APIPrompt.objects.bulk_update(
+            [prompt for prompt in prompts if prompt.id in owned], ['status', 'error_message', 'finished_at']
+        )
+        contents = GeneratedContent.objects.bulk_create([
+            GeneratedContent(
+                prompt=prompt,
+                title=result.get('title', 'Untitled'),
+                body=result.get('body', '')
+            )
+            for prompt, (result, error) in zip(prompts, outcomes)
+            if error is None and prompt.id in owned
+        ])
+        # bulk_create skips post_save, so record the pipeline events here, in the same transaction.
+        enqueue_pipeline(contents)
+
+    contents_by_prompt = {content.prompt_id: content for content in contents}
+    results = []
+    for index, (prompt, (_, error)) in enumerate(zip(prompts, outcomes)):
+        content = contents_by_prompt.get(prompt.id)
+        results.append({
+            'index': index,
+            'status': prompt.status,
+            'prompt_id': prompt.id,
+            'content_id': content.id if content else None,
+            'title': content.title if content else None,
+            'error': str(error) if error is not None else None,
+        })
+    failed = sum(1 for result in results if result['status'] == 'error')
+    logger.info("Batch generation finished: %d succeeded, %d failed", len(results) - failed, failed)
+    return results
@@ -0,0 +1,213 @@
+"""
+Response cache for LLM content generation.
+
+Entries are keyed on the normalized prompt, model, temperature and token limit,
+expire after a TTL and are stored either in a per-process LRU or in Redis.
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+
+KEY_PREFIX = 'content_generation:response:'
+STATS_KEY = 'content_generation:response_stats'
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_prompt(prompt_text):
+    """
+    Collapse runs of whitespace so trivially re-formatted prompts share an entry.
+    """
+    return ' '.join(prompt_text.split())
+
+
+def make_cache_key(prompt_text, model, temperature, token_limit):
+    raw = json.dumps([normalize_prompt(prompt_text), model, round(float(temperature), 4), int(token_limit)])
+    return KEY_PREFIX + hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+
+class GenerationCache:
+    """
+    Base cache: counts hits and misses around the backend-specific _get/_set.
+    Backend failures are logged and treated as misses so generation keeps working.
+    Backends that do network I/O set `blocking`, and aget/aset run them off the event loop.
+    """
+    backend_name = 'none'
+    blocking = False
+
+    def __init__(self, ttl=3600):
+        self.ttl = ttl
+        self._hits = 0
+        self._misses = 0
+        self._stats_lock = threading.Lock()
+
+    def get(self, key):
+        try:
+            value = self._get(key)
+            self._record(hit=value is not None)
+            return value
+        except Exception as e:
+            logger.warning("Generation cache lookup failed: %s", e)
+            return None
+
+    def set(self, key, value):
+        try:
+            self._set(key, value)
+        except Exception as e:
+            logger.warning("Generation cache write failed: %s", e)
+
+    async def aget(self, key):
+        """
+        get() for async callers: on a thread when the backend blocks, inline otherwise.
+        """
+        if self.blocking:
+            return await asyncio.to_thread(self.get, key)
+        return self.get(key)
+
+    async def aset(self, key, value):
+        if self.blocking:
+            return await asyncio.to_thread(self.set, key, value)
+        return self.set(key, value)
+
+    def clear(self):
+        pass
+
+    def _get(self, key):
+        return None
+
+    def _set(self, key, value):
+        pass
+
+    def _record(self, hit):
+        with self._stats_lock:
+            if hit:
+                self._hits += 1
+            else:
+                self._misses += 1
+
+    def _counts(self):
+        return self._hits, self._misses
+
+    def stats(self):
+        hits, misses = self._counts()
+        lookups = hits + misses
+        return {
+            'backend': self.backend_name,
+            'hits': hits,
+            'misses': misses,
+            'hit_rate': round(hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+class LocalLRUCache(GenerationCache):
+    """
+    In-process cache with LRU eviction once max_entries is reached.
+    """
+    backend_name = 'locmem'
+
+    def __init__(self, ttl=3600, max_entries=1024):
+        super().__init__(ttl)
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def _set(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        stats = super().stats()
+        stats['size'] = len(self._entries)
+        return stats
+
+
+class RedisGenerationCache(GenerationCache):
+    """
+    Cache shared by every worker. Expiry is handled by Redis; hit/miss counters are
+    kept in a Redis hash so they cover all processes.
+    """
+    backend_name = 'redis'
+    blocking = True
+
+    def __init__(self, ttl=3600, url=None):
+        super().__init__(ttl)
+        self.url = url
+
+    @property
+    def client(self):
+        from dailynews_backend.redis_client import get_redis_client
+        return get_redis_client(self.url)
+
+    def _get(self, key):
+        raw = self.client.get(key)
+        return json.loads(raw) if raw is not None else None
+
+    def _set(self, key, value):
+        self.client.set(key, json.dumps(value), ex=self.ttl)
+
+    def _record(self, hit):
+        self.client.hincrby(STATS_KEY, 'hits' if hit else 'misses', 1)
+
+    def _counts(self):
+        counts = self.client.hgetall(STATS_KEY)
+        return int(counts.get(b'hits', 0)), int(counts.get(b'misses', 0))
+
+    def clear(self):
+        for key in self.client.scan_iter(match=KEY_PREFIX + '*'):
+            self.client.delete(key)
+        self.client.delete(STATS_KEY)
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def build_generation_cache(config=None):
+    if config is None:
+        config = getattr(settings, 'CONTENT_GENERATION_CACHE', {})
+    backend = config.get('BACKEND', 'locmem')
+    ttl = config.get('TTL', 3600)
+    if backend == 'locmem':
+        return LocalLRUCache(ttl=ttl, max_entries=config.get('MAX_ENTRIES', 1024))
+    if backend == 'redis':
+        return RedisGenerationCache(ttl=ttl, url=config.get('REDIS_URL'))
+    if backend == 'none':
+        return GenerationCache(ttl=ttl)
+    raise ValueError(f"Unknown CONTENT_GENERATION_CACHE backend: {backend}")
+
+
+def get_generation_cache():
+    """
+    Return the process-wide generation cache configured by settings.CONTENT_GENERATION_CACHE.
+    """
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = build_generation_cache()
+    return _cache
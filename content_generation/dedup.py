@@ -0,0 +1,147 @@
+"""
+Near-duplicate detection for generated articles using 64-bit SimHash fingerprints.
+
+Fingerprints are split into four 16-bit bands stored in indexed columns. Two
+fingerprints within Hamming distance 3 must agree on at least one band, so a lookup
+is four indexed equality probes followed by an exact distance check on the few
+candidates they return.
+"""
+import hashlib
+import re
+
+from django.conf import settings
+from django.db.models import Case, IntegerField, Q, Value, When
+
+BANDS = 4
+BAND_BITS = 16
+SHINGLE_SIZE = 3
+MIN_SHINGLES = 5
+
+_token_re = re.compile(r'[a-z0-9]+')
+
+
+def get_dedup_config():
+    config = {'ENABLED': True, 'MAX_DISTANCE': 3, 'MAX_CANDIDATES': 200}
+    config.update(getattr(settings, 'CONTENT_DEDUP', {}))
+    return config
+
+
+def _shingles(text):
+    tokens = _token_re.findall(text.lower())
+    return [' '.join(tokens[i:i + SHINGLE_SIZE]) for i in range(max(0, len(tokens) - SHINGLE_SIZE + 1))]
+
+
+def simhash(text):
+    """
+    Return the 64-bit SimHash of text's word 3-gram shingles, or None when the text is
+    too short to fingerprint meaningfully.
+    """
+    shingles = _shingles(text)
+    if len(shingles) < MIN_SHINGLES:
+        return None
+    weights = [0] * 64
+    for shingle in shingles:
+        h = int.from_bytes(hashlib.blake2b(shingle.encode('utf-8'), digest_size=8).digest(), 'big')
+        for bit in range(64):
+            weights[bit] += 1 if h >> bit & 1 else -1
+    return sum(1 << bit for bit in range(64) if weights[bit] > 0)
+
+
+def hamming_distance(a, b):
+    return bin(a ^ b).count('1')
+
+
+def bands(fingerprint):
+    mask = (1 << BAND_BITS) - 1
+    return [(fingerprint >> (i * BAND_BITS)) & mask for i in range(BANDS)]
+
+
+def to_signed(fingerprint):
+    """Map an unsigned 64-bit fingerprint onto a signed BigIntegerField value."""
+    return fingerprint - (1 << 64) if fingerprint >= 1 << 63 else fingerprint
+
+
+def to_unsigned(value):
+    return value + (1 << 64) if value < 0 else value
+
+
+def build_fingerprint(content, fingerprint=None):
+    """
+    Return an unsaved ContentFingerprint for a GeneratedContent, or None if its body is too short.
+    """
+    from .models import ContentFingerprint
+
+    if fingerprint is None:
+        fingerprint = simhash(content.body)
+    if fingerprint is None:
+        return None
+    band_values = bands(fingerprint)
+    return ContentFingerprint(
+        content=content,
+        simhash=to_signed(fingerprint),
+        band_0=band_values[0],
+        band_1=band_values[1],
+        band_2=band_values[2],
+        band_3=band_values[3],
+    )
+
+
+def find_near_duplicate(fingerprint, exclude_content_id=None, max_distance=None):
+    """
+    Return (content_id, distance) of the closest canonical article within max_distance
+    of fingerprint, or None.
+    """
+    from .models import ContentFingerprint
+
+    config = get_dedup_config()
+    if max_distance is None:
+        max_distance = config['MAX_DISTANCE']
+    band_filters = [Q(**{f'band_{i}': value}) for i, value in enumerate(bands(fingerprint))]
+    # Close fingerprints agree on more bands, so when a common band pulls in more than
+    # MAX_CANDIDATES rows the cap drops the weakest candidates rather than arbitrary ones.
+    matching_bands = sum(
+        (Case(When(band_filter, then=Value(1)), default=Value(0), output_field=IntegerField())
+         for band_filter in band_filters),
+        Value(0),
+    )
+    candidates = (
+        ContentFingerprint.objects
+        .filter(band_filters[0] | band_filters[1] | band_filters[2] | band_filters[3])
+        .filter(content__duplicate_of__isnull=True)
+        .exclude(content_id=exclude_content_id)
+        .annotate(matching_bands=matching_bands)
+        .order_by('-matching_bands', 'content_id')
+        .values_list('content_id', 'simhash')[:config['MAX_CANDIDATES']]
+    )
+    best = None
+    for content_id, value in candidates:
+        distance = hamming_distance(fingerprint, to_unsigned(value))
+        # Closest match wins; ties go to the oldest article.
+        if distance <= max_distance and (best is None or (distance, content_id) < best):
+            best = (distance, content_id)
+    return (best[1], best[0]) if best else None
+
+
+def register_content(content):
+    """
+    Fingerprint a GeneratedContent and link it to its canonical article if it is a
+    near-duplicate. Returns the canonical GeneratedContent, or None if content is canonical.
+    """
+    from .models import ContentFingerprint, GeneratedContent
+
+    if not get_dedup_config()['ENABLED']:
+        return None
+    fingerprint = simhash(content.body)
+    if fingerprint is None:
+        return None
+
+    match = find_near_duplicate(fingerprint, exclude_content_id=content.id)
+    if not ContentFingerprint.objects.filter(content_id=content.id).exists():
+        build_fingerprint(content, fingerprint).save()
+    if match is None:
+        return None
+
+    canonical_id, distance = match
+    content.duplicate_of_id = canonical_id
+    content.save(update_fields=['duplicate_of'])
+    return GeneratedContent.objects.get(pk=canonical_id)
@@ -0,0 +1,195 @@
+"""
+Hedged LLM requests.
+
+A hedged call sends the request to the primary provider and, if it hasn't answered
+within a delay taken from a high percentile of recent latencies, sends a second
+request (to the same or a fallback provider/model). Whichever finishes first wins
+and the other is cancelled. Hedge rate and win counts are recorded so the extra
+spend stays visible.
+
+Sync callers run hedges on the shared background event loop, so they get real
+cancellation and keep using pooled async connections.
+"""
+import asyncio
+import threading
+import time
+from collections import deque
+
+from django.conf import settings
+
+from dailynews_backend.background_loop import run_coroutine
+
+from .ratelimit import RateLimitTimeout, estimate_tokens, get_rate_scheduler
+
+
+def get_hedging_config():
+    config = {
+        'ENABLED': False,
+        'PERCENTILE': 95,
+        'DEFAULT_DELAY': 5.0,
+        'MIN_DELAY': 0.5,
+        'MIN_SAMPLES': 20,
+        'WINDOW': 500,
+        'PROVIDER': None,
+        'MODEL': None,
+    }
+    config.update(getattr(settings, 'LLM_HEDGING', {}))
+    return config
+
+
+class LatencyTracker:
+    """
+    Rolling window of recent call latencies used to choose the hedge delay.
+    """
+
+    def __init__(self, window=500):
+        self._samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, seconds):
+        with self._lock:
+            self._samples.append(seconds)
+
+    def percentile(self, pct):
+        with self._lock:
+            samples = sorted(self._samples)
+        if not samples:
+            return None
+        return samples[min(len(samples) - 1, int(len(samples) * pct / 100.0))]
+
+    def __len__(self):
+        return len(self._samples)
+
+
+class HedgeStats:
+    def __init__(self):
+        self.requests = 0
+        self.hedged = 0
+        self.primary_wins = 0
+        self.hedge_wins = 0
+        self.skipped_for_rate_limit = 0
+        self.errors = 0
+        self._lock = threading.Lock()
+
+    def incr(self, field):
+        with self._lock:
+            setattr(self, field, getattr(self, field) + 1)
+
+    def as_dict(self):
+        with self._lock:
+            return {
+                'requests': self.requests,
+                'hedged': self.hedged,
+                'hedge_rate': round(self.hedged / self.requests, 4) if self.requests else 0.0,
+                'primary_wins': self.primary_wins,
+                'hedge_wins': self.hedge_wins,
+                'skipped_for_rate_limit': self.skipped_for_rate_limit,
+                'errors': self.errors,
+            }
+
+
+_trackers = {}
+_stats = HedgeStats()
+_trackers_lock = threading.Lock()
+
+
+def get_latency_tracker(provider, model=None):
+    """
+    The tracker for calls to model on provider (default: the provider's own model).
+    """
+    key = f"{provider.name}:{model or provider.model}"
+    tracker = _trackers.get(key)
+    if tracker is None:
+        with _trackers_lock:
+            tracker = _trackers.setdefault(key, LatencyTracker(get_hedging_config()['WINDOW']))
+    return tracker
+
+
+def hedge_delay(provider):
+    """
+    Seconds to wait for the primary before hedging: the configured percentile of recent
+    latencies once enough samples exist, never below MIN_DELAY.
+    """
+    config = get_hedging_config()
+    tracker = get_latency_tracker(provider)
+    if len(tracker) < config['MIN_SAMPLES']:
+        return config['DEFAULT_DELAY']
+    return max(config['MIN_DELAY'], tracker.percentile(config['PERCENTILE']))
+
+
+async def _timed(provider, messages, temperature, max_tokens, model):
+    """
+    Call the provider and record the latency. A call cancelled because the other request
+    won records how long it had been running, a lower bound on its real latency: with only
+    the completed calls in the window, a persistently slow primary would drag the delay
+    down to the hedge's latency and every request would be hedged.
+    """
+    tracker = get_latency_tracker(provider, model)
+    started = time.monotonic()
+    try:
+        text = await provider.acomplete(messages, temperature=temperature, max_tokens=max_tokens, model=model)
+    except asyncio.CancelledError:
+        tracker.record(time.monotonic() - started)
+        raise
+    tracker.record(time.monotonic() - started)
+    return text
+
+
+async def ahedged_complete(provider, messages, temperature=0.7, max_tokens=256, hedge_provider=None,
+                           hedge_model=None, prompt_text=''):
+    """
+    Complete messages with provider, hedging to hedge_provider/hedge_model (defaults:
+    the same provider and model) if the primary is slower than the hedge delay.
+    """
+    hedge_provider = hedge_provider or provider
+    _stats.incr('requests')
+    primary = asyncio.ensure_future(_timed(provider, messages, temperature, max_tokens, None))
+    done, _ = await asyncio.wait({primary}, timeout=hedge_delay(provider))
+    if done and primary.exception() is None:
+        _stats.incr('primary_wins')
+        return primary.result()
+
+    # The primary is slow (or failed fast): fire the hedge if capacity is free right now.
+    try:
+        await get_rate_scheduler(hedge_provider.name).aacquire(
+            estimate_tokens(prompt_text, max_tokens), timeout=0
+        )
+    except RateLimitTimeout:
+        _stats.incr('skipped_for_rate_limit')
+        return await primary
+    _stats.incr('hedged')
+    hedge = asyncio.ensure_future(_timed(hedge_provider, messages, temperature, max_tokens, hedge_model))
+
+    pending = {hedge} if primary.done() else {primary, hedge}
+    error = primary.exception() if primary.done() else None
+    try:
+        while pending:
+            finished, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in finished:
+                if task.exception() is None:
+                    _stats.incr('hedge_wins' if task is hedge else 'primary_wins')
+                    return task.result()
+                error = task.exception()
+        _stats.incr('errors')
+        raise error
+    finally:
+        for task in (primary, hedge):
+            if not task.done():
+                task.cancel()
+
+
+def hedged_complete(provider, messages, temperature=0.7, max_tokens=256, hedge_provider=None,
+                    hedge_model=None, prompt_text=''):
+    """
+    Sync entry point for ahedged_complete().
+    """
+    return run_coroutine(ahedged_complete(
+        provider, messages, temperature=temperature, max_tokens=max_tokens,
+        hedge_provider=hedge_provider, hedge_model=hedge_model, prompt_text=prompt_text
+    ))
+
+
+def hedging_stats():
+    stats = _stats.as_dict()
+    stats['delays'] = {key: tracker.percentile(get_hedging_config()['PERCENTILE']) for key, tracker in _trackers.items()}
+    return stats
@@ -0,0 +1,220 @@
+"""
+Durable, database-backed queue for content generation.
+
+APIPrompt rows are the jobs: a prompt is created as 'pending', claimed by exactly
+one worker ('running') and finished as 'completed' or 'error'. Prompts can be
+dispatched to an in-process thread pool, to Celery, or left for the
+`process_prompts` management command to pick up.
+
+While a worker generates a prompt it refreshes the prompt's heartbeat_at; only
+prompts whose heartbeat has gone quiet (their worker died) are requeued. A worker
+records its result only if the prompt is still the one it claimed, so a prompt
+that was requeued and claimed again is never finished twice.
+"""
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections, connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import APIPrompt, GeneratedContent
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+
+
+def get_background_executor():
+    """
+    Return the process-wide thread pool used for background work.
+    Created lazily so management commands and migrations don't start threads.
+    """
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=getattr(settings, 'CONTENT_GENERATION_WORKERS', 4),
+            thread_name_prefix='content-generation',
+        )
+    return _executor
+
+
+def submit_background(fn, *args, **kwargs):
+    """
+    Run fn on the background pool with its own database connection.
+    """
+    def _run():
+        close_old_connections()
+        try:
+            return fn(*args, **kwargs)
+        except Exception:
+            logger.exception("Background task %s failed", getattr(fn, '__name__', fn))
+        finally:
+            close_old_connections()
+
+    return get_background_executor().submit(_run)
+
+
+def enqueue_prompt(prompt_id):
+    """
+    Dispatch a pending prompt according to settings.CONTENT_GENERATION_BACKEND:
+      - 'db':     leave it in the table for the process_prompts worker command (default)
+      - 'celery': send to the process_prompt_task Celery task
+      - 'thread': run on the in-process background pool; not durable, a prompt whose
+                  process exits mid-run waits for a process_prompts worker to requeue it
+    """
+    backend = getattr(settings, 'CONTENT_GENERATION_BACKEND', 'db')
+    if backend == 'celery':
+        from .tasks import process_prompt_task
+        process_prompt_task.delay(prompt_id)
+    elif backend == 'thread':
+        submit_background(process_prompt, prompt_id)
+    elif backend != 'db':
+        raise ValueError(f"Unknown CONTENT_GENERATION_BACKEND: {backend}")
+
+
+def claim_prompt(prompt_id):
+    """
+    Atomically move a prompt from 'pending' to 'running'.
+    Returns True only for the single caller that won the claim.
+    """
+    now = timezone.now()
+    claimed = APIPrompt.objects.filter(pk=prompt_id, status='pending').update(
+        status='running', started_at=now, heartbeat_at=now
+    )
+    return claimed == 1
+
+
+def claim_pending_prompts(limit=10):
+    """
+    Claim up to `limit` of the oldest pending prompts for this worker.
+    Rows locked by other workers are skipped rather than waited on.
+    """
+    with transaction.atomic():
+        prompt_ids = list(
+            APIPrompt.objects.select_for_update(skip_locked=True)
+            .filter(status='pending')
+            .order_by('created_at')
+            .values_list('id', flat=True)[:limit]
+        )
+        if prompt_ids:
+            now = timezone.now()
+            APIPrompt.objects.filter(id__in=prompt_ids).update(status='running', started_at=now, heartbeat_at=now)
+    return list(APIPrompt.objects.filter(id__in=prompt_ids).order_by('created_at'))
+
+
+def requeue_stale_prompts(timeout_seconds=None):
+    """
+    Return prompts stuck in 'running' to 'pending': those whose worker hasn't sent a
+    heartbeat for timeout_seconds (e.g. it died). Prompts still being generated keep
+    beating and are left alone however long they take.
+    """
+    if timeout_seconds is None:
+        timeout_seconds = getattr(settings, 'CONTENT_GENERATION_STALE_AFTER', 600)
+    cutoff = timezone.now() - timedelta(seconds=timeout_seconds)
+    return APIPrompt.objects.filter(
+        Q(heartbeat_at__lt=cutoff) | Q(heartbeat_at__isnull=True, started_at__lt=cutoff),
+        status='running',
+    ).update(status='pending', started_at=None, heartbeat_at=None)
+
+
+@contextmanager
+def keep_alive(queryset, interval):
+    """
+    While the block runs, set heartbeat_at on the rows of queryset every `interval`
+    seconds from a helper thread, so a stale-job sweep leaves them alone.
+    """
+    stop = threading.Event()
+
+    def _beat():
+        try:
+            while not stop.wait(interval):
+                try:
+                    queryset.update(heartbeat_at=timezone.now())
+                except Exception as e:
+                    logger.warning("Heartbeat for %s failed: %s", queryset.model.__name__, e)
+        finally:
+            connection.close()
+
+    thread = threading.Thread(target=_beat, name='content-generation-heartbeat', daemon=True)
+    thread.start()
+    try:
+        yield
+    finally:
+        stop.set()
+        thread.join()
+
+
+def heartbeat(prompt_ids, interval=None):
+    """
+    While the block runs, refresh heartbeat_at on the running prompts every
+    CONTENT_GENERATION_HEARTBEAT_INTERVAL seconds so they are not requeued.
+    """
+    if interval is None:
+        interval = getattr(settings, 'CONTENT_GENERATION_HEARTBEAT_INTERVAL', 60)
+    return keep_alive(APIPrompt.objects.filter(id__in=list(prompt_ids), status='running'), interval)
+
+
+def owned_prompts(prompts):
+    """
+    Lock and return the ids of prompts this worker still owns: still 'running' under
+    the claim (started_at) it was given. Call inside a transaction.
+    """
+    claims = {prompt.pk: prompt.started_at for prompt in prompts}
+    return {
+        prompt_id
+        for prompt_id, started_at in APIPrompt.objects.select_for_update()
+        .filter(id__in=list(claims), status='running')
+        .values_list('id', 'started_at')
+        if started_at == claims[prompt_id]
+    }
+
+
+def run_prompt(prompt):
+    """
+    Generate content for a claimed prompt and record the outcome on it, unless the
+    prompt was requeued and claimed by another worker in the meantime.
+    """
+    from .utils import generate_content_from_prompt
+
+    try:
+        with heartbeat([prompt.pk]):
+            result = generate_content_from_prompt(
+                prompt.prompt_text,
+                temperature=prompt.temperature,
+                token_limit=prompt.token_limit
+            )
+        with transaction.atomic():
+            if not owned_prompts([prompt]):
+                logger.warning("Prompt %s was claimed by another worker, discarding this result", prompt.pk)
+                return None
+            content = GeneratedContent.objects.create(
+                prompt=prompt,
+                title=result.get('title', 'Untitled'),
+                body=result.get('body', '')
+            )
+            prompt.status = 'completed'
+            prompt.error_message = ''
+            prompt.finished_at = timezone.now()
+            prompt.save(update_fields=['status', 'error_message', 'finished_at'])
+        return content
+    except Exception as e:
+        logger.warning("Content generation failed for prompt %s: %s", prompt.pk, e)
+        APIPrompt.objects.filter(pk=prompt.pk, status='running', started_at=prompt.started_at).update(
+            status='error', error_message=str(e), finished_at=timezone.now()
+        )
+        return None
+
+
+def process_prompt(prompt_id):
+    """
+    Claim and run a single prompt. Returns False if another worker already has it.
+    """
+    if not claim_prompt(prompt_id):
+        return False
+    run_prompt(APIPrompt.objects.get(pk=prompt_id))
+    return True
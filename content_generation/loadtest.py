@@ -0,0 +1,292 @@
+"""
+Pipeline load harness.
+
+Drives prompts concurrently through ContentGenerationView and waits until each has
+gone through generation, fact-checking, NLP and content processing (the prompt failed,
+or its PipelineOutbox event is done or failed). Meanwhile it times every pipeline
+stage and counts the database queries issued under each one, in every thread.
+
+The harness writes real rows, so run it against a scratch database. Stages only run
+in-process with CONTENT_GENERATION_BACKEND='thread' and CONTENT_PIPELINE['DISPATCH']='thread';
+with external workers it still measures end-to-end latency but not their stages.
+"""
+import functools
+import importlib
+import threading
+import time
+import uuid
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import close_old_connections, connections
+from django.db.backends.signals import connection_created
+
+# Pipeline functions timed by the harness: (stage, module, attribute). The pipeline
+# imports them at call time, so patching the module attribute is enough.
+INSTRUMENTED_STAGES = (
+    ('generation', 'content_generation.utils', 'generate_content_from_prompt'),
+    ('claims', 'fact_checking.claims', 'extract_claims'),
+    ('nlp', 'content_processing.nlp_cache', 'compute_result'),
+    ('analysis', 'content_processing.analysis', 'analyze_text'),
+    ('fact_check', 'fact_checking.utils', 'process_fact_check_for_content'),
+    ('categorize', 'content_processing.utils', 'categorize_content'),
+    ('tag', 'content_processing.utils', 'tag_content'),
+    ('process', 'content_processing.utils', 'process_generated_content'),
+)
+
+REPORT_STAGES = ('request', 'queue', 'generation', 'claims', 'nlp', 'analysis', 'fact_check', 'categorize', 'tag', 'process', 'end_to_end')
+
+_IGNORED = object()
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100.0))]
+
+
+def summarize(values):
+    return {
+        'count': len(values),
+        'mean': round(sum(values) / len(values), 4) if values else 0.0,
+        'p50': round(percentile(values, 50), 4),
+        'p95': round(percentile(values, 95), 4),
+        'p99': round(percentile(values, 99), 4),
+    }
+
+
+class StageRecorder:
+    """
+    Records stage durations and attributes database queries to the stage running in
+    the issuing thread ('other' outside any stage).
+    """
+
+    def __init__(self):
+        self.durations = defaultdict(list)
+        self.queries = Counter()
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._originals = []
+        self._connections = []
+
+    # -- stages ----------------------------------------------------------------
+
+    def current_stage(self):
+        return getattr(self._local, 'stage', 'other')
+
+    @contextmanager
+    def stage(self, name):
+        previous = self.current_stage()
+        self._local.stage = name
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self._local.stage = previous
+            if name is not _IGNORED:
+                self.record(name, time.monotonic() - started)
+
+    @contextmanager
+    def paused(self):
+        """
+        Don't count queries issued by the harness itself.
+        """
+        previous = self.current_stage()
+        self._local.stage = _IGNORED
+        try:
+            yield
+        finally:
+            self._local.stage = previous
+
+    def record(self, name, seconds):
+        with self._lock:
+            self.durations[name].append(seconds)
+
+    def _timed(self, name, fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with self.stage(name):
+                return fn(*args, **kwargs)
+        return wrapper
+
+    # -- queries ---------------------------------------------------------------
+
+    def _count_query(self, execute, sql, params, many, context):
+        stage = self.current_stage()
+        if stage is not _IGNORED:
+            with self._lock:
+                self.queries[stage] += 1
+        return execute(sql, params, many, context)
+
+    def _watch_connection(self, connection):
+        if self._count_query not in connection.execute_wrappers:
+            connection.execute_wrappers.append(self._count_query)
+            self._connections.append(connection)
+
+    def _on_connection_created(self, sender, connection, **kwargs):
+        self._watch_connection(connection)
+
+    # -- install ---------------------------------------------------------------
+
+    def install(self):
+        for name, module_path, attribute in INSTRUMENTED_STAGES:
+            module = importlib.import_module(module_path)
+            original = getattr(module, attribute)
+            self._originals.append((module, attribute, original))
+            setattr(module, attribute, self._timed(name, original))
+        connection_created.connect(self._on_connection_created)
+        for connection in connections.all():
+            self._watch_connection(connection)
+
+    def uninstall(self):
+        for module, attribute, original in reversed(self._originals):
+            setattr(module, attribute, original)
+        self._originals = []
+        connection_created.disconnect(self._on_connection_created)
+        for connection in self._connections:
+            if self._count_query in connection.execute_wrappers:
+                connection.execute_wrappers.remove(self._count_query)
+        self._connections = []
+
+
+def use_mock_apis(server):
+    """
+    Point the OpenAI provider and the Google Fact Check client at a MockAPIServer.
+    Must run before either is first used in this process.
+    """
+    settings.LLM_DEFAULT_PROVIDER = 'openai'
+    settings.LLM_PROVIDERS['openai'] = dict(settings.LLM_PROVIDERS['openai'], BASE_URL=server.openai_base_url)
+    settings.GOOGLE_FACT_CHECK_ENDPOINT = server.fact_check_endpoint
+
+
+def _submit_prompt(recorder, prompt_text, temperature, token_limit):
+    """
+    POST one prompt to ContentGenerationView and return its job id.
+    """
+    from rest_framework.test import APIRequestFactory
+    from .views import ContentGenerationView
+
+    request = APIRequestFactory().post(
+        '/api/content/generate/',
+        {'prompt_text': prompt_text, 'temperature': temperature, 'token_limit': token_limit},
+        format='json',
+    )
+    try:
+        with recorder.stage('request'):
+            response = ContentGenerationView.as_view()(request)
+        if response.status_code != 202:
+            raise RuntimeError(f"ContentGenerationView returned HTTP {response.status_code}: {response.data}")
+        return response.data['job_id']
+    finally:
+        close_old_connections()
+
+
+def _finished_prompts(prompt_ids):
+    from .models import APIPrompt, PipelineOutbox
+
+    errored = set(APIPrompt.objects.filter(id__in=prompt_ids, status='error').values_list('id', flat=True))
+    finished = set(
+        PipelineOutbox.objects.filter(content__prompt_id__in=prompt_ids, status__in=['done', 'failed'])
+        .values_list('content__prompt_id', flat=True)
+    )
+    return errored | finished
+
+
+def _outcomes(prompt_ids):
+    from content_processing.models import ProcessedContent, PublishedContent
+    from .models import APIPrompt, GeneratedContent, PipelineOutbox
+
+    contents = GeneratedContent.objects.filter(prompt_id__in=prompt_ids)
+    return {
+        'generation_errors': APIPrompt.objects.filter(id__in=prompt_ids, status='error').count(),
+        'generated': contents.count(),
+        'duplicates': contents.filter(duplicate_of__isnull=False).count(),
+        'pipeline_failed': PipelineOutbox.objects.filter(content__prompt_id__in=prompt_ids, status='failed').count(),
+        'processed': ProcessedContent.objects.filter(content__prompt_id__in=prompt_ids).count(),
+        'published': PublishedContent.objects.filter(processed_content__content__prompt_id__in=prompt_ids).count(),
+    }
+
+
+def _database_latencies(recorder, prompt_ids):
+    """
+    Queue wait and end-to-end latency from the rows' own timestamps.
+    """
+    from content_processing.models import ProcessedContent
+    from .models import APIPrompt
+
+    for created_at, started_at in APIPrompt.objects.filter(
+        id__in=prompt_ids, started_at__isnull=False
+    ).values_list('created_at', 'started_at'):
+        recorder.record('queue', (started_at - created_at).total_seconds())
+    for created_at, processed_at in ProcessedContent.objects.filter(
+        content__prompt_id__in=prompt_ids
+    ).values_list('content__prompt__created_at', 'processed_at'):
+        recorder.record('end_to_end', (processed_at - created_at).total_seconds())
+
+
+def run_load_test(prompts=50, concurrency=10, timeout=300.0, temperature=0.7, token_limit=256,
+                  poll_interval=0.1, log=None):
+    """
+    Submit `prompts` prompts with `concurrency` concurrent clients and wait up to `timeout`
+    seconds for all of them to finish the pipeline. Returns a report with throughput,
+    per-stage latency percentiles (seconds) and database query counts per stage.
+    """
+    log = log or (lambda message: None)
+    run_id = uuid.uuid4().hex[:8]
+    recorder = StageRecorder()
+    recorder.install()
+    try:
+        started = time.monotonic()
+        with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='loadtest-client') as pool:
+            prompt_ids = list(pool.map(
+                lambda i: _submit_prompt(
+                    recorder, f"Write a short news article about topic {i} (load test {run_id}).", temperature, token_limit
+                ),
+                range(prompts),
+            ))
+        submitted = time.monotonic() - started
+        log(f"[LOADTEST] Submitted {len(prompt_ids)} prompt(s) in {submitted:.2f}s")
+
+        finished = set()
+        deadline = started + timeout
+        last_report = 0
+        while len(finished) < len(prompt_ids) and time.monotonic() < deadline:
+            time.sleep(poll_interval)
+            with recorder.paused():
+                finished = _finished_prompts(prompt_ids)
+            if len(finished) - last_report >= max(1, len(prompt_ids) // 10):
+                last_report = len(finished)
+                log(f"[LOADTEST] {len(finished)}/{len(prompt_ids)} finished")
+        elapsed = time.monotonic() - started
+
+        with recorder.paused():
+            _database_latencies(recorder, prompt_ids)
+            outcomes = _outcomes(prompt_ids)
+    finally:
+        recorder.uninstall()
+
+    stages = {}
+    for name in REPORT_STAGES + tuple(sorted(set(recorder.durations) - set(REPORT_STAGES))):
+        if name in recorder.durations or recorder.queries.get(name):
+            stages[name] = summarize(recorder.durations.get(name, []))
+            stages[name]['queries'] = recorder.queries.get(name, 0)
+    if recorder.queries.get('other'):
+        stages['other'] = {'count': 0, 'queries': recorder.queries['other']}
+    total_queries = sum(recorder.queries.values())
+    return {
+        'prompts': len(prompt_ids),
+        'concurrency': concurrency,
+        'finished': len(finished),
+        'timed_out': len(prompt_ids) - len(finished),
+        'elapsed': round(elapsed, 3),
+        'throughput': round(len(finished) / elapsed, 3) if elapsed else 0.0,  # articles per second
+        'outcomes': outcomes,
+        'stages': stages,
+        'queries': {
+            'total': total_queries,
+            'per_article': round(total_queries / len(finished), 2) if finished else 0.0,
+        },
+    }
@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+
+from content_generation.dedup import build_fingerprint
+from content_generation.models import ContentFingerprint, GeneratedContent
+
+
+class Command(BaseCommand):
+    help = "Backfill near-duplicate fingerprints for GeneratedContent rows that don't have one."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        last_id = 0
+        created = 0
+        while True:
+            batch = list(
+                GeneratedContent.objects.filter(id__gt=last_id, fingerprint__isnull=True)
+                .order_by('id')
+                .only('id', 'body')[:batch_size]
+            )
+            if not batch:
+                break
+            last_id = batch[-1].id
+            fingerprints = [fp for fp in (build_fingerprint(content) for content in batch) if fp is not None]
+            ContentFingerprint.objects.bulk_create(fingerprints, ignore_conflicts=True)
+            created += len(fingerprints)
+            self.stdout.write(f"[FINGERPRINTS] Up to content {last_id}: {created} fingerprints created")
+        self.stdout.write(self.style.SUCCESS(f"Created {created} fingerprints"))
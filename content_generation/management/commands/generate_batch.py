@@ -0,0 +1,56 @@
+import json
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from content_generation.batch import BatchValidationError, generate_batch, normalize_batch_items
+
+
+class Command(BaseCommand):
+    help = (
+        "Generate content for a batch of prompts concurrently. The input file is either a JSON list "
+        "(strings or objects with prompt_text/temperature/token_limit) or plain text with one prompt per line."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="Path to the prompts file.")
+        parser.add_argument('--concurrency', type=int, default=None, help="Maximum concurrent LLM calls.")
+        parser.add_argument('--temperature', type=float, default=0.7)
+        parser.add_argument('--token-limit', type=int, default=256)
+        parser.add_argument('--no-cache', action='store_true', help="Bypass the response cache.")
+
+    def handle(self, *args, **options):
+        try:
+            with open(options['path'], encoding='utf-8') as f:
+                raw = f.read()
+        except OSError as e:
+            raise CommandError(f"Could not read {options['path']}: {e}")
+
+        try:
+            prompts = json.loads(raw)
+        except ValueError:
+            prompts = [line.strip() for line in raw.splitlines() if line.strip()]
+
+        try:
+            items = normalize_batch_items(
+                prompts,
+                default_temperature=options['temperature'],
+                default_token_limit=options['token_limit']
+            )
+        except BatchValidationError as e:
+            raise CommandError(str(e))
+
+        started = time.monotonic()
+        results = generate_batch(items, concurrency=options['concurrency'], use_cache=not options['no_cache'])
+        elapsed = time.monotonic() - started
+
+        for result in results:
+            if result['status'] == 'completed':
+                self.stdout.write(f"[{result['index']}] completed: content {result['content_id']} - {result['title']}")
+            else:
+                self.stderr.write(f"[{result['index']}] error: {result['error']}")
+
+        failed = sum(1 for result in results if result['status'] == 'error')
+        self.stdout.write(self.style.SUCCESS(
+            f"Generated {len(results) - failed}/{len(results)} prompts in {elapsed:.1f}s ({failed} failed)"
+        ))
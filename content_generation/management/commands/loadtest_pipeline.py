@@ -0,0 +1,93 @@
+import json
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from content_generation.loadtest import run_load_test, use_mock_apis
+from content_generation.outbox import get_pipeline_config
+from content_generation.mock_apis import EndpointBehaviour, MockAPIServer
+
+
+class Command(BaseCommand):
+    help = (
+        "Drive prompts concurrently through ContentGenerationView, fact-checking and content processing, "
+        "and report throughput, per-stage p50/p95/p99 latency and database query counts. "
+        "Writes real rows: run it against a scratch database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--prompts', type=int, default=50, help="Number of prompts to submit.")
+        parser.add_argument('--concurrency', type=int, default=10, help="Concurrent clients submitting prompts.")
+        parser.add_argument('--timeout', type=float, default=300.0, help="Seconds to wait for the pipeline to finish.")
+        parser.add_argument('--token-limit', type=int, default=256)
+        parser.add_argument('--mock', action='store_true', help="Start in-process mock APIs and point the pipeline at them.")
+        parser.add_argument('--llm-latency', default='lognormal:1.0,0.4', help="Mock chat completion latency spec.")
+        parser.add_argument('--llm-error-rate', type=float, default=0.0)
+        parser.add_argument('--fact-check-latency', default='lognormal:0.2,0.5', help="Mock claims:search latency spec.")
+        parser.add_argument('--fact-check-error-rate', type=float, default=0.0)
+        parser.add_argument('--json', action='store_true', help="Print the report as JSON.")
+
+    def handle(self, *args, **options):
+        if options['prompts'] < 1 or options['concurrency'] < 1:
+            raise CommandError("--prompts and --concurrency must be positive.")
+        if (getattr(settings, 'CONTENT_GENERATION_BACKEND', 'db') != 'thread'
+                or get_pipeline_config()['DISPATCH'] != 'thread'):
+            self.stderr.write(
+                "[LOADTEST] Generation or pipeline work is dispatched to external workers; "
+                "their stages and queries are not measured here."
+            )
+
+        server = None
+        if options['mock']:
+            try:
+                server = MockAPIServer(
+                    port=0,
+                    llm=EndpointBehaviour(options['llm_latency'], options['llm_error_rate']),
+                    fact_check=EndpointBehaviour(options['fact_check_latency'], options['fact_check_error_rate']),
+                ).start()
+            except ValueError as e:
+                raise CommandError(str(e))
+            use_mock_apis(server)
+            self.stdout.write(f"[LOADTEST] Mock APIs on {server.base_url}")
+
+        try:
+            report = run_load_test(
+                prompts=options['prompts'],
+                concurrency=options['concurrency'],
+                timeout=options['timeout'],
+                token_limit=options['token_limit'],
+                log=self.stdout.write,
+            )
+        finally:
+            if server is not None:
+                mock_stats = server.stats()
+                server.stop()
+        if server is not None:
+            report['mock_apis'] = mock_stats
+
+        if options['json']:
+            self.stdout.write(json.dumps(report, indent=2))
+            return
+        self._print_report(report)
+
+    def _print_report(self, report):
+        self.stdout.write(
+            f"\nPrompts: {report['prompts']} (concurrency {report['concurrency']}), "
+            f"finished {report['finished']}, timed out {report['timed_out']}"
+        )
+        self.stdout.write(f"Elapsed: {report['elapsed']:.2f}s, throughput: {report['throughput']:.2f} articles/s")
+        self.stdout.write("Outcomes: " + ", ".join(f"{key} {value}" for key, value in report['outcomes'].items()))
+        self.stdout.write(
+            f"DB queries: {report['queries']['total']} total, {report['queries']['per_article']} per article\n"
+        )
+        self.stdout.write(f"{'stage':<12} {'count':>6} {'p50':>8} {'p95':>8} {'p99':>8} {'queries':>8}")
+        for name, stage in report['stages'].items():
+            if stage['count']:
+                self.stdout.write(
+                    f"{name:<12} {stage['count']:>6} {stage['p50']:>8.3f} {stage['p95']:>8.3f} "
+                    f"{stage['p99']:>8.3f} {stage['queries']:>8}"
+                )
+            else:
+                self.stdout.write(f"{name:<12} {'':>6} {'':>8} {'':>8} {'':>8} {stage['queries']:>8}")
+        if 'mock_apis' in report:
+            self.stdout.write(f"\nMock APIs: {report['mock_apis']}")
@@ -0,0 +1,34 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from content_generation.jobs import claim_pending_prompts, requeue_stale_prompts, run_prompt, submit_background
+
+
+class Command(BaseCommand):
+    help = "Run a content generation worker that claims pending APIPrompts and generates their content."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=10, help="Prompts claimed per poll.")
+        parser.add_argument('--poll-interval', type=float, default=2.0, help="Seconds to sleep when the queue is empty.")
+        parser.add_argument('--once', action='store_true', help="Drain the queue once and exit.")
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        self.stdout.write(f"[WORKER] Content generation worker started (batch size {batch_size})")
+        while True:
+            requeued = requeue_stale_prompts()
+            if requeued:
+                self.stdout.write(f"[WORKER] Requeued {requeued} stale prompt(s)")
+
+            prompts = claim_pending_prompts(limit=batch_size)
+            if prompts:
+                futures = [submit_background(run_prompt, prompt) for prompt in prompts]
+                for future in futures:
+                    future.result()
+                self.stdout.write(f"[WORKER] Processed {len(prompts)} prompt(s)")
+                continue
+
+            if options['once']:
+                break
+            time.sleep(options['poll_interval'])
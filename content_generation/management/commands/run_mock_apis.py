@@ -0,0 +1,44 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from content_generation.mock_apis import EndpointBehaviour, MockAPIServer
+
+
+class Command(BaseCommand):
+    help = (
+        "Serve local stand-ins for the OpenAI chat completions and Google Fact Check claims:search APIs "
+        "with configurable latency and error rates. Latency specs: '0.5', 'uniform:0.2,1.0', "
+        "'normal:0.8,0.2', 'lognormal:0.8,0.5' or 'exp:0.5' (seconds)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--host', default='127.0.0.1')
+        parser.add_argument('--port', type=int, default=8765)
+        parser.add_argument('--llm-latency', default='lognormal:1.0,0.4', help="Chat completion latency spec.")
+        parser.add_argument('--llm-error-rate', type=float, default=0.0, help="Share of chat completions that fail.")
+        parser.add_argument('--fact-check-latency', default='lognormal:0.2,0.5', help="claims:search latency spec.")
+        parser.add_argument('--fact-check-error-rate', type=float, default=0.0, help="Share of claims:search calls that fail.")
+        parser.add_argument('--match-rate', type=float, default=0.3, help="Share of claims that get a fact-check review.")
+
+    def handle(self, *args, **options):
+        try:
+            server = MockAPIServer(
+                host=options['host'],
+                port=options['port'],
+                llm=EndpointBehaviour(options['llm_latency'], options['llm_error_rate']),
+                fact_check=EndpointBehaviour(options['fact_check_latency'], options['fact_check_error_rate']),
+                match_rate=options['match_rate'],
+            )
+        except (ValueError, OSError) as e:
+            raise CommandError(str(e))
+
+        self.stdout.write(f"[MOCK APIS] Serving on {server.base_url}")
+        self.stdout.write(f"[MOCK APIS]   OPENAI_BASE_URL={server.openai_base_url}")
+        self.stdout.write(f"[MOCK APIS]   GOOGLE_FACT_CHECK_ENDPOINT={server.fact_check_endpoint}")
+        self.stdout.write(f"[MOCK APIS]   Request counters at {server.base_url}/stats")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+            self.stdout.write(f"[MOCK APIS] Stopped: {server.stats()}")
@@ -0,0 +1,34 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from content_generation.jobs import submit_background
+from content_generation.outbox import claim_outbox_batch, get_pipeline_config, requeue_stale_events, run_outbox_event
+
+
+class Command(BaseCommand):
+    help = "Run a pipeline worker that claims PipelineOutbox events and runs fact-checking and content processing."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=None, help="Events claimed per poll (default: CONTENT_PIPELINE['BATCH_SIZE']).")
+        parser.add_argument('--poll-interval', type=float, default=2.0, help="Seconds to sleep when the outbox is empty.")
+        parser.add_argument('--once', action='store_true', help="Drain the outbox once and exit.")
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size'] or get_pipeline_config()['BATCH_SIZE']
+        self.stdout.write(f"[PIPELINE WORKER] Pipeline worker started (batch size {batch_size})")
+        while True:
+            requeued = requeue_stale_events()
+            if requeued:
+                self.stdout.write(f"[PIPELINE WORKER] Requeued {requeued} stale event(s)")
+
+            events = claim_outbox_batch(limit=batch_size)
+            if events:
+                futures = [submit_background(run_outbox_event, event) for event in events]
+                succeeded = sum(1 for future in futures if future.result())
+                self.stdout.write(f"[PIPELINE WORKER] Processed {len(events)} event(s), {len(events) - succeeded} failed")
+                continue
+
+            if options['once']:
+                break
+            time.sleep(options['poll_interval'])
@@ -0,0 +1,32 @@
+# Generated by Django 5.1.4 on 2026-10-18 18:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('content_generation', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='apiprompt',
+            name='error_message',
+            field=models.TextField(blank=True),
+        ),
+        migrations.AddField(
+            model_name='apiprompt',
+            name='finished_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='apiprompt',
+            name='started_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='apiprompt',
+            index=models.Index(fields=['status', 'created_at'], name='content_gen_status_cdc3c1_idx'),
+        ),
+    ]
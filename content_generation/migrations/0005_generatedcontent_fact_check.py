@@ -0,0 +1,42 @@
+# Generated by Django 5.1.4 on 2026-10-18 18:15
+
+import hashlib
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def link_fact_checks(apps, schema_editor):
+    """
+    Link existing rows to the fact check stored for their article body.
+    """
+    GeneratedContent = apps.get_model('content_generation', 'GeneratedContent')
+    FactCheckResult = apps.get_model('fact_checking', 'FactCheckResult')
+    batch = []
+    for row_id, body in GeneratedContent.objects.filter(fact_check__isnull=True).values_list('id', 'body').iterator(chunk_size=500):
+        claim_hash = hashlib.sha256((body or '').encode('utf-8')).hexdigest()
+        fact_check_id = FactCheckResult.objects.filter(claim_hash=claim_hash).values_list('id', flat=True).first()
+        if fact_check_id is not None:
+            batch.append(GeneratedContent(id=row_id, fact_check_id=fact_check_id))
+        if len(batch) >= 500:
+            GeneratedContent.objects.bulk_update(batch, ['fact_check'])
+            batch = []
+    if batch:
+        GeneratedContent.objects.bulk_update(batch, ['fact_check'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('content_generation', '0004_pipeline_outbox'),
+        ('fact_checking', '0002_factcheckresult_claim_hash'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='generatedcontent',
+            name='fact_check',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='generated_contents', to='fact_checking.factcheckresult'),
+        ),
+        migrations.RunPython(link_fact_checks, migrations.RunPython.noop),
+    ]
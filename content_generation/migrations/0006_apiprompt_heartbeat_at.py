@@ -0,0 +1,18 @@
+# Generated by Django 5.1.4 on 2026-10-18 19:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('content_generation', '0005_generatedcontent_fact_check'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='apiprompt',
+            name='heartbeat_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
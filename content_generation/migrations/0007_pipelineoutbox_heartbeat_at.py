@@ -0,0 +1,18 @@
+# Generated by Django 5.1.4 on 2026-10-18 19:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('content_generation', '0006_apiprompt_heartbeat_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='pipelineoutbox',
+            name='heartbeat_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,297 @@
+"""
+Local stand-ins for the external APIs the pipeline calls, for load testing without
+spending quota:
+
+  - POST .../chat/completions  (OpenAI chat completions, including stream=true)
+  - GET  .../claims:search     (Google Fact Check Tools)
+
+Each endpoint sleeps for a latency drawn from a configurable distribution and fails
+with a configurable probability (429 with Retry-After, or 500/503). Responses are
+deterministic for a given request, so repeated runs generate the same articles.
+
+Point the app at a running server with OPENAI_BASE_URL=http://HOST:PORT/v1 and
+GOOGLE_FACT_CHECK_ENDPOINT=http://HOST:PORT/v1alpha1/claims:search.
+"""
+import hashlib
+import json
+import logging
+import math
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+logger = logging.getLogger(__name__)
+
+ERROR_STATUS_CODES = (429, 500, 503)
+
+RATINGS = ('False', 'Mostly False', 'Misleading', 'Half True', 'Mostly True', 'True')
+
+PUBLISHERS = (
+    ('PolitiFact', 'politifact.com'),
+    ('Full Fact', 'fullfact.org'),
+    ('AFP Fact Check', 'factcheck.afp.com'),
+    ('Reuters Fact Check', 'reuters.com'),
+)
+
+SUBJECTS = (
+    'The city council', 'Health officials', 'The central bank', 'Researchers at the university',
+    'The election commission', 'A government report', 'The environment agency', 'Local police',
+    'The technology ministry', 'Industry analysts',
+)
+VERBS = ('announced', 'reported', 'confirmed', 'said', 'found')
+FINDINGS = (
+    'that unemployment fell by {n} percent last year',
+    'that {n} million people were affected by the new policy',
+    'that emissions increased by {n} percent since 2019',
+    'that the new smartphone sold {n} million units in its first week',
+    'that hospital admissions rose by {n} percent this winter',
+    'that {n} schools will receive funding for machine learning courses',
+    'that the budget for climate programs grew to {n} billion dollars',
+    'that voter turnout reached {n} percent in the election',
+)
+
+
+class LatencyDistribution:
+    """
+    Parsed latency spec, in seconds:
+      '0.5' or 'const:0.5'       always 0.5
+      'uniform:0.2,1.0'          uniform between 0.2 and 1.0
+      'normal:0.8,0.2'           mean 0.8, standard deviation 0.2
+      'lognormal:0.8,0.5'        median 0.8, sigma 0.5 (long right tail)
+      'exp:0.5'                  exponential with mean 0.5
+    Negative samples are clamped to zero.
+    """
+    KINDS = {'const': 1, 'uniform': 2, 'normal': 2, 'lognormal': 2, 'exp': 1}
+
+    def __init__(self, spec):
+        self.spec = str(spec)
+        kind, _, params = self.spec.partition(':')
+        if not params:
+            kind, params = 'const', kind
+        try:
+            self.params = [float(value) for value in params.split(',')]
+        except ValueError:
+            raise ValueError(f"Invalid latency spec: {spec}")
+        if kind not in self.KINDS or len(self.params) != self.KINDS[kind]:
+            raise ValueError(f"Invalid latency spec: {spec}")
+        self.kind = kind
+
+    def sample(self, rng=random):
+        if self.kind == 'const':
+            value = self.params[0]
+        elif self.kind == 'uniform':
+            value = rng.uniform(*self.params)
+        elif self.kind == 'normal':
+            value = rng.gauss(*self.params)
+        elif self.kind == 'lognormal':
+            median, sigma = self.params
+            value = rng.lognormvariate(math.log(median), sigma) if median > 0 else 0.0
+        else:
+            value = rng.expovariate(1.0 / self.params[0]) if self.params[0] > 0 else 0.0
+        return max(0.0, value)
+
+    def __str__(self):
+        return self.spec
+
+
+class EndpointBehaviour:
+    """
+    Latency and failure settings for one mocked endpoint, plus its request counters.
+    """
+
+    def __init__(self, latency='0', error_rate=0.0, retry_after=0.5):
+        self.latency = latency if isinstance(latency, LatencyDistribution) else LatencyDistribution(latency)
+        self.error_rate = error_rate
+        self.retry_after = retry_after
+        self.requests = 0
+        self.errors = 0
+        self._lock = threading.Lock()
+
+    def roll(self):
+        """
+        Count a request and return the error status to answer with, or None to succeed.
+        """
+        failed = random.random() < self.error_rate
+        with self._lock:
+            self.requests += 1
+            if failed:
+                self.errors += 1
+        return random.choice(ERROR_STATUS_CODES) if failed else None
+
+    def wait(self):
+        time.sleep(self.latency.sample())
+
+    def as_dict(self):
+        with self._lock:
+            return {'requests': self.requests, 'errors': self.errors, 'latency': str(self.latency)}
+
+
+def _rng(*parts):
+    return random.Random(hashlib.sha256(json.dumps(parts, sort_keys=True).encode('utf-8')).hexdigest())
+
+
+def fake_article(messages, max_tokens=256):
+    """
+    A deterministic news-like article for the given chat messages: a title line followed
+    by sentences with numbers and reporting language, so claim extraction has work to do.
+    """
+    rng = _rng(messages, max_tokens)
+    sentences = []
+    for _ in range(max(2, min(12, max_tokens // 24))):
+        finding = rng.choice(FINDINGS).format(n=rng.randint(2, 95))
+        sentences.append(f"{rng.choice(SUBJECTS)} {rng.choice(VERBS)} {finding}.")
+    title = sentences[0].rstrip('.')
+    return f"{title}\n" + ' '.join(sentences[1:])
+
+
+def fake_claims(query, match_rate):
+    """
+    A deterministic claims:search response: a single review for a match_rate share of queries.
+    """
+    rng = _rng(query)
+    if rng.random() >= match_rate:
+        return {}
+    publisher, site = rng.choice(PUBLISHERS)
+    slug = hashlib.sha1(query.encode('utf-8')).hexdigest()[:12]
+    return {
+        'claims': [{
+            'text': query,
+            'claimant': rng.choice(SUBJECTS),
+            'claimDate': '2024-01-15T00:00:00Z',
+            'claimReview': [{
+                'publisher': {'name': publisher, 'site': site},
+                'url': f"https://{site}/fact-check/{slug}",
+                'title': f"Fact check: {query[:80]}",
+                'reviewDate': '2024-01-20T00:00:00Z',
+                'textualRating': rng.choice(RATINGS),
+                'languageCode': 'en',
+            }],
+        }]
+    }
+
+
+class MockAPIServer(ThreadingHTTPServer):
+    """
+    Threaded HTTP server answering both mocked APIs. Use start() to serve from a
+    daemon thread, or serve_forever() to block.
+    """
+    daemon_threads = True
+    request_queue_size = 128
+
+    def __init__(self, host='127.0.0.1', port=8765, llm=None, fact_check=None, match_rate=0.3):
+        super().__init__((host, port), MockAPIHandler)
+        self.llm = llm or EndpointBehaviour()
+        self.fact_check = fact_check or EndpointBehaviour()
+        self.match_rate = match_rate
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def openai_base_url(self):
+        return f"{self.base_url}/v1"
+
+    @property
+    def fact_check_endpoint(self):
+        return f"{self.base_url}/v1alpha1/claims:search"
+
+    def start(self):
+        self._thread = threading.Thread(target=self.serve_forever, name='mock-apis', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+    def stats(self):
+        return {'chat_completions': self.llm.as_dict(), 'claims_search': self.fact_check.as_dict()}
+
+
+class MockAPIHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        logger.debug("mock-apis: " + format, *args)
+
+    def _send_json(self, status_code, payload, headers=None):
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(status_code)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_error(self, behaviour, status_code):
+        headers = {'Retry-After': str(behaviour.retry_after)} if status_code == 429 else None
+        self._send_json(status_code, {'error': {'code': status_code, 'message': 'Mock upstream error'}}, headers)
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        if url.path.endswith('/stats'):
+            return self._send_json(200, self.server.stats())
+        if not url.path.endswith('claims:search'):
+            return self._send_json(404, {'error': {'code': 404, 'message': 'Not found'}})
+        behaviour = self.server.fact_check
+        behaviour.wait()
+        error = behaviour.roll()
+        if error:
+            return self._send_error(behaviour, error)
+        query = parse_qs(url.query).get('query', [''])[0]
+        self._send_json(200, fake_claims(query, self.server.match_rate))
+
+    def do_POST(self):
+        url = urlsplit(self.path)
+        length = int(self.headers.get('Content-Length') or 0)
+        try:
+            payload = json.loads(self.rfile.read(length) or b'{}')
+        except ValueError:
+            return self._send_json(400, {'error': {'code': 400, 'message': 'Invalid JSON'}})
+        if not url.path.endswith('/chat/completions'):
+            return self._send_json(404, {'error': {'code': 404, 'message': 'Not found'}})
+        behaviour = self.server.llm
+        error = behaviour.roll()
+        if not payload.get('stream'):
+            behaviour.wait()
+        if error:
+            return self._send_error(behaviour, error)
+        content = fake_article(payload.get('messages', []), payload.get('max_tokens', 256))
+        if payload.get('stream'):
+            return self._stream_completion(payload, content, behaviour)
+        self._send_json(200, {
+            'id': f"chatcmpl-mock-{hashlib.sha1(content.encode('utf-8')).hexdigest()[:16]}",
+            'object': 'chat.completion',
+            'created': int(time.time()),
+            'model': payload.get('model', 'mock'),
+            'choices': [{'index': 0, 'message': {'role': 'assistant', 'content': content}, 'finish_reason': 'stop'}],
+            'usage': {'prompt_tokens': 0, 'completion_tokens': len(content.split()), 'total_tokens': len(content.split())},
+        })
+
+    def _stream_completion(self, payload, content, behaviour):
+        """
+        Send the completion as server-sent events, spreading the latency over the chunks.
+        """
+        words = content.split(' ')
+        delay = behaviour.latency.sample() / max(1, len(words))
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.send_header('Connection', 'close')
+        self.end_headers()
+        self.close_connection = True
+        for i, word in enumerate(words):
+            time.sleep(delay)
+            chunk = {
+                'object': 'chat.completion.chunk',
+                'model': payload.get('model', 'mock'),
+                'choices': [{'index': 0, 'delta': {'content': word if i == 0 else ' ' + word}}],
+            }
+            self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode('utf-8'))
+            self.wfile.flush()
+        self.wfile.write(b"data: [DONE]\n\n")
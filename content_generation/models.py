@@ -2,6 +2,7 @@ from django.db import models
 from django.db.models.signals import post_save
 from django.dispatch import receiver
 from django.db import transaction
+from django.utils import timezone
 
 class APIPrompt(models.Model):
     """
@@ -10,8 +11,16 @@ class APIPrompt(models.Model):
     prompt_text = models.TextField()
     temperature = models.FloatField(default=0.7)
     token_limit = models.IntegerField(default=256)
-    status = models.CharField(max_length=20, default='pending')  # pending, completed, error
+    status = models.CharField(max_length=20, default='pending')  # pending, running, completed, error
+    error_message = models.TextField(blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)  # Set when a worker claims the prompt
+    heartbeat_at = models.DateTimeField(null=True, blank=True)  # Refreshed by the worker while it generates
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        # Workers poll for the oldest pending prompts.
+        indexes = [models.Index(fields=['status', 'created_at'])]
 
     def __str__(self):
         return f"Prompt: {self.prompt_text[:50]}..."
@@ -24,77 +33,134 @@ class GeneratedContent(models.Model):
     title = models.CharField(max_length=999)
     body = models.TextField()
     created_at = models.DateTimeField(auto_now_add=True)
+    # Set when this article is a near-duplicate of an earlier one; the pipeline is skipped for it.
+    duplicate_of = models.ForeignKey('self', on_delete=models.SET_NULL, null=True, blank=True, related_name='near_duplicates')
+    # The fact check run for this article's body, linked by the pipeline
+    fact_check = models.ForeignKey('fact_checking.FactCheckResult', on_delete=models.SET_NULL, null=True, blank=True, related_name='generated_contents')
 
     def __str__(self):
         return self.title
 
+class ContentFingerprint(models.Model):
+    """
+    SimHash fingerprint of a GeneratedContent body, split into indexed 16-bit bands
+    for near-duplicate lookups (see content_generation.dedup).
+    """
+    content = models.OneToOneField(GeneratedContent, on_delete=models.CASCADE, primary_key=True, related_name='fingerprint')
+    simhash = models.BigIntegerField()  # Unsigned 64-bit value stored as signed
+    band_0 = models.IntegerField(db_index=True)
+    band_1 = models.IntegerField(db_index=True)
+    band_2 = models.IntegerField(db_index=True)
+    band_3 = models.IntegerField(db_index=True)
+
+    def __str__(self):
+        return f"Fingerprint for content {self.content_id}"
+
+class PipelineOutbox(models.Model):
+    """
+    Transactional outbox of pipeline work. A row is written in the same transaction as
+    its GeneratedContent; pipeline workers claim pending rows in batches and run
+    fact-checking and content processing outside the request that created the content.
+    """
+    content = models.ForeignKey(GeneratedContent, on_delete=models.CASCADE, related_name='pipeline_events')
+    status = models.CharField(max_length=20, default='pending')  # pending, processing, done, failed
+    attempts = models.IntegerField(default=0)
+    available_at = models.DateTimeField(default=timezone.now)  # Retries are pushed into the future
+    locked_at = models.DateTimeField(null=True, blank=True)
+    lock_token = models.UUIDField(null=True, blank=True)
+    heartbeat_at = models.DateTimeField(null=True, blank=True)  # Refreshed by the worker while it runs the event
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['available_at', 'id'], condition=models.Q(status='pending'), name='pipeline_outbox_pending_idx'),
+            models.Index(fields=['status', 'locked_at']),
+        ]
+
+    def __str__(self):
+        return f"Pipeline event for content {self.content_id} ({self.status})"
+
 
-# Signal: When an APIPrompt is created, trigger content generation automatically.
+# Signal: When an APIPrompt is created, queue it for content generation.
 @receiver(post_save, sender=APIPrompt)
 def trigger_content_generation(sender, instance, created, **kwargs):
     """
-    When an APIPrompt is saved with 'pending' status, generate content from it.
+    When an APIPrompt is saved with 'pending' status, hand it to the generation queue.
+    The prompt is only dispatched once the row is committed, and workers claim it
+    atomically, so each prompt is generated exactly once.
     """
     if created and instance.status == 'pending':
         # Import here to avoid circular imports
-        from .utils import generate_content_from_prompt
+        from .jobs import enqueue_prompt
+
+        transaction.on_commit(lambda: enqueue_prompt(instance.pk))
+
+
+def run_content_pipeline(instance):
+    """
+    Run the full pipeline for a GeneratedContent instance:
+    0. Near-duplicate check (duplicates are linked to their canonical article and stop here)
+    1. Claims from a sentence-only pass, whose fact-check lookups start right away;
+       while they are in flight the entity pass computes categories and tags. Both are
+       memoized by body and pipeline version, so a body seen before skips NLP.
+    2. Content processing: join both results into ProcessedContent and publish
+    """
+    try:
+        print(f"[PIPELINE] Starting pipeline for: {instance.title} (ID: {instance.id})")
+        
+        # Step 0: Near-duplicates of an existing article skip the expensive stages
+        from .dedup import register_content
+        canonical = register_content(instance)
+        if canonical is not None:
+            print(f"[PIPELINE] Near-duplicate of article ID {canonical.id}, skipping pipeline")
+            return
+        
+        # Step 1: Claims only need sentence boundaries, so extract them with the cheap
+        # sentence pass and start their fact-check lookups (network bound, on the
+        # background event loop); the entity pass for categories and tags runs meanwhile.
+        # A stored NLP result skips both passes; an existing fact check is reused.
+        print(f"[PIPELINE] Step 1: NLP and fact checking...")
+        from fact_checking.claims import extract_claims
+        from fact_checking.utils import process_fact_check_for_content, submit_fact_check_many
+        from content_processing.nlp_cache import compute_result, find_result, pipeline_version
+        from content_processing.utils import process_generated_content
+        version = pipeline_version()
+        nlp_result = find_result(instance.body, version)
+        claims = nlp_result.claims if nlp_result is not None else extract_claims(instance.body)
+        lookups = submit_fact_check_many(claims) if instance.fact_check_id is None else None
+        if nlp_result is None:
+            nlp_result = compute_result(instance.body, version, claims=claims)
+        fact_check = process_fact_check_for_content(instance, claims=claims, lookups=lookups)
+        categories, tags = nlp_result.categories, nlp_result.tags
+        print(f"[PIPELINE] NLP and fact checking complete")
         
-        def _generate():
-            try:
-                result = generate_content_from_prompt(
-                    instance.prompt_text,
-                    temperature=instance.temperature,
-                    token_limit=instance.token_limit
-                )
-                GeneratedContent.objects.create(
-                    prompt=instance,
-                    title=result.get('title', 'Untitled'),
-                    body=result.get('body', '')
-                )
-                instance.status = 'completed'
-                instance.save(update_fields=['status'])
-            except Exception as e:
-                print(f"[ERROR] Content generation failed: {str(e)}")
-                instance.status = 'error'
-                instance.save(update_fields=['status'])
+        # Step 2: Content processing (join point: ProcessedContent and publishing)
+        print(f"[PIPELINE] Step 2: Content processing...")
+        process_generated_content(instance, categories=categories, tags=tags, fact_check=fact_check)
+        print(f"[PIPELINE] Content processing complete")
         
-        # Execute after transaction commits to avoid database locks
-        transaction.on_commit(_generate)
+        print(f"[PIPELINE] Pipeline complete for article ID {instance.id}")
+        
+    except Exception as e:
+        print(f"[PIPELINE ERROR] Failed to process content: {type(e).__name__}: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        raise  # Let the outbox worker record the failure and retry
 
 
 # Signal: When GeneratedContent is created, automatically trigger the full pipeline
 @receiver(post_save, sender=GeneratedContent)
 def trigger_content_pipeline(sender, instance, created, **kwargs):
     """
-    When GeneratedContent is created, trigger:
-    1. Fact checking
-    2. Content processing (categorization, tagging, publishing)
+    When GeneratedContent is created, write a PipelineOutbox row in the same transaction.
+    Pipeline workers pick it up after commit, so no pipeline work runs in the request
+    and none is lost if the process dies.
     
     This single signal replaces the previous two separate signals to avoid race conditions.
+    Rows inserted with bulk_create don't send post_save, so callers use
+    outbox.enqueue_pipeline themselves.
     """
     if created:
-        def _process_pipeline():
-            try:
-                print(f"[PIPELINE] Starting pipeline for: {instance.title} (ID: {instance.id})")
-                
-                # Step 1: Fact checking
-                print(f"[PIPELINE] Step 1: Fact checking...")
-                from fact_checking.utils import process_fact_check_for_content
-                process_fact_check_for_content(instance)
-                print(f"[PIPELINE] Fact checking complete")
-                
-                # Step 2: Content processing (categorization, tagging, publishing)
-                print(f"[PIPELINE] Step 2: Content processing...")
-                from content_processing.utils import process_generated_content
-                process_generated_content(instance)
-                print(f"[PIPELINE] Content processing complete")
-                
-                print(f"[PIPELINE] Pipeline complete for article ID {instance.id}")
-                
-            except Exception as e:
-                print(f"[PIPELINE ERROR] Failed to process content: {type(e).__name__}: {str(e)}")
-                import traceback
-                traceback.print_exc()
-        
-        # Execute after transaction commits
-        transaction.on_commit(_process_pipeline)
\ No newline at end of file
+        from .outbox import enqueue_pipeline
+        enqueue_pipeline([instance])
@@ -0,0 +1,186 @@
+"""
+Transactional outbox for the content pipeline.
+
+Creating a GeneratedContent also writes a PipelineOutbox row in the same
+transaction, so pipeline work is recorded exactly when the content is committed
+and survives a crash of the process that created it. Workers claim pending rows
+in batches with SELECT ... FOR UPDATE SKIP LOCKED, so any number of them can run
+side by side without picking up the same event.
+
+A worker refreshes heartbeat_at while it runs an event; only events whose heartbeat
+has gone quiet are requeued, and a worker records an outcome only while the event
+still carries its lock_token, so a requeued event is never finished twice.
+"""
+import logging
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Min, Q
+from django.utils import timezone
+
+from .models import PipelineOutbox
+
+logger = logging.getLogger(__name__)
+
+
+def get_pipeline_config():
+    config = {
+        'DISPATCH': 'worker',
+        'BATCH_SIZE': 20,
+        'MAX_ATTEMPTS': 5,
+        'RETRY_DELAY': 30,
+        'HEARTBEAT_INTERVAL': 60,
+        'STALE_AFTER': 300,
+    }
+    config.update(getattr(settings, 'CONTENT_PIPELINE', {}))
+    return config
+
+
+def enqueue_pipeline(contents):
+    """
+    Record pipeline events for saved GeneratedContent rows. Call inside the transaction
+    that created them; the events commit or roll back with the content.
+
+    CONTENT_PIPELINE['DISPATCH'] decides who runs them:
+      - 'worker': the run_pipeline_worker processes claim them from the table (default)
+      - 'thread': they are also started on the in-process background pool after commit;
+                  anything the process doesn't finish is left to the workers
+    """
+    dispatch = get_pipeline_config()['DISPATCH']
+    if dispatch not in ('worker', 'thread'):
+        raise ValueError(f"Unknown CONTENT_PIPELINE['DISPATCH']: {dispatch}")
+    contents = list(contents)
+    if not contents:
+        return []
+    if len(contents) == 1:
+        events = [PipelineOutbox.objects.create(content=contents[0])]
+    else:
+        events = PipelineOutbox.objects.bulk_create([PipelineOutbox(content=content) for content in contents])
+
+    if dispatch == 'thread':
+        from .jobs import submit_background
+
+        event_ids = [event.pk for event in events]
+        transaction.on_commit(lambda: [submit_background(process_outbox_event, event_id) for event_id in event_ids])
+    return events
+
+
+def claim_outbox_batch(limit=None):
+    """
+    Claim up to `limit` of the oldest due events for this worker and return them.
+    Rows locked by other workers are skipped rather than waited on.
+    """
+    if limit is None:
+        limit = get_pipeline_config()['BATCH_SIZE']
+    token = uuid.uuid4()
+    now = timezone.now()
+    with transaction.atomic():
+        event_ids = list(
+            PipelineOutbox.objects.select_for_update(skip_locked=True)
+            .filter(status='pending', available_at__lte=now)
+            .order_by('available_at', 'id')
+            .values_list('id', flat=True)[:limit]
+        )
+        if not event_ids:
+            return []
+        PipelineOutbox.objects.filter(id__in=event_ids, status='pending').update(
+            status='processing', locked_at=now, heartbeat_at=now, lock_token=token
+        )
+    return list(
+        PipelineOutbox.objects.filter(lock_token=token, status='processing')
+        .select_related('content')
+        .order_by('id')
+    )
+
+
+def claim_outbox_event(event_id):
+    """
+    Claim a single event by id (used by in-process dispatch). Returns the event, or
+    None if a worker already has it or it isn't due yet.
+    """
+    token = uuid.uuid4()
+    now = timezone.now()
+    claimed = PipelineOutbox.objects.filter(
+        pk=event_id, status='pending', available_at__lte=now
+    ).update(status='processing', locked_at=now, heartbeat_at=now, lock_token=token)
+    if not claimed:
+        return None
+    return PipelineOutbox.objects.select_related('content').get(pk=event_id)
+
+
+def run_outbox_event(event):
+    """
+    Run the pipeline for a claimed event and record the outcome. Failures are retried
+    with exponential backoff until MAX_ATTEMPTS, then the event is marked 'failed'.
+    """
+    from .jobs import keep_alive
+    from .models import run_content_pipeline
+
+    config = get_pipeline_config()
+    owned = PipelineOutbox.objects.filter(pk=event.pk, status='processing', lock_token=event.lock_token)
+    try:
+        with keep_alive(owned, config['HEARTBEAT_INTERVAL']):
+            run_content_pipeline(event.content)
+    except Exception as e:
+        attempts = event.attempts + 1
+        failed = attempts >= config['MAX_ATTEMPTS']
+        delay = config['RETRY_DELAY'] * 2 ** (attempts - 1)
+        recorded = owned.update(
+            status='failed' if failed else 'pending',
+            attempts=attempts,
+            available_at=timezone.now() + timedelta(seconds=delay),
+            locked_at=None,
+            heartbeat_at=None,
+            lock_token=None,
+            last_error=f"{type(e).__name__}: {e}",
+        )
+        if recorded:
+            logger.warning("Pipeline event %s failed (attempt %d): %s", event.pk, attempts, e)
+        else:
+            logger.warning("Pipeline event %s was claimed by another worker, not recording this failure", event.pk)
+        return False
+
+    if not owned.update(status='done', attempts=event.attempts + 1, locked_at=None, heartbeat_at=None, last_error=''):
+        logger.warning("Pipeline event %s was claimed by another worker, not recording this run", event.pk)
+    return True
+
+
+def process_outbox_event(event_id):
+    """
+    Claim and run a single event. Returns False if it was not claimable.
+    """
+    event = claim_outbox_event(event_id)
+    if event is None:
+        return False
+    return run_outbox_event(event)
+
+
+def requeue_stale_events(timeout_seconds=None):
+    """
+    Return events stuck in 'processing' to 'pending': those whose worker hasn't sent a
+    heartbeat for timeout_seconds (e.g. it died). Events still running keep beating
+    and are left alone however long they take.
+    """
+    if timeout_seconds is None:
+        timeout_seconds = get_pipeline_config()['STALE_AFTER']
+    cutoff = timezone.now() - timedelta(seconds=timeout_seconds)
+    return PipelineOutbox.objects.filter(
+        Q(heartbeat_at__lt=cutoff) | Q(heartbeat_at__isnull=True, locked_at__lt=cutoff),
+        status='processing',
+    ).update(status='pending', locked_at=None, heartbeat_at=None, lock_token=None)
+
+
+def outbox_stats():
+    """
+    Event counts by status, plus the age in seconds of the oldest due pending event.
+    """
+    counts = {row['status']: row['n'] for row in PipelineOutbox.objects.values('status').annotate(n=Count('id'))}
+    oldest = PipelineOutbox.objects.filter(status='pending', available_at__lte=timezone.now()).aggregate(
+        oldest=Min('created_at')
+    )['oldest']
+    return {
+        'counts': counts,
+        'oldest_pending_age': round((timezone.now() - oldest).total_seconds(), 1) if oldest else 0.0,
+    }
@@ -0,0 +1,387 @@
+"""
+LLM provider layer.
+
+Each provider turns chat messages into generated text, synchronously, asynchronously
+or as a stream of text chunks. HTTP providers keep one pooled httpx client per
+process (and one async client per event loop), apply connect/read timeouts and
+retry 429/5xx responses and transport errors with exponential backoff.
+
+Providers are configured in settings.LLM_PROVIDERS and looked up with get_provider().
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import random
+import threading
+import time
+import weakref
+
+import httpx
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+RETRYABLE_STATUS_CODES = {408, 409, 429, 500, 502, 503, 504, 529}
+
+
+class ProviderError(Exception):
+    """Raised when a provider request fails after all retries."""
+
+    def __init__(self, message, status_code=None):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class LLMProvider:
+    """
+    Base class for LLM backends.
+    """
+    name = 'base'
+
+    def __init__(self, model, **options):
+        self.model = model
+
+    def complete(self, messages, temperature=0.7, max_tokens=256, model=None):
+        """Return the generated text for messages."""
+        raise NotImplementedError
+
+    async def acomplete(self, messages, temperature=0.7, max_tokens=256, model=None):
+        """Async variant of complete()."""
+        raise NotImplementedError
+
+    async def astream(self, messages, temperature=0.7, max_tokens=256, model=None):
+        """Yield generated text chunks as they arrive."""
+        raise NotImplementedError
+        yield  # pragma: no cover
+
+    def close(self):
+        pass
+
+
+class HTTPProvider(LLMProvider):
+    """
+    Shared plumbing for providers spoken to over HTTP.
+    """
+    default_base_url = ''
+
+    def __init__(self, model, api_key=None, base_url=None, timeout=60.0, connect_timeout=5.0,
+                 max_retries=3, backoff_base=0.5, backoff_max=20.0, max_connections=100, **options):
+        super().__init__(model, **options)
+        self.api_key = api_key
+        self.base_url = (base_url or self.default_base_url).rstrip('/')
+        self.timeout = httpx.Timeout(timeout, connect=connect_timeout)
+        self.limits = httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self._client = None
+        self._client_pid = None
+        self._async_clients = weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+
+    # -- clients ---------------------------------------------------------------
+
+    @property
+    def client(self):
+        """
+        Persistent connection-pooled client. Recreated after a fork so workers
+        never share sockets with their parent.
+        """
+        pid = os.getpid()
+        if self._client is None or self._client_pid != pid:
+            with self._lock:
+                if self._client is None or self._client_pid != pid:
+                    self._client = httpx.Client(
+                        base_url=self.base_url, headers=self.headers(), timeout=self.timeout, limits=self.limits
+                    )
+                    self._client_pid = pid
+        return self._client
+
+    @property
+    def async_client(self):
+        """
+        Pooled async client for the running event loop (async connections can't be
+        shared between loops).
+        """
+        loop = asyncio.get_running_loop()
+        client = self._async_clients.get(loop)
+        if client is None:
+            client = httpx.AsyncClient(
+                base_url=self.base_url, headers=self.headers(), timeout=self.timeout, limits=self.limits
+            )
+            self._async_clients[loop] = client
+        return client
+
+    def close(self):
+        if self._client is not None:
+            self._client.close()
+            self._client = None
+
+    # -- retries ---------------------------------------------------------------
+
+    def backoff_delay(self, attempt, response=None):
+        """
+        Exponential backoff with full jitter, honouring Retry-After when the server sends it.
+        """
+        if response is not None:
+            retry_after = response.headers.get('retry-after')
+            if retry_after:
+                try:
+                    return min(float(retry_after), self.backoff_max)
+                except ValueError:
+                    pass
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    def _should_retry(self, attempt, status_code):
+        return attempt < self.max_retries and status_code in RETRYABLE_STATUS_CODES
+
+    def _raise_for_status(self, response):
+        if response.status_code >= 400:
+            raise ProviderError(
+                f"{self.name} request failed with HTTP {response.status_code}: {response.text[:200]}",
+                status_code=response.status_code
+            )
+
+    def post_json(self, path, payload):
+        attempt = 0
+        while True:
+            try:
+                response = self.client.post(path, json=payload)
+            except httpx.TransportError as e:
+                if attempt >= self.max_retries:
+                    raise ProviderError(f"{self.name} request failed: {e}") from e
+                time.sleep(self.backoff_delay(attempt))
+                attempt += 1
+                continue
+            if self._should_retry(attempt, response.status_code):
+                logger.info("%s returned %s, retrying (attempt %d)", self.name, response.status_code, attempt + 1)
+                time.sleep(self.backoff_delay(attempt, response))
+                attempt += 1
+                continue
+            self._raise_for_status(response)
+            return response.json()
+
+    async def apost_json(self, path, payload):
+        attempt = 0
+        while True:
+            try:
+                response = await self.async_client.post(path, json=payload)
+            except httpx.TransportError as e:
+                if attempt >= self.max_retries:
+                    raise ProviderError(f"{self.name} request failed: {e}") from e
+                await asyncio.sleep(self.backoff_delay(attempt))
+                attempt += 1
+                continue
+            if self._should_retry(attempt, response.status_code):
+                logger.info("%s returned %s, retrying (attempt %d)", self.name, response.status_code, attempt + 1)
+                await asyncio.sleep(self.backoff_delay(attempt, response))
+                attempt += 1
+                continue
+            self._raise_for_status(response)
+            return response.json()
+
+    async def astream_lines(self, path, payload):
+        """
+        POST payload and yield the response body line by line. Retries only happen
+        before the first byte is received.
+        """
+        attempt = 0
+        started = False
+        while True:
+            try:
+                async with self.async_client.stream('POST', path, json=payload) as response:
+                    if self._should_retry(attempt, response.status_code):
+                        delay = self.backoff_delay(attempt, response)
+                    else:
+                        if response.status_code >= 400:
+                            await response.aread()
+                            self._raise_for_status(response)
+                        async for line in response.aiter_lines():
+                            started = True
+                            yield line
+                        return
+            except httpx.TransportError as e:
+                if started or attempt >= self.max_retries:
+                    raise ProviderError(f"{self.name} request failed: {e}") from e
+                delay = self.backoff_delay(attempt)
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    def headers(self):
+        return {}
+
+
+class OpenAIProvider(HTTPProvider):
+    """
+    OpenAI chat completions API (also works with OpenAI-compatible servers via BASE_URL).
+    """
+    name = 'openai'
+    default_base_url = 'https://api.openai.com/v1'
+
+    def headers(self):
+        return {'Authorization': f"Bearer {self.api_key}"}
+
+    def _payload(self, messages, temperature, max_tokens, model, stream=False):
+        payload = {
+            'model': model or self.model,
+            'messages': messages,
+            'temperature': temperature,
+            'max_tokens': max_tokens,
+        }
+        if stream:
+            payload['stream'] = True
+        return payload
+
+    def complete(self, messages, temperature=0.7, max_tokens=256, model=None):
+        data = self.post_json('/chat/completions', self._payload(messages, temperature, max_tokens, model))
+        return data['choices'][0]['message']['content']
+
+    async def acomplete(self, messages, temperature=0.7, max_tokens=256, model=None):
+        data = await self.apost_json('/chat/completions', self._payload(messages, temperature, max_tokens, model))
+        return data['choices'][0]['message']['content']
+
+    async def astream(self, messages, temperature=0.7, max_tokens=256, model=None):
+        payload = self._payload(messages, temperature, max_tokens, model, stream=True)
+        async for line in self.astream_lines('/chat/completions', payload):
+            if not line.startswith('data:'):
+                continue
+            data = line[len('data:'):].strip()
+            if data == '[DONE]':
+                break
+            delta = json.loads(data)['choices'][0].get('delta', {}).get('content')
+            if delta:
+                yield delta
+
+
+class AnthropicProvider(HTTPProvider):
+    """
+    Anthropic Messages API (Claude).
+    """
+    name = 'anthropic'
+    default_base_url = 'https://api.anthropic.com/v1'
+    api_version = '2023-06-01'
+
+    def headers(self):
+        return {'x-api-key': self.api_key or '', 'anthropic-version': self.api_version}
+
+    def _payload(self, messages, temperature, max_tokens, model, stream=False):
+        system = '\n'.join(m['content'] for m in messages if m['role'] == 'system')
+        payload = {
+            'model': model or self.model,
+            'messages': [m for m in messages if m['role'] != 'system'],
+            'temperature': temperature,
+            'max_tokens': max_tokens,
+        }
+        if system:
+            payload['system'] = system
+        if stream:
+            payload['stream'] = True
+        return payload
+
+    @staticmethod
+    def _text(data):
+        return ''.join(block.get('text', '') for block in data.get('content', []) if block.get('type') == 'text')
+
+    def complete(self, messages, temperature=0.7, max_tokens=256, model=None):
+        return self._text(self.post_json('/messages', self._payload(messages, temperature, max_tokens, model)))
+
+    async def acomplete(self, messages, temperature=0.7, max_tokens=256, model=None):
+        return self._text(await self.apost_json('/messages', self._payload(messages, temperature, max_tokens, model)))
+
+    async def astream(self, messages, temperature=0.7, max_tokens=256, model=None):
+        payload = self._payload(messages, temperature, max_tokens, model, stream=True)
+        async for line in self.astream_lines('/messages', payload):
+            if not line.startswith('data:'):
+                continue
+            event = json.loads(line[len('data:'):].strip())
+            if event.get('type') == 'content_block_delta':
+                text = event.get('delta', {}).get('text')
+                if text:
+                    yield text
+            elif event.get('type') == 'message_stop':
+                break
+
+
+class FakeProvider(LLMProvider):
+    """
+    Deterministic offline provider for development and load testing.
+    The same messages always produce the same article; `latency` (seconds, plus up to
+    `jitter` more) simulates the provider round trip.
+    """
+    name = 'fake'
+
+    WORDS = (
+        'officials', 'report', 'new', 'data', 'showing', 'growth', 'across', 'the', 'region',
+        'analysts', 'expect', 'markets', 'to', 'respond', 'after', 'policy', 'changes', 'announced',
+        'this', 'week', 'while', 'researchers', 'say', 'further', 'study', 'is', 'needed',
+    )
+
+    def __init__(self, model='fake-news-1', latency=0.5, jitter=0.0, **options):
+        super().__init__(model, **options)
+        self.latency = latency
+        self.jitter = jitter
+
+    def _rng(self, messages, temperature, max_tokens, model):
+        seed = json.dumps([messages, temperature, max_tokens, model or self.model], sort_keys=True)
+        return random.Random(hashlib.sha256(seed.encode('utf-8')).hexdigest())
+
+    def _delay(self, rng):
+        return self.latency + rng.uniform(0, self.jitter)
+
+    def _words(self, rng, max_tokens):
+        count = max(8, min(max_tokens, 200))
+        words = [rng.choice(self.WORDS) for _ in range(count)]
+        # Break into sentences so the title/body split has something to work with.
+        for i in range(7, count - 1, 12):
+            words[i] += '.'
+            words[i + 1] = words[i + 1].capitalize()
+        words[0] = words[0].capitalize()
+        return words
+
+    def complete(self, messages, temperature=0.7, max_tokens=256, model=None):
+        rng = self._rng(messages, temperature, max_tokens, model)
+        time.sleep(self._delay(rng))
+        return ' '.join(self._words(rng, max_tokens)) + '.'
+
+    async def acomplete(self, messages, temperature=0.7, max_tokens=256, model=None):
+        rng = self._rng(messages, temperature, max_tokens, model)
+        await asyncio.sleep(self._delay(rng))
+        return ' '.join(self._words(rng, max_tokens)) + '.'
+
+    async def astream(self, messages, temperature=0.7, max_tokens=256, model=None):
+        rng = self._rng(messages, temperature, max_tokens, model)
+        delay = self._delay(rng)
+        words = self._words(rng, max_tokens)
+        words[-1] += '.'
+        for i, word in enumerate(words):
+            await asyncio.sleep(delay / len(words))
+            yield word if i == 0 else ' ' + word
+
+
+_providers = {}
+_providers_lock = threading.Lock()
+
+
+def build_provider(name):
+    config = getattr(settings, 'LLM_PROVIDERS', {}).get(name)
+    if config is None:
+        raise ValueError(f"Unknown LLM provider: {name}")
+    options = {key.lower(): value for key, value in config.items() if key != 'BACKEND'}
+    return import_string(config['BACKEND'])(**options)
+
+
+def get_provider(name=None):
+    """
+    Return the process-wide provider instance for name (default settings.LLM_DEFAULT_PROVIDER).
+    """
+    name = name or getattr(settings, 'LLM_DEFAULT_PROVIDER', 'openai')
+    provider = _providers.get(name)
+    if provider is None:
+        with _providers_lock:
+            provider = _providers.get(name)
+            if provider is None:
+                provider = _providers[name] = build_provider(name)
+    return provider
@@ -0,0 +1,358 @@
+"""
+Global request/token rate scheduler for LLM calls.
+
+Every provider call takes one request and an estimated number of tokens from a pair
+of token buckets sized from the provider's RPM/TPM limits. Buckets live in Redis so
+all gunicorn and Celery workers share them, with an in-process fallback when Redis
+is unavailable or not configured.
+
+Two priority lanes are supported: 'interactive' (editor requests) and 'batch'.
+Batch callers may not dip into the last BATCH_RESERVE fraction of either bucket and
+step aside while interactive callers are waiting, so editors go first.
+"""
+import asyncio
+import logging
+import math
+import threading
+import time
+import uuid
+from collections import deque
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+INTERACTIVE = 'interactive'
+BATCH = 'batch'
+PRIORITIES = (INTERACTIVE, BATCH)
+
+KEY_PREFIX = 'content_generation:ratelimit:'
+
+# Refill both buckets for the elapsed time, then take the cost if enough remains
+# above the lane's reserve. Returns 0 when granted, otherwise the wait in ms.
+TOKEN_BUCKET_SCRIPT = """
+local rcap = tonumber(ARGV[1])
+local tcap = tonumber(ARGV[2])
+local rcost = tonumber(ARGV[3])
+local tcost = tonumber(ARGV[4])
+local reserve = tonumber(ARGV[5])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) * 1000 + math.floor(tonumber(clock[2]) / 1000)
+local state = redis.call('HMGET', KEYS[1], 'r', 't', 'ts')
+local r = tonumber(state[1]) or rcap
+local t = tonumber(state[2]) or tcap
+local ts = tonumber(state[3]) or now
+local elapsed = math.max(0, now - ts) / 60000.0
+r = math.min(rcap, r + elapsed * rcap)
+t = math.min(tcap, t + elapsed * tcap)
+local rneed = math.min(rcap, rcost + reserve * rcap)
+local tneed = math.min(tcap, tcost + reserve * tcap)
+local wait = 0
+if r < rneed then wait = math.max(wait, (rneed - r) / rcap * 60000) end
+if t < tneed then wait = math.max(wait, (tneed - t) / tcap * 60000) end
+if wait == 0 then
+    r = r - rcost
+    t = t - tcost
+end
+redis.call('HSET', KEYS[1], 'r', tostring(r), 't', tostring(t), 'ts', now)
+redis.call('PEXPIRE', KEYS[1], 120000)
+return math.ceil(wait)
+"""
+
+
+class RateLimitTimeout(Exception):
+    """Raised when a caller waits longer than its timeout for capacity."""
+
+
+def estimate_tokens(prompt_text, token_limit):
+    """
+    Estimate the token cost of a completion: roughly four characters per prompt token,
+    a small allowance for the system message, plus the completion budget.
+    """
+    return math.ceil(len(prompt_text) / 4) + 20 + int(token_limit)
+
+
+class LocalTokenBuckets:
+    """
+    In-process request and token buckets, shared by every thread in the process.
+    """
+
+    def __init__(self, requests_per_minute, tokens_per_minute):
+        self.rcap = float(requests_per_minute)
+        self.tcap = float(tokens_per_minute)
+        self._r = self.rcap
+        self._t = self.tcap
+        self._ts = time.monotonic()
+        self._lock = threading.Lock()
+
+    def try_acquire(self, request_cost, token_cost, reserve):
+        """
+        Take the cost if available; return 0, or the seconds to wait before retrying.
+        """
+        with self._lock:
+            now = time.monotonic()
+            elapsed = (now - self._ts) / 60.0
+            self._ts = now
+            self._r = min(self.rcap, self._r + elapsed * self.rcap)
+            self._t = min(self.tcap, self._t + elapsed * self.tcap)
+            token_cost = min(token_cost, self.tcap)
+            rneed = min(self.rcap, request_cost + reserve * self.rcap)
+            tneed = min(self.tcap, token_cost + reserve * self.tcap)
+            wait = 0.0
+            if self._r < rneed:
+                wait = max(wait, (rneed - self._r) / self.rcap * 60.0)
+            if self._t < tneed:
+                wait = max(wait, (tneed - self._t) / self.tcap * 60.0)
+            if wait == 0:
+                self._r -= request_cost
+                self._t -= token_cost
+            return wait
+
+
+class RedisTokenBuckets:
+    """
+    Request and token buckets stored in Redis and updated atomically by a Lua script.
+    """
+
+    def __init__(self, name, requests_per_minute, tokens_per_minute, url=None):
+        self.key = f"{KEY_PREFIX}{name}:bucket"
+        self.rcap = float(requests_per_minute)
+        self.tcap = float(tokens_per_minute)
+        self.url = url
+        self._script = None
+
+    @property
+    def client(self):
+        from dailynews_backend.redis_client import get_redis_client
+        return get_redis_client(self.url)
+
+    def try_acquire(self, request_cost, token_cost, reserve):
+        if self._script is None:
+            self._script = self.client.register_script(TOKEN_BUCKET_SCRIPT)
+        token_cost = min(token_cost, self.tcap)
+        wait_ms = self._script(keys=[self.key], args=[self.rcap, self.tcap, request_cost, token_cost, reserve])
+        return int(wait_ms) / 1000.0
+
+
+class RateScheduler:
+    """
+    Hands out LLM capacity to callers in priority order and records wait metrics.
+    """
+
+    def __init__(self, name, requests_per_minute, tokens_per_minute, batch_reserve=0.2,
+                 max_wait=120.0, backend='redis', redis_url=None):
+        self.name = name
+        self.batch_reserve = batch_reserve
+        self.max_wait = max_wait
+        self.local = LocalTokenBuckets(requests_per_minute, tokens_per_minute)
+        self.shared = (
+            RedisTokenBuckets(name, requests_per_minute, tokens_per_minute, url=redis_url)
+            if backend == 'redis' else None
+        )
+        self._waiting = {lane: 0 for lane in PRIORITIES}
+        self._acquired = {lane: 0 for lane in PRIORITIES}
+        self._wait_total = {lane: 0.0 for lane in PRIORITIES}
+        self._wait_max = {lane: 0.0 for lane in PRIORITIES}
+        self._recent_waits = {lane: deque(maxlen=1000) for lane in PRIORITIES}
+        self._lock = threading.Lock()
+
+    # -- capacity --------------------------------------------------------------
+
+    def _try_acquire(self, tokens, priority):
+        reserve = self.batch_reserve if priority == BATCH else 0.0
+        if priority == BATCH and self._interactive_waiting():
+            return 0.05
+        if self.shared is not None:
+            try:
+                return self.shared.try_acquire(1, tokens, reserve)
+            except Exception as e:
+                logger.warning("Redis rate limiter unavailable, using in-process buckets: %s", e)
+        return self.local.try_acquire(1, tokens, reserve)
+
+    # -- waiting lanes -----------------------------------------------------------
+
+    def _waiters_key(self, lane):
+        return f"{KEY_PREFIX}{self.name}:waiting:{lane}"
+
+    def _count_waiter(self, lane, delta):
+        with self._lock:
+            self._waiting[lane] += delta
+
+    def _register_waiter(self, lane, waiter_id):
+        if self.shared is not None:
+            try:
+                self.shared.client.zadd(self._waiters_key(lane), {waiter_id: time.time()})
+            except Exception:
+                pass
+
+    def _unregister_waiter(self, lane, waiter_id):
+        if self.shared is not None:
+            try:
+                self.shared.client.zrem(self._waiters_key(lane), waiter_id)
+            except Exception:
+                pass
+
+    def _enter(self, lane, waiter_id):
+        self._count_waiter(lane, 1)
+        self._register_waiter(lane, waiter_id)
+
+    def _leave(self, lane, waiter_id):
+        self._count_waiter(lane, -1)
+        self._unregister_waiter(lane, waiter_id)
+
+    def _global_waiting(self, lane):
+        """
+        Waiters across all processes. Entries older than max_wait (left behind by a
+        crashed worker) are pruned first.
+        """
+        key = self._waiters_key(lane)
+        client = self.shared.client
+        client.zremrangebyscore(key, 0, time.time() - self.max_wait)
+        return client.zcard(key)
+
+    def _interactive_waiting(self):
+        if self._waiting[INTERACTIVE] > 0:
+            return True
+        if self.shared is not None:
+            try:
+                return self._global_waiting(INTERACTIVE) > 0
+            except Exception:
+                return False
+        return False
+
+    def _record(self, lane, waited):
+        with self._lock:
+            self._acquired[lane] += 1
+            self._wait_total[lane] += waited
+            self._wait_max[lane] = max(self._wait_max[lane], waited)
+            self._recent_waits[lane].append(waited)
+
+    # -- public API --------------------------------------------------------------
+
+    def acquire(self, tokens, priority=INTERACTIVE, timeout=None):
+        """
+        Block until one request and `tokens` tokens are available. Returns seconds waited.
+        """
+        if priority not in PRIORITIES:
+            raise ValueError(f"Unknown priority: {priority}")
+        timeout = self.max_wait if timeout is None else timeout
+        waiter_id = uuid.uuid4().hex
+        started = time.monotonic()
+        self._enter(priority, waiter_id)
+        try:
+            while True:
+                wait = self._try_acquire(tokens, priority)
+                waited = time.monotonic() - started
+                if wait == 0:
+                    self._record(priority, waited)
+                    return waited
+                if waited + wait > timeout:
+                    raise RateLimitTimeout(f"Timed out waiting {waited:.1f}s for {self.name} capacity.")
+                time.sleep(min(wait, 1.0))
+        finally:
+            self._leave(priority, waiter_id)
+
+    async def _off_loop(self, fn, *args):
+        """
+        Run fn without blocking the event loop: on a thread when it talks to Redis,
+        inline when only the in-process buckets are involved.
+        """
+        if self.shared is None:
+            return fn(*args)
+        return await asyncio.to_thread(fn, *args)
+
+    async def aacquire(self, tokens, priority=INTERACTIVE, timeout=None):
+        """
+        Async variant of acquire() that sleeps without blocking the event loop. Redis
+        calls run on a worker thread.
+        """
+        if priority not in PRIORITIES:
+            raise ValueError(f"Unknown priority: {priority}")
+        timeout = self.max_wait if timeout is None else timeout
+        waiter_id = uuid.uuid4().hex
+        started = time.monotonic()
+        self._count_waiter(priority, 1)
+        try:
+            await self._off_loop(self._register_waiter, priority, waiter_id)
+            while True:
+                wait = await self._off_loop(self._try_acquire, tokens, priority)
+                waited = time.monotonic() - started
+                if wait == 0:
+                    self._record(priority, waited)
+                    return waited
+                if waited + wait > timeout:
+                    raise RateLimitTimeout(f"Timed out waiting {waited:.1f}s for {self.name} capacity.")
+                await asyncio.sleep(min(wait, 1.0))
+        finally:
+            self._count_waiter(priority, -1)
+            await self._off_loop(self._unregister_waiter, priority, waiter_id)
+
+    def stats(self):
+        lanes = {}
+        for lane in PRIORITIES:
+            with self._lock:
+                recent = sorted(self._recent_waits[lane])
+                acquired = self._acquired[lane]
+                lanes[lane] = {
+                    'queue_depth': self._waiting[lane],
+                    'acquired': acquired,
+                    'avg_wait': round(self._wait_total[lane] / acquired, 4) if acquired else 0.0,
+                    'max_wait': round(self._wait_max[lane], 4),
+                    'p95_wait': round(recent[int(0.95 * (len(recent) - 1))], 4) if recent else 0.0,
+                }
+            if self.shared is not None:
+                try:
+                    lanes[lane]['global_queue_depth'] = self._global_waiting(lane)
+                except Exception:
+                    pass
+        return {'backend': 'redis' if self.shared is not None else 'local', 'lanes': lanes}
+
+
+class UnlimitedScheduler:
+    """
+    Scheduler used when rate limiting is disabled.
+    """
+
+    def acquire(self, tokens, priority=INTERACTIVE, timeout=None):
+        return 0.0
+
+    async def aacquire(self, tokens, priority=INTERACTIVE, timeout=None):
+        return 0.0
+
+    def stats(self):
+        return {'backend': 'none'}
+
+
+_schedulers = {}
+_schedulers_lock = threading.Lock()
+
+
+def get_rate_scheduler(name):
+    """
+    Return the process-wide scheduler for a provider, configured by settings.LLM_RATE_LIMIT.
+    """
+    scheduler = _schedulers.get(name)
+    if scheduler is None:
+        with _schedulers_lock:
+            scheduler = _schedulers.get(name)
+            if scheduler is None:
+                config = getattr(settings, 'LLM_RATE_LIMIT', {})
+                backend = config.get('BACKEND', 'local')
+                if backend == 'none':
+                    scheduler = UnlimitedScheduler()
+                else:
+                    scheduler = RateScheduler(
+                        name,
+                        requests_per_minute=config.get('REQUESTS_PER_MINUTE', 500),
+                        tokens_per_minute=config.get('TOKENS_PER_MINUTE', 200000),
+                        batch_reserve=config.get('BATCH_RESERVE', 0.2),
+                        max_wait=config.get('MAX_WAIT', 120.0),
+                        backend=backend,
+                        redis_url=config.get('REDIS_URL'),
+                    )
+                _schedulers[name] = scheduler
+    return scheduler
+
+
+def rate_scheduler_stats():
+    return {name: scheduler.stats() for name, scheduler in _schedulers.items()}
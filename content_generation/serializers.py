@@ -18,3 +18,14 @@ class GeneratedContentSerializer(serializers.ModelSerializer):
     class Meta:
         model = GeneratedContent
         fields = ['id', 'title', 'body', 'prompt', 'temperature', 'token_limit', 'created_at']
+
+class GenerationJobSerializer(serializers.ModelSerializer):
+    """
+    Serializer exposing an APIPrompt as a generation job for status polling.
+    """
+    job_id = serializers.IntegerField(source='id', read_only=True)
+    generated_content_ids = serializers.PrimaryKeyRelatedField(source='generated_contents', many=True, read_only=True)
+
+    class Meta:
+        model = APIPrompt
+        fields = ['job_id', 'status', 'error_message', 'created_at', 'started_at', 'finished_at', 'generated_content_ids']
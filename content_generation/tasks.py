@@ -1,36 +1,36 @@
 from celery import shared_task
-from .utils import generate_content_from_prompt
-from .models import APIPrompt, GeneratedContent
+from .models import APIPrompt
 
 @shared_task
 def generate_content_task(prompt_text, temperature=0.7, token_limit=256):
     """
     Celery task to generate content from a given prompt.
-    It creates an APIPrompt record, calls the OpenAI API, and saves the generated content
-    linked to the APIPrompt.
+    It creates a pending APIPrompt record; the post_save signal queues it for generation,
+    so the OpenAI API is called exactly once per prompt. Returns the prompt (job) id.
     """
-    # Create an APIPrompt record to store the prompt details.
     prompt_obj = APIPrompt.objects.create(
         prompt_text=prompt_text,
         temperature=temperature,
         token_limit=token_limit,
         status='pending'
     )
-    
-    try:
-        # Generate content using the OpenAI API.
-        result = generate_content_from_prompt(prompt_text, temperature=temperature, token_limit=token_limit)
-        # Create a GeneratedContent record, linking it to the prompt.
-        GeneratedContent.objects.create(
-            prompt=prompt_obj,
-            title=result.get('title', 'Untitled'),
-            body=result.get('body', '')
-        )
-        # Update the prompt status on success.
-        prompt_obj.status = 'completed'
-        prompt_obj.save()
-    except Exception as e:
-        # Update status to error if an exception occurs.
-        prompt_obj.status = 'error'
-        prompt_obj.save()
-        raise e
+    return prompt_obj.id
+
+@shared_task
+def process_prompt_task(prompt_id):
+    """
+    Celery task that claims a pending APIPrompt and generates its content.
+    Used when CONTENT_GENERATION_BACKEND is 'celery'. Duplicate deliveries are
+    harmless: only the worker that claims the prompt calls the API.
+    """
+    from .jobs import process_prompt
+    return process_prompt(prompt_id)
+
+@shared_task
+def generate_batch_task(prompt_ids, concurrency=None, use_cache=True):
+    """
+    Celery task that generates a queued batch of prompts (see batch.queue_batch).
+    Prompts already claimed by another worker are skipped.
+    """
+    from .batch import run_batch
+    return run_batch(prompt_ids, concurrency=concurrency, use_cache=use_cache)
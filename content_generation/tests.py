@@ -1,3 +1,750 @@
-from django.test import TestCase
+import asyncio
+import json
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import Future
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+import httpx
+import spacy
+
+from django.conf import settings
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from content_processing.models import NLPResult, ProcessedContent
+from fact_checking.models import FactCheckResult
+
+from . import providers
+from .batch import run_batch
+from .cache import LocalLRUCache
+from .dedup import (
+    build_fingerprint, find_near_duplicate, hamming_distance, register_content, simhash, to_signed, to_unsigned,
+)
+from .hedging import _trackers, ahedged_complete, hedge_delay
+from .jobs import claim_prompt, heartbeat, requeue_stale_prompts, run_prompt
+from .loadtest import run_load_test
+from .mock_apis import EndpointBehaviour, MockAPIServer
+from .models import APIPrompt, ContentFingerprint, GeneratedContent, PipelineOutbox, run_content_pipeline
+from .outbox import claim_outbox_batch, claim_outbox_event, requeue_stale_events, run_outbox_event
+from .ratelimit import BATCH, INTERACTIVE, LocalTokenBuckets, RateLimitTimeout, RateScheduler, UnlimitedScheduler
+from .utils import agenerate_content_from_prompt, astream_content_from_prompt, join_title_body
+
+
+def make_content(body="The council approved the budget on Monday."):
+    prompt = APIPrompt.objects.create(prompt_text="x", status='completed')
+    return GeneratedContent.objects.create(prompt=prompt, title="Budget", body=body)
+
+
+@override_settings(CONTENT_PIPELINE={'DISPATCH': 'worker'})
+class PromptQueueTests(TestCase):
+    def running_prompt(self, started_minutes_ago, heartbeat_minutes_ago=None):
+        now = timezone.now()
+        return APIPrompt.objects.create(
+            prompt_text="x", status='running', started_at=now - timedelta(minutes=started_minutes_ago),
+            heartbeat_at=None if heartbeat_minutes_ago is None else now - timedelta(minutes=heartbeat_minutes_ago),
+        )
+
+    def test_prompt_is_claimed_once(self):
+        prompt = APIPrompt.objects.create(prompt_text="x", status='completed')
+        APIPrompt.objects.filter(pk=prompt.pk).update(status='pending')
+        self.assertTrue(claim_prompt(prompt.pk))
+        self.assertFalse(claim_prompt(prompt.pk))
+        prompt.refresh_from_db()
+        self.assertEqual(prompt.status, 'running')
+        self.assertIsNotNone(prompt.heartbeat_at)
+
+    def test_only_prompts_without_a_recent_heartbeat_are_requeued(self):
+        alive = self.running_prompt(started_minutes_ago=30, heartbeat_minutes_ago=1)
+        dead = self.running_prompt(started_minutes_ago=30, heartbeat_minutes_ago=15)
+        legacy = self.running_prompt(started_minutes_ago=30)
+
+        self.assertEqual(requeue_stale_prompts(timeout_seconds=600), 2)
+        self.assertEqual(
+            dict(APIPrompt.objects.values_list('id', 'status')),
+            {alive.id: 'running', dead.id: 'pending', legacy.id: 'pending'},
+        )
+
+    def test_result_is_discarded_when_the_prompt_was_claimed_again(self):
+        prompt = self.running_prompt(started_minutes_ago=0, heartbeat_minutes_ago=0)
+
+        def generate(*args, **kwargs):
+            # Meanwhile the prompt is requeued and another worker claims it
+            APIPrompt.objects.filter(pk=prompt.pk).update(started_at=timezone.now() + timedelta(seconds=1))
+            return {'title': "Late", 'body': "Body"}
+
+        with mock.patch('content_generation.utils.generate_content_from_prompt', side_effect=generate):
+            self.assertIsNone(run_prompt(prompt))
+        self.assertFalse(GeneratedContent.objects.exists())
+        self.assertEqual(APIPrompt.objects.get(pk=prompt.pk).status, 'running')
+
+    def test_owned_prompt_is_completed(self):
+        prompt = self.running_prompt(started_minutes_ago=0, heartbeat_minutes_ago=0)
+        with mock.patch('content_generation.utils.generate_content_from_prompt', return_value={'title': "T", 'body': "B"}):
+            content = run_prompt(prompt)
+        self.assertEqual(content.prompt_id, prompt.id)
+        self.assertEqual(APIPrompt.objects.get(pk=prompt.pk).status, 'completed')
+
+    def test_admin_action_queues_prompts_instead_of_generating_them(self):
+        from django.contrib.auth import get_user_model
+
+        admin = get_user_model().objects.create_superuser('admin', 'admin@example.com', 'password')
+        self.client.force_login(admin)
+        pending = APIPrompt.objects.create(prompt_text="x", status='completed')
+        APIPrompt.objects.filter(pk=pending.pk).update(status='pending')
+        done = APIPrompt.objects.create(prompt_text="y", status='completed')
+
+        with mock.patch('content_generation.jobs.enqueue_prompt') as enqueue, \
+                mock.patch('content_generation.jobs.process_prompt') as process:
+            self.client.post(reverse('admin:content_generation_apiprompt_changelist'), {
+                'action': 'trigger_generation', '_selected_action': [pending.pk, done.pk],
+            })
+        enqueue.assert_called_once_with(pending.pk)
+        process.assert_not_called()
+
+
+class HeartbeatTests(TransactionTestCase):
+    def test_heartbeat_is_refreshed_while_the_block_runs(self):
+        stale = timezone.now() - timedelta(hours=1)
+        prompt = APIPrompt.objects.create(prompt_text="x", status='running', started_at=stale, heartbeat_at=stale)
+        with heartbeat([prompt.id], interval=0.01):
+            deadline = time.monotonic() + 5
+            while APIPrompt.objects.get(pk=prompt.pk).heartbeat_at == stale and time.monotonic() < deadline:
+                time.sleep(0.01)
+        self.assertGreater(APIPrompt.objects.get(pk=prompt.pk).heartbeat_at, stale)
+        self.assertEqual(requeue_stale_prompts(timeout_seconds=600), 0)
+
+    @override_settings(CONTENT_PIPELINE={'DISPATCH': 'worker', 'HEARTBEAT_INTERVAL': 0.01})
+    def test_running_pipeline_event_keeps_beating(self):
+        event = PipelineOutbox.objects.get(content=make_content())
+        event = claim_outbox_event(event.pk)
+        stale = timezone.now() - timedelta(hours=1)
+        PipelineOutbox.objects.filter(pk=event.pk).update(locked_at=stale, heartbeat_at=stale)
+
+        def pipeline(content):
+            deadline = time.monotonic() + 5
+            while PipelineOutbox.objects.get(pk=event.pk).heartbeat_at == stale and time.monotonic() < deadline:
+                time.sleep(0.01)
+            self.assertEqual(requeue_stale_events(timeout_seconds=600), 0)
+
+        with mock.patch('content_generation.models.run_content_pipeline', side_effect=pipeline):
+            self.assertTrue(run_outbox_event(event))
+        self.assertEqual(PipelineOutbox.objects.get(pk=event.pk).status, 'done')
+
+
+@override_settings(CONTENT_PIPELINE={'DISPATCH': 'worker', 'BATCH_SIZE': 20, 'MAX_ATTEMPTS': 2, 'RETRY_DELAY': 30})
+class OutboxClaimTests(TestCase):
+    def test_content_creation_records_one_pending_event(self):
+        content = make_content()
+        event = PipelineOutbox.objects.get(content=content)
+        self.assertEqual(event.status, 'pending')
+
+    def test_dispatch_starts_events_in_process_only_with_thread(self):
+        for dispatch, started in (('worker', 0), ('thread', 1)):
+            with override_settings(CONTENT_PIPELINE={'DISPATCH': dispatch}), \
+                    mock.patch('content_generation.jobs.submit_background') as submit, \
+                    self.captureOnCommitCallbacks(execute=True):
+                make_content()
+            self.assertEqual(submit.call_count, started)
+
+    @override_settings(CONTENT_PIPELINE={'DISPATCH': 'db'})
+    def test_unknown_dispatch_is_rejected(self):
+        with self.assertRaises(ValueError):
+            make_content()
+
+    def test_batch_claims_due_events_once(self):
+        due = [PipelineOutbox.objects.get(content=make_content()) for _ in range(3)]
+        later = PipelineOutbox.objects.get(content=make_content())
+        later.available_at = timezone.now() + timedelta(minutes=5)
+        later.save()
+
+        claimed = claim_outbox_batch(limit=2)
+        self.assertEqual([event.pk for event in claimed], [event.pk for event in due[:2]])
+        self.assertTrue(all(event.status == 'processing' and event.lock_token for event in claimed))
+        self.assertEqual([event.pk for event in claim_outbox_batch()], [due[2].pk])
+        self.assertEqual(claim_outbox_batch(), [])
+
+    def test_event_is_claimed_by_one_worker(self):
+        event = PipelineOutbox.objects.get(content=make_content())
+        self.assertIsNotNone(claim_outbox_event(event.pk))
+        self.assertIsNone(claim_outbox_event(event.pk))
+        self.assertEqual(claim_outbox_batch(), [])
+
+    def test_failures_back_off_then_fail(self):
+        event = PipelineOutbox.objects.get(content=make_content())
+        with mock.patch('content_generation.models.run_content_pipeline', side_effect=RuntimeError("boom")):
+            self.assertFalse(run_outbox_event(claim_outbox_event(event.pk)))
+            event.refresh_from_db()
+            self.assertEqual((event.status, event.attempts), ('pending', 1))
+            self.assertGreater(event.available_at, timezone.now())
+            self.assertEqual(event.last_error, "RuntimeError: boom")
+
+            PipelineOutbox.objects.filter(pk=event.pk).update(available_at=timezone.now())
+            self.assertFalse(run_outbox_event(claim_outbox_event(event.pk)))
+        event.refresh_from_db()
+        self.assertEqual((event.status, event.attempts), ('failed', 2))
+
+    def test_only_events_without_a_recent_heartbeat_are_requeued(self):
+        now = timezone.now()
+        events = {}
+        for name, heartbeat_minutes_ago in (('alive', 1), ('dead', 15), ('legacy', None)):
+            event = PipelineOutbox.objects.get(content=make_content())
+            PipelineOutbox.objects.filter(pk=event.pk).update(
+                status='processing', locked_at=now - timedelta(minutes=30),
+                heartbeat_at=None if heartbeat_minutes_ago is None else now - timedelta(minutes=heartbeat_minutes_ago),
+            )
+            events[name] = event.pk
+
+        self.assertEqual(requeue_stale_events(timeout_seconds=600), 2)
+        self.assertEqual(
+            {name: PipelineOutbox.objects.get(pk=pk).status for name, pk in events.items()},
+            {'alive': 'processing', 'dead': 'pending', 'legacy': 'pending'},
+        )
+
+    def test_outcome_is_discarded_when_the_event_was_claimed_again(self):
+        event = claim_outbox_event(PipelineOutbox.objects.get(content=make_content()).pk)
+        other_token = uuid.uuid4()
+
+        def pipeline(content):
+            # Meanwhile the event is requeued and another worker claims it
+            PipelineOutbox.objects.filter(pk=event.pk).update(lock_token=other_token)
+            raise RuntimeError("boom")
+
+        with mock.patch('content_generation.models.run_content_pipeline', side_effect=pipeline):
+            self.assertFalse(run_outbox_event(event))
+        event.refresh_from_db()
+        self.assertEqual((event.status, event.attempts, event.lock_token), ('processing', 0, other_token))
+
+
+@override_settings(CONTENT_PIPELINE={'DISPATCH': 'worker', 'MAX_ATTEMPTS': 5, 'RETRY_DELAY': 0})
+class PipelineRetryTests(TestCase):
+    def test_retried_event_reuses_the_fact_check(self):
+        content = make_content()
+        event = PipelineOutbox.objects.get(content=content)
+        nlp_result = NLPResult(categories=["Politics"], tags=[], claims=["The council approved the budget."])
+        verdicts = [{'textual_rating': "Unverified", 'evidence': {}, 'verification_score': 0.0}]
+
+        with mock.patch('content_processing.nlp_cache.find_result', return_value=nlp_result), \
+                mock.patch('fact_checking.utils.submit_fact_check_many', return_value=lambda: verdicts) as query:
+            with mock.patch('content_processing.utils.process_generated_content', side_effect=RuntimeError("db gone")):
+                self.assertFalse(run_outbox_event(claim_outbox_event(event.pk)))
+            PipelineOutbox.objects.filter(pk=event.pk).update(available_at=timezone.now())
+            self.assertTrue(run_outbox_event(claim_outbox_event(event.pk)))
+
+        self.assertEqual(query.call_count, 1)
+        self.assertEqual(FactCheckResult.objects.count(), 1)
+        processed = ProcessedContent.objects.get(content=content)
+        self.assertEqual(processed.fact_check, FactCheckResult.objects.get())
+
+
+def blank_pipeline(model, **kwargs):
+    nlp = spacy.blank('en')
+    nlp.add_pipe('sentencizer')
+    return nlp
+
+
+@mock.patch('spacy.load', blank_pipeline)
+@override_settings(CONTENT_PIPELINE={'DISPATCH': 'worker'})
+class PipelineOverlapTests(TestCase):
+    STAGE_DELAY = 0.3
+
+    def setUp(self):
+        patcher = mock.patch.dict('content_processing.nlp._pipelines', clear=True)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_fact_check_lookups_overlap_the_entity_pass(self):
+        from content_processing import nlp_cache
+        from fact_checking.claims import extract_claims
+
+        verdict = {'textual_rating': "Unverified", 'evidence': {}, 'verification_score': 0.0}
+        build_result = nlp_cache.build_result
+
+        async def slow_lookup(claim):
+            await asyncio.sleep(self.STAGE_DELAY)
+            return verdict, False
+
+        def slow_build(*args, **kwargs):
+            time.sleep(self.STAGE_DELAY)
+            return build_result(*args, **kwargs)
+
+        # Load the spaCy pipelines and the category matcher outside the timed run.
+        extract_claims("The pipelines are loaded before timing.")
+        nlp_cache.compute_result("The pipelines are loaded before timing.")
+        content = make_content("The council approved a 5 million budget on Monday, the mayor said.")
+        with mock.patch('fact_checking.utils._lookup_offline', return_value=None), \
+                mock.patch('fact_checking.utils._afetch_google_fact_check', slow_lookup), \
+                mock.patch('content_processing.nlp_cache.build_result', slow_build):
+            started = time.monotonic()
+            run_content_pipeline(content)
+            elapsed = time.monotonic() - started
+
+        # Both stages take STAGE_DELAY; run back to back they would take twice that.
+        self.assertLess(elapsed, 1.6 * self.STAGE_DELAY)
+        self.assertGreaterEqual(elapsed, self.STAGE_DELAY)
+        processed = ProcessedContent.objects.get(content=content)
+        self.assertEqual(processed.fact_check.textual_rating, "Unverified")
+
+
+ARTICLE = (
+    "The city council approved a new budget on Monday after months of debate. The plan raises spending on "
+    "schools, parks and public transport while cutting administrative costs. Officials said the measure would "
+    "take effect next year and that residents could comment on the details at a series of public meetings "
+    "scheduled for the spring. Critics argued the budget relied on optimistic revenue forecasts."
+)
+UNRELATED = (
+    "Scientists announced the discovery of a distant exoplanet orbiting a small red dwarf star. The planet "
+    "appears to have a thick atmosphere and may hold liquid water, researchers said, adding that further "
+    "observations with space telescopes are planned for next year to confirm the findings."
+)
+
+
+@override_settings(CONTENT_PIPELINE={'DISPATCH': 'worker'})
+class DedupTests(TestCase):
+    def test_simhash_is_close_for_near_duplicates_only(self):
+        fingerprint = simhash(ARTICLE)
+        self.assertEqual(simhash(ARTICLE.upper()), fingerprint)
+        self.assertLessEqual(hamming_distance(fingerprint, simhash(ARTICLE.replace("forecasts", "projections"))), 3)
+        self.assertGreater(hamming_distance(fingerprint, simhash(UNRELATED)), 3)
+        self.assertIsNone(simhash("Too short to fingerprint."))
+
+    def test_fingerprints_round_trip_through_signed_storage(self):
+        for fingerprint in (0, 1, (1 << 63) - 1, 1 << 63, (1 << 64) - 1):
+            self.assertEqual(to_unsigned(to_signed(fingerprint)), fingerprint)
+            self.assertGreaterEqual(to_signed(fingerprint), -(1 << 63))
+
+    def test_near_duplicate_is_linked_to_the_canonical_article(self):
+        original = make_content(ARTICLE)
+        self.assertIsNone(register_content(original))
+        other = make_content(UNRELATED)
+        self.assertIsNone(register_content(other))
+
+        duplicate = make_content(ARTICLE.replace("forecasts", "projections"))
+        self.assertEqual(register_content(duplicate), original)
+        duplicate.refresh_from_db()
+        self.assertEqual(duplicate.duplicate_of, original)
+        self.assertEqual(ContentFingerprint.objects.count(), 3)
+
+        # Duplicates are never chosen as canonical.
+        self.assertEqual(register_content(make_content(ARTICLE.replace("forecasts", "projections"))), original)
+
+    @override_settings(CONTENT_DEDUP={'MAX_CANDIDATES': 2})
+    def test_candidate_cap_keeps_the_closest_fingerprints(self):
+        fingerprint = simhash(ARTICLE)
+        # Older articles that only share the lowest band fill the cap on insertion order.
+        for _ in range(3):
+            build_fingerprint(make_content(UNRELATED), fingerprint ^ (((1 << 48) - 1) << 16)).save()
+        close = make_content(ARTICLE)
+        build_fingerprint(close, fingerprint ^ 1).save()
+        self.assertEqual(find_near_duplicate(fingerprint), (close.id, 1))
+
+    def test_pipeline_stops_at_a_near_duplicate(self):
+        original = make_content(ARTICLE)
+        register_content(original)
+        duplicate = make_content(ARTICLE.replace("forecasts", "projections"))
+        with mock.patch('content_processing.nlp_cache.find_result') as find:
+            run_content_pipeline(duplicate)
+        find.assert_not_called()
+        self.assertFalse(ProcessedContent.objects.filter(content=duplicate).exists())
+
+
+@override_settings(CONTENT_GENERATION_BACKEND='thread', CONTENT_PIPELINE={'DISPATCH': 'worker'})
+class BatchGenerationTests(TestCase):
+    def test_batch_request_queues_jobs_and_returns_immediately(self):
+        with mock.patch('content_generation.batch.dispatch_batch') as dispatch, \
+                self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                reverse('generate_content_batch'), {'prompts': ["First", {'prompt_text': "Second"}], 'concurrency': 2},
+                content_type='application/json',
+            )
+
+        self.assertEqual(response.status_code, 202)
+        jobs = response.json()['jobs']
+        self.assertEqual([job['status'] for job in jobs], ['pending', 'pending'])
+        self.assertEqual(response.json()['total'], 2)
+        self.assertEqual(jobs[1]['status_url'], reverse('generation_job_status', args=[jobs[1]['job_id']]))
+        dispatch.assert_called_once_with([job['job_id'] for job in jobs], 2, True)
+        self.assertFalse(GeneratedContent.objects.exists())
+
+    def test_run_batch_generates_the_prompts_it_claims(self):
+        pending = APIPrompt.objects.create(prompt_text="First", status='pending')
+        failing = APIPrompt.objects.create(prompt_text="Fails", status='pending')
+        taken = APIPrompt.objects.create(prompt_text="Taken", status='running')
+
+        async def generate(prompt_text, **kwargs):
+            if prompt_text == "Fails":
+                raise RuntimeError("quota")
+            return {'title': prompt_text, 'body': "Body"}
+
+        with mock.patch('content_generation.batch.agenerate_content_from_prompt', side_effect=generate):
+            results = run_batch([pending.id, failing.id, taken.id])
+
+        self.assertEqual([(result['prompt_id'], result['status']) for result in results],
+                         [(pending.id, 'completed'), (failing.id, 'error')])
+        self.assertEqual(GeneratedContent.objects.get().prompt_id, pending.id)
+        failing.refresh_from_db()
+        self.assertEqual(failing.error_message, "quota")
+        taken.refresh_from_db()
+        self.assertEqual(taken.status, 'running')
+        self.assertEqual(run_batch([pending.id]), [])
+
+    def test_batches_share_one_event_loop(self):
+        loops = []
+
+        async def generate(prompt_text, **kwargs):
+            loops.append(asyncio.get_running_loop())
+            return {'title': prompt_text, 'body': "Body"}
+
+        with mock.patch('content_generation.batch.agenerate_content_from_prompt', side_effect=generate):
+            for text in ("First", "Second"):
+                run_batch([APIPrompt.objects.create(prompt_text=text, status='pending').id])
+
+        # The providers' per-loop AsyncClients stay pooled instead of one per batch.
+        self.assertIs(loops[0], loops[1])
+        self.assertFalse(loops[0].is_closed())
+
+
+class RateSchedulerTests(SimpleTestCase):
+    def test_buckets_grant_until_empty_then_report_the_wait(self):
+        buckets = LocalTokenBuckets(requests_per_minute=60, tokens_per_minute=1000)
+        self.assertEqual(buckets.try_acquire(1, 900, 0.0), 0)
+        self.assertAlmostEqual(buckets.try_acquire(1, 200, 0.0), 6.0, delta=0.1)  # 100 tokens short at 1000/min
+
+    def test_batch_lane_leaves_the_reserve_to_interactive_callers(self):
+        scheduler = RateScheduler('test', requests_per_minute=10, tokens_per_minute=10000, batch_reserve=0.2, backend='local')
+        granted = 0
+        while scheduler._try_acquire(1, BATCH) == 0:
+            granted += 1
+        self.assertEqual(granted, 8)
+        self.assertEqual(scheduler._try_acquire(1, INTERACTIVE), 0)
+
+    def test_batch_lane_steps_aside_while_interactive_callers_wait(self):
+        scheduler = RateScheduler('test', requests_per_minute=100, tokens_per_minute=10000, backend='local')
+        scheduler._count_waiter(INTERACTIVE, 1)
+        self.assertGreater(scheduler._try_acquire(1, BATCH), 0)
+        scheduler._count_waiter(INTERACTIVE, -1)
+        self.assertEqual(scheduler._try_acquire(1, BATCH), 0)
+
+    def test_acquire_times_out_and_records_waits(self):
+        scheduler = RateScheduler('test', requests_per_minute=1, tokens_per_minute=10000, backend='local')
+        self.assertLess(scheduler.acquire(1), 0.1)
+        with self.assertRaises(RateLimitTimeout):
+            scheduler.acquire(1, timeout=0.5)
+        lanes = scheduler.stats()['lanes']
+        self.assertEqual((lanes[INTERACTIVE]['acquired'], lanes[INTERACTIVE]['queue_depth']), (1, 0))
+
+    def test_async_acquire_keeps_redis_calls_off_the_event_loop(self):
+        scheduler = RateScheduler('test', requests_per_minute=100, tokens_per_minute=10000, backend='local')
+        threads = set()
+
+        def record(*args, **kwargs):
+            threads.add(threading.current_thread())
+            return 0
+
+        scheduler.shared = mock.Mock(try_acquire=mock.Mock(side_effect=record))
+        scheduler.shared.client.zadd.side_effect = record
+        scheduler.shared.client.zrem.side_effect = record
+        scheduler.shared.client.zcard.return_value = 0
+
+        self.assertLess(asyncio.run(scheduler.aacquire(1, priority=BATCH)), 1.0)
+        self.assertTrue(threads)
+        self.assertNotIn(threading.main_thread(), threads)
+        self.assertEqual(scheduler.stats()['lanes'][BATCH]['queue_depth'], 0)
+
+
+class FakeProvider:
+    name = 'hedge-test'
+    model = 'slow-model'
+
+    async def acomplete(self, messages, temperature=0.7, max_tokens=256, model=None):
+        await asyncio.sleep(0.2 if model is None else 0.01)
+        return model or self.model
+
+
+@override_settings(LLM_HEDGING={'DEFAULT_DELAY': 0.05, 'MIN_DELAY': 0.01}, LLM_RATE_LIMIT={'BACKEND': 'none'})
+class HedgingTests(SimpleTestCase):
+    def test_latency_is_recorded_for_the_model_actually_called(self):
+        provider = FakeProvider()
+        with mock.patch.dict(_trackers, clear=True):
+            result = asyncio.run(ahedged_complete(provider, [], hedge_model='fast-model'))
+            self.assertEqual(result, 'fast-model')
+            self.assertEqual(len(_trackers['hedge-test:fast-model']), 1)
+            # The cancelled primary is recorded as lasting at least until it was cancelled.
+            self.assertEqual(len(_trackers['hedge-test:slow-model']), 1)
+            self.assertGreaterEqual(_trackers['hedge-test:slow-model'].percentile(50), 0.05)
+
+    @override_settings(LLM_HEDGING={'DEFAULT_DELAY': 0.05, 'MIN_DELAY': 0.01, 'MIN_SAMPLES': 2})
+    def test_delay_does_not_decay_under_a_slow_primary(self):
+        provider = FakeProvider()
+        with mock.patch.dict(_trackers, clear=True):
+            for _ in range(5):
+                # Hedging to the same model: the fast hedges share the primary's tracker.
+                asyncio.run(ahedged_complete(provider, [], hedge_model=provider.model))
+            self.assertGreaterEqual(hedge_delay(provider), 0.05)
+
+
+class GenerationCacheTests(SimpleTestCase):
+    def setUp(self):
+        self.cache = LocalLRUCache()
+        self.provider = providers.FakeProvider(latency=0)
+        for target, value in (('get_generation_cache', self.cache), ('get_provider', self.provider),
+                              ('get_rate_scheduler', UnlimitedScheduler())):
+            patcher = mock.patch(f'content_generation.utils.{target}', return_value=value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        patcher = mock.patch.object(self.provider, 'acomplete', wraps=self.provider.acomplete)
+        self.calls = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def generate(self, prompt_text, **kwargs):
+        return asyncio.run(agenerate_content_from_prompt(prompt_text, hedge=False, **kwargs))
+
+    def test_miss_then_hit(self):
+        first = self.generate("Write about the budget")
+        self.assertEqual(self.generate("Write  about the budget"), first)
+        self.assertEqual(self.calls.call_count, 1)
+        self.assertEqual((self.cache.stats()['hits'], self.cache.stats()['misses']), (1, 1))
+
+    def test_bypass_neither_reads_nor_writes(self):
+        self.generate("Write about the budget")
+        self.generate("Write about the budget", use_cache=False)
+        self.generate("Write about the weather", use_cache=False)
+        self.assertEqual(self.calls.call_count, 3)
+        self.assertEqual(self.cache.stats()['size'], 1)
+        self.assertEqual((self.cache.stats()['hits'], self.cache.stats()['misses']), (0, 1))
+
+    def test_blocking_backend_is_called_off_the_event_loop(self):
+        threads = []
+        self.cache.blocking = True
+        self.cache._get = mock.Mock(side_effect=lambda key: threads.append(threading.current_thread()))
+        self.cache._set = mock.Mock(side_effect=lambda key, value: threads.append(threading.current_thread()))
+
+        self.generate("Write about the budget")
+
+        self.assertEqual(len(threads), 2)
+        self.assertNotIn(threading.main_thread(), threads)
+
+    def test_stream_bypass_does_not_write(self):
+        async def consume(**kwargs):
+            return ''.join([chunk async for chunk in astream_content_from_prompt("Write about the budget", **kwargs)])
+
+        text = asyncio.run(consume(use_cache=False))
+        self.assertEqual(self.cache.stats()['size'], 0)
+        self.assertEqual(asyncio.run(consume()), text)
+        self.assertEqual(self.cache.stats()['size'], 1)
+        self.assertEqual(asyncio.run(consume()), text)
+        self.assertEqual(self.cache.stats()['hits'], 1)
+
+
+def parse_sse(body):
+    """
+    (event, data) pairs of a Server-Sent Events body; unnamed events are 'message'.
+    """
+    events = []
+    for block in body.split('\n\n'):
+        if not block:
+            continue
+        fields = dict(line.split(': ', 1) for line in block.split('\n'))
+        events.append((fields.get('event', 'message'), json.loads(fields['data'])))
+    return events
+
+
+@override_settings(CONTENT_PIPELINE={'DISPATCH': 'worker'})
+class StreamingViewTests(TestCase):
+    def setUp(self):
+        self.cache = LocalLRUCache()
+        self.provider = providers.FakeProvider(latency=0)
+        for target, value in (('get_generation_cache', self.cache), ('get_provider', self.provider),
+                              ('get_rate_scheduler', UnlimitedScheduler())):
+            patcher = mock.patch(f'content_generation.utils.{target}', return_value=value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    async def stream(self, prompt_text="Write about the budget"):
+        response = await self.async_client.post(
+            reverse('generate_content_stream'), {'prompt_text': prompt_text}, content_type='application/json'
+        )
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        body = b''.join([chunk async for chunk in response.streaming_content]).decode('utf-8')
+        return parse_sse(body)
+
+    async def test_tokens_are_framed_as_events_and_the_result_is_saved(self):
+        events = await self.stream()
+
+        self.assertEqual(events[0][0], 'job')
+        self.assertEqual(events[-1][0], 'done')
+        deltas = [data['delta'] for event, data in events[1:-1]]
+        self.assertTrue(deltas)
+        self.assertTrue(all(event == 'message' for event, _ in events[1:-1]))
+
+        text = ''.join(deltas)
+        content = await GeneratedContent.objects.aget(pk=events[-1][1]['content_id'])
+        self.assertEqual(join_title_body({'title': content.title, 'body': content.body}), text.strip())
+        prompt = await APIPrompt.objects.aget(pk=events[0][1]['job_id'])
+        self.assertEqual(prompt.status, 'completed')
+        # The assembled text is cached, so the same prompt is answered in one chunk.
+        self.assertEqual(self.cache.stats()['size'], 1)
+        events = await self.stream()
+        self.assertEqual([data['delta'] for event, data in events[1:-1]], [text.strip()])
+
+    async def test_provider_failure_ends_with_an_error_event(self):
+        async def broken(*args, **kwargs):
+            yield "Partial"
+            raise providers.ProviderError("upstream down", status_code=503)
+
+        with mock.patch.object(self.provider, 'astream', broken):
+            events = await self.stream()
+
+        self.assertEqual([event for event, _ in events], ['job', 'message', 'error'])
+        self.assertEqual(events[-1][1], {'error': "upstream down"})
+        prompt = await APIPrompt.objects.aget(pk=events[0][1]['job_id'])
+        self.assertEqual((prompt.status, prompt.error_message), ('error', "upstream down"))
+        self.assertFalse(await GeneratedContent.objects.aexists())
+        self.assertEqual(self.cache.stats()['size'], 0)
+
+
+def completion(text):
+    return httpx.Response(200, json={'choices': [{'message': {'content': text}}]})
+
+
+class ProviderTests(SimpleTestCase):
+    MESSAGES = [{'role': 'user', 'content': "Write about the budget"}]
+
+    def provider(self, responses, **options):
+        """
+        An OpenAI provider whose HTTP clients answer with `responses` in turn; the
+        requests it sent are collected in self.requests.
+        """
+        self.requests = []
+        responses = iter(responses)
+
+        def handler(request):
+            self.requests.append(request)
+            return next(responses)
+
+        provider = providers.OpenAIProvider('gpt-test', api_key='key', backoff_base=0, **options)
+        self.transport = httpx.MockTransport(handler)
+        provider._client = httpx.Client(base_url=provider.base_url, transport=self.transport)
+        provider._client_pid = os.getpid()
+        self.addCleanup(provider.close)
+        return provider
+
+    async def acomplete(self, provider):
+        client = httpx.AsyncClient(base_url=provider.base_url, transport=self.transport)
+        provider._async_clients[asyncio.get_running_loop()] = client
+        try:
+            return await provider.acomplete(self.MESSAGES)
+        finally:
+            await client.aclose()
+
+    def test_throttling_and_server_errors_are_retried(self):
+        provider = self.provider([httpx.Response(429), httpx.Response(503), completion("Budget approved.")])
+        self.assertEqual(provider.complete(self.MESSAGES), "Budget approved.")
+        self.assertEqual(len(self.requests), 3)
+
+        provider = self.provider([httpx.Response(500), completion("Budget approved.")])
+        self.assertEqual(asyncio.run(self.acomplete(provider)), "Budget approved.")
+        self.assertEqual(len(self.requests), 2)
+
+    def test_client_errors_are_not_retried(self):
+        provider = self.provider([httpx.Response(400, text="bad request")])
+        with self.assertRaises(providers.ProviderError) as raised:
+            provider.complete(self.MESSAGES)
+        self.assertEqual((raised.exception.status_code, len(self.requests)), (400, 1))
+
+        provider = self.provider([httpx.Response(404)])
+        with self.assertRaises(providers.ProviderError):
+            asyncio.run(self.acomplete(provider))
+        self.assertEqual(len(self.requests), 1)
+
+    def test_retries_stop_after_max_retries(self):
+        provider = self.provider([httpx.Response(503)] * 3, max_retries=2)
+        with self.assertRaises(providers.ProviderError) as raised:
+            provider.complete(self.MESSAGES)
+        self.assertEqual((raised.exception.status_code, len(self.requests)), (503, 3))
+
+    def test_one_async_client_per_event_loop(self):
+        provider = providers.OpenAIProvider('gpt-test', api_key='key')
+
+        async def clients():
+            return provider.async_client, provider.async_client
+
+        first, again = asyncio.run(clients())
+        other, _ = asyncio.run(clients())
+        self.assertIs(first, again)
+        self.assertIsNot(first, other)
+
+    def test_fake_provider_is_deterministic_across_call_styles(self):
+        provider = providers.FakeProvider(latency=0.05)
+
+        async def stream():
+            return ''.join([chunk async for chunk in provider.astream(self.MESSAGES, max_tokens=40)])
+
+        started = time.monotonic()
+        text = provider.complete(self.MESSAGES, max_tokens=40)
+        self.assertGreaterEqual(time.monotonic() - started, 0.05)
+        self.assertEqual(provider.complete(self.MESSAGES, max_tokens=40), text)
+        self.assertEqual(asyncio.run(provider.acomplete(self.MESSAGES, max_tokens=40)), text)
+        self.assertEqual(asyncio.run(stream()), text)
+        self.assertNotEqual(provider.complete(self.MESSAGES, temperature=0.2, max_tokens=40), text)
+        self.assertEqual(len(text.split()), 40)
+
+
+class InlineExecutor:
+    def submit(self, fn, *args, **kwargs):
+        future = Future()
+        future.set_result(fn(*args, **kwargs))
+        return future
+
+
+@mock.patch('spacy.load', blank_pipeline)
+class LoadTestSmokeTests(TransactionTestCase):
+    def setUp(self):
+        self.server = MockAPIServer(port=0, llm=EndpointBehaviour('0.01'), fact_check=EndpointBehaviour('0.01')).start()
+        self.addCleanup(self.server.stop)
+        for patcher in (
+            mock.patch.dict('content_processing.nlp._pipelines', clear=True),
+            mock.patch.dict('content_generation.providers._providers', clear=True),
+            mock.patch.dict('content_generation.ratelimit._schedulers', clear=True),
+            mock.patch('content_generation.cache._cache', None),
+            mock.patch('fact_checking.client._client', None),
+            mock.patch('fact_checking.cache._cache', None),
+            # The in-memory SQLite test database locks tables across threads, so background
+            # work runs on the submitting client thread instead of the pool.
+            mock.patch('content_generation.jobs.get_background_executor', return_value=InlineExecutor()),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_prompts_run_through_the_pipeline_against_the_mock_apis(self):
+        with override_settings(
+            CONTENT_GENERATION_BACKEND='thread',
+            CONTENT_PIPELINE={'DISPATCH': 'thread'},
+            CONTENT_GENERATION_CACHE={'BACKEND': 'none'},
+            FACT_CHECK_CACHE={'BACKEND': 'none'},
+            LLM_RATE_LIMIT={'BACKEND': 'none'},
+            LLM_HEDGING={'ENABLED': False},
+            LLM_DEFAULT_PROVIDER='openai',
+            LLM_PROVIDERS={'openai': dict(
+                settings.LLM_PROVIDERS['openai'], API_KEY='test', BASE_URL=self.server.openai_base_url, MAX_RETRIES=0,
+            )},
+            GOOGLE_FACT_CHECK_ENDPOINT=self.server.fact_check_endpoint,
+            GOOGLE_FACT_CHECK_API_KEY='test',
+        ):
+            report = run_load_test(prompts=3, concurrency=1, timeout=30, poll_interval=0.05)
+
+        self.assertEqual((report['prompts'], report['finished'], report['timed_out']), (3, 3, 0))
+        outcomes = report['outcomes']
+        self.assertEqual((outcomes['generation_errors'], outcomes['generated'], outcomes['pipeline_failed']), (0, 3, 0))
+        self.assertEqual(outcomes['processed'], 3 - outcomes['duplicates'])
+        self.assertEqual(self.server.llm.requests, 3)
+        self.assertEqual(self.server.llm.errors, 0)
+        self.assertGreater(self.server.fact_check.requests, 0)
+        self.assertEqual(report['stages']['request']['count'], 3)
+        self.assertEqual(report['stages']['generation']['count'], 3)
+        self.assertEqual(report['stages']['end_to_end']['count'], outcomes['processed'])
+        self.assertGreater(report['queries']['total'], 0)
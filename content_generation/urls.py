@@ -1,6 +1,16 @@
 from django.urls import path
-from .views import ContentGenerationView
+from .views import (
+    ContentGenerationView,
+    ContentBatchGenerationView,
+    GenerationJobStatusView,
+    GenerationMetricsView,
+    content_generation_stream_view,
+)
 
 urlpatterns = [
     path('generate/', ContentGenerationView.as_view(), name='generate_content'),
+    path('generate/stream/', content_generation_stream_view, name='generate_content_stream'),
+    path('generate/batch/', ContentBatchGenerationView.as_view(), name='generate_content_batch'),
+    path('jobs/<int:job_id>/', GenerationJobStatusView.as_view(), name='generation_job_status'),
+    path('metrics/', GenerationMetricsView.as_view(), name='generation_metrics'),
 ]
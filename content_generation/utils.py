@@ -1,24 +1,146 @@
-import openai
-from django.conf import settings
+from dailynews_backend.singleflight import get_single_flight
 
-def generate_content_from_prompt(prompt_text, temperature=0.7, token_limit=256):
+from .cache import get_generation_cache, make_cache_key
+from .hedging import ahedged_complete, get_hedging_config, hedged_complete
+from .providers import get_provider
+from .ratelimit import INTERACTIVE, estimate_tokens, get_rate_scheduler
+
+def build_messages(prompt_text):
     """
-    Calls OpenAI API to generate content based on a prompt.
-    Returns a dict with title and body.
+    Build the chat messages sent to the LLM for a prompt.
+    """
+    return [
+        {"role": "system", "content": "You are a helpful news generator."},
+        {"role": "user", "content": prompt_text}
+    ]
+
+def split_title_body(content):
     """
-    openai.api_key = settings.OPENAI_API_KEY
-    response = openai.ChatCompletion.create(
-        model="gpt-4.1",  # Use a model with search capability if needed
-        messages=[
-            {"role": "system", "content": "You are a helpful news generator."},
-            {"role": "user", "content": prompt_text}
-        ],
-        temperature=temperature,
-        max_tokens=token_limit
-    )
-    content = response.choices[0].message.content.strip()
-    # Split content: first sentence as title, rest as body
+    Split generated content: first sentence as title, rest as body.
+    """
+    content = content.strip()
     parts = content.split('. ', 1)
     title = parts[0] + '.' if parts else 'Untitled'
     body = parts[1] if len(parts) > 1 else ''
     return {'title': title, 'body': body}
+
+def join_title_body(result):
+    """
+    Rebuild the generated text from a title/body dict (inverse of split_title_body).
+    """
+    return f"{result['title']} {result['body']}".strip()
+
+def _cache_key(provider, prompt_text, temperature, token_limit):
+    return make_cache_key(prompt_text, f"{provider.name}:{provider.model}", temperature, token_limit)
+
+def _hedge_options(hedge):
+    """
+    Resolve the hedge flag (None means settings.LLM_HEDGING['ENABLED']) to the
+    fallback provider/model to hedge with, or None when hedging is off.
+    """
+    config = get_hedging_config()
+    if hedge is None:
+        hedge = config['ENABLED']
+    if not hedge:
+        return None
+    return {
+        'hedge_provider': get_provider(config['PROVIDER']) if config['PROVIDER'] else None,
+        'hedge_model': config['MODEL'],
+    }
+
+def generate_content_from_prompt(prompt_text, temperature=0.7, token_limit=256, use_cache=True, provider=None,
+                                 priority=INTERACTIVE, hedge=None):
+    """
+    Calls the configured LLM provider (OpenAI by default) to generate content based on a prompt.
+    Returns a dict with title and body.
+    Identical requests are answered from the response cache; pass use_cache=False to bypass it
+    (the cache is then neither read nor written, e.g. for a deliberately fresh draft).
+    Concurrent identical cacheable requests share one provider call (single-flight).
+    `provider` names an entry in settings.LLM_PROVIDERS. Calls wait for capacity in the shared
+    rate scheduler, where 'interactive' priority goes ahead of 'batch'.
+    With hedge=True (default: settings.LLM_HEDGING['ENABLED']) a slow call is hedged with a
+    second request and the first answer wins.
+    """
+    llm = get_provider(provider)
+    cache = get_generation_cache()
+    cache_key = _cache_key(llm, prompt_text, temperature, token_limit)
+    if use_cache:
+        cached = cache.get(cache_key)
+        if cached is not None:
+            return dict(cached)
+        return get_single_flight('llm').do(
+            cache_key, _generate, llm, cache, cache_key, prompt_text, temperature, token_limit, priority, hedge
+        )
+    return _generate(llm, None, cache_key, prompt_text, temperature, token_limit, priority, hedge)
+
+def _generate(llm, cache, cache_key, prompt_text, temperature, token_limit, priority, hedge):
+    get_rate_scheduler(llm.name).acquire(estimate_tokens(prompt_text, token_limit), priority=priority)
+    hedge_options = _hedge_options(hedge)
+    if hedge_options is not None:
+        content = hedged_complete(
+            llm, build_messages(prompt_text), temperature=temperature, max_tokens=token_limit,
+            prompt_text=prompt_text, **hedge_options
+        )
+    else:
+        content = llm.complete(build_messages(prompt_text), temperature=temperature, max_tokens=token_limit)
+    result = split_title_body(content)
+    if cache is not None:
+        cache.set(cache_key, result)
+    return result
+
+async def agenerate_content_from_prompt(prompt_text, temperature=0.7, token_limit=256, use_cache=True, provider=None,
+                                        priority=INTERACTIVE, hedge=None):
+    """
+    Async variant of generate_content_from_prompt, used to fan out many prompts
+    concurrently from a single thread. Cache reads and writes don't block the event loop.
+    """
+    llm = get_provider(provider)
+    cache = get_generation_cache()
+    cache_key = _cache_key(llm, prompt_text, temperature, token_limit)
+    if use_cache:
+        cached = await cache.aget(cache_key)
+        if cached is not None:
+            return dict(cached)
+        return await get_single_flight('llm').ado(
+            cache_key, _agenerate, llm, cache, cache_key, prompt_text, temperature, token_limit, priority, hedge
+        )
+    return await _agenerate(llm, None, cache_key, prompt_text, temperature, token_limit, priority, hedge)
+
+async def _agenerate(llm, cache, cache_key, prompt_text, temperature, token_limit, priority, hedge):
+    await get_rate_scheduler(llm.name).aacquire(estimate_tokens(prompt_text, token_limit), priority=priority)
+    hedge_options = _hedge_options(hedge)
+    if hedge_options is not None:
+        content = await ahedged_complete(
+            llm, build_messages(prompt_text), temperature=temperature, max_tokens=token_limit,
+            prompt_text=prompt_text, **hedge_options
+        )
+    else:
+        content = await llm.acomplete(build_messages(prompt_text), temperature=temperature, max_tokens=token_limit)
+    result = split_title_body(content)
+    if cache is not None:
+        await cache.aset(cache_key, result)
+    return result
+
+async def astream_content_from_prompt(prompt_text, temperature=0.7, token_limit=256, use_cache=True, provider=None,
+                                      priority=INTERACTIVE):
+    """
+    Stream generated text from the LLM provider as an async iterator of text chunks.
+    A cached response is yielded as a single chunk. The full response is cached once
+    the stream completes (unless use_cache=False).
+    """
+    llm = get_provider(provider)
+    cache = get_generation_cache()
+    cache_key = _cache_key(llm, prompt_text, temperature, token_limit)
+    if use_cache:
+        cached = await cache.aget(cache_key)
+        if cached is not None:
+            yield join_title_body(cached)
+            return
+
+    await get_rate_scheduler(llm.name).aacquire(estimate_tokens(prompt_text, token_limit), priority=priority)
+    chunks = []
+    async for delta in llm.astream(build_messages(prompt_text), temperature=temperature, max_tokens=token_limit):
+        chunks.append(delta)
+        yield delta
+    if use_cache:
+        await cache.aset(cache_key, split_title_body(''.join(chunks)))
@@ -1,14 +1,32 @@
+import json
+
+from asgiref.sync import sync_to_async
+from django.http import JsonResponse, StreamingHttpResponse
+from django.urls import reverse
+from django.db import transaction
+from django.utils import timezone
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_POST
+from dailynews_backend.singleflight import single_flight_stats
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
+from .cache import get_generation_cache
+from .batch import BatchValidationError, normalize_batch_items, queue_batch
+from .hedging import hedging_stats
+from .jobs import submit_background
+from .outbox import outbox_stats
+from .ratelimit import rate_scheduler_stats
 from .models import APIPrompt, GeneratedContent
-from .utils import generate_content_from_prompt
+from .utils import astream_content_from_prompt, split_title_body
+from .serializers import GenerationJobSerializer
 
 class ContentGenerationView(APIView):
     """
     API view to handle content generation via a provided prompt.
-    Creates an APIPrompt record and then generates content using the OpenAI API.
-    The resulting content is saved in GeneratedContent with a proper foreign key to APIPrompt.
+    Creates a pending APIPrompt record and returns immediately with a job id.
+    A background worker generates the content using the OpenAI API and saves it in
+    GeneratedContent with a proper foreign key to APIPrompt.
     """
 
     def post(self, request):
@@ -19,7 +37,7 @@ class ContentGenerationView(APIView):
         if not prompt_text:
             return Response({"error": "Prompt text is required."}, status=status.HTTP_400_BAD_REQUEST)
 
-        # Create an APIPrompt record; this object will be used as the foreign key.
+        # Creating the pending APIPrompt queues it for generation (see trigger_content_generation).
         prompt_obj = APIPrompt.objects.create(
             prompt_text=prompt_text,
             temperature=temperature,
@@ -27,19 +45,167 @@ class ContentGenerationView(APIView):
             status='pending'
         )
 
+        return Response({
+            "message": "Content generation queued.",
+            "job_id": prompt_obj.id,
+            "status": prompt_obj.status,
+            "status_url": reverse('generation_job_status', args=[prompt_obj.id]),
+        }, status=status.HTTP_202_ACCEPTED)
+
+class GenerationJobStatusView(APIView):
+    """
+    API view to poll the status of a content generation job.
+    Status is one of: pending, running, completed, error.
+    """
+
+    def get(self, request, job_id):
         try:
-            # Use the correct function from utils to generate content.
-            result = generate_content_from_prompt(prompt_text, temperature=temperature, token_limit=token_limit)
-            # Create GeneratedContent with the APIPrompt instance (prompt_obj) as the foreign key.
-            GeneratedContent.objects.create(
-                prompt=prompt_obj,
-                title=result.get('title', 'Untitled'),
-                body=result.get('body', '')
+            prompt_obj = APIPrompt.objects.get(id=job_id)
+        except APIPrompt.DoesNotExist:
+            return Response({"error": "Generation job not found."}, status=status.HTTP_404_NOT_FOUND)
+        serializer = GenerationJobSerializer(prompt_obj)
+        return Response(serializer.data, status=status.HTTP_200_OK)
+
+class ContentBatchGenerationView(APIView):
+    """
+    API view to generate content for many prompts in one request.
+    The prompts are recorded as pending jobs and the response returns immediately
+    with one job id per prompt. A background worker sends them to the LLM
+    concurrently (bounded by `concurrency`) and stores the results with bulk inserts;
+    poll each job's status_url for its outcome.
+    """
+
+    def post(self, request):
+        try:
+            items = normalize_batch_items(
+                request.data.get('prompts'),
+                default_temperature=request.data.get('temperature', 0.7),
+                default_token_limit=request.data.get('token_limit', 256)
             )
-            prompt_obj.status = 'completed'
-            prompt_obj.save()
-            return Response({"message": "Content generated successfully."}, status=status.HTTP_201_CREATED)
+        except BatchValidationError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        concurrency = request.data.get('concurrency')
+        if concurrency is not None and not str(concurrency).isdigit():
+            return Response({"error": "Concurrency must be a positive integer."}, status=status.HTTP_400_BAD_REQUEST)
+
+        prompts = queue_batch(
+            items,
+            concurrency=concurrency,
+            use_cache=request.data.get('use_cache', True) not in (False, 'false', '0', 0)
+        )
+        return Response({
+            "message": "Batch generation queued.",
+            "total": len(prompts),
+            "jobs": [
+                {
+                    "index": index,
+                    "job_id": prompt.id,
+                    "status": prompt.status,
+                    "status_url": reverse('generation_job_status', args=[prompt.id]),
+                }
+                for index, prompt in enumerate(prompts)
+            ],
+        }, status=status.HTTP_202_ACCEPTED)
+
+class GenerationMetricsView(APIView):
+    """
+    API view exposing content generation metrics: response cache hit/miss counters,
+    rate scheduler queue depth and wait times per provider, hedging statistics and
+    pipeline outbox backlog.
+    """
+
+    def get(self, request):
+        return Response({
+            "cache": get_generation_cache().stats(),
+            "rate_limit": rate_scheduler_stats(),
+            "hedging": hedging_stats(),
+            "pipeline": outbox_stats(),
+            "single_flight": single_flight_stats(),
+        }, status=status.HTTP_200_OK)
+
+def _sse(data, event=None):
+    """
+    Format one Server-Sent Event.
+    """
+    message = f"event: {event}\n" if event else ""
+    return message + f"data: {json.dumps(data)}\n\n"
+
+def _finish_streamed_prompt(prompt_obj, text):
+    """
+    Save the streamed article; its post_save signal records the pipeline event in the same transaction.
+    """
+    result = split_title_body(text)
+    with transaction.atomic():
+        content = GeneratedContent.objects.create(
+            prompt=prompt_obj,
+            title=result.get('title', 'Untitled'),
+            body=result.get('body', '')
+        )
+        prompt_obj.status = 'completed'
+        prompt_obj.finished_at = timezone.now()
+        prompt_obj.save(update_fields=['status', 'finished_at'])
+    return content
+
+def _fail_streamed_prompt(prompt_id, error_message):
+    APIPrompt.objects.filter(pk=prompt_id, status='running').update(
+        status='error', error_message=error_message, finished_at=timezone.now()
+    )
+
+@csrf_exempt
+@require_POST
+async def content_generation_stream_view(request):
+    """
+    Stream generated content to the client as Server-Sent Events while the LLM produces it.
+    Events: `job` (job id, sent immediately), unnamed token events ({"delta": ...}),
+    then `done` (GeneratedContent id and title) or `error`.
+    The GeneratedContent row is written, and the pipeline triggered, once the stream closes.
+    Served from the ASGI application this holds no worker thread while waiting on tokens.
+    """
+    try:
+        data = json.loads(request.body or b'{}')
+    except ValueError:
+        return JsonResponse({"error": "Request body must be JSON."}, status=400)
+
+    prompt_text = data.get('prompt_text')
+    temperature = data.get('temperature', 0.7)
+    token_limit = data.get('token_limit', 256)
+    use_cache = data.get('use_cache', True) not in (False, 'false', '0', 0)
+    if not prompt_text:
+        return JsonResponse({"error": "Prompt text is required."}, status=400)
+
+    # Created as 'running' so trigger_content_generation doesn't queue a second generation.
+    prompt_obj = await sync_to_async(APIPrompt.objects.create)(
+        prompt_text=prompt_text,
+        temperature=temperature,
+        token_limit=token_limit,
+        status='running',
+        started_at=timezone.now()
+    )
+
+    async def event_stream():
+        chunks = []
+        finished = False
+        try:
+            yield _sse({"job_id": prompt_obj.id}, event='job')
+            async for delta in astream_content_from_prompt(
+                prompt_text, temperature=temperature, token_limit=token_limit, use_cache=use_cache
+            ):
+                chunks.append(delta)
+                yield _sse({"delta": delta})
+            content = await sync_to_async(_finish_streamed_prompt)(prompt_obj, ''.join(chunks))
+            finished = True
+            yield _sse({"content_id": content.id, "title": content.title}, event='done')
         except Exception as e:
-            prompt_obj.status = 'error'
-            prompt_obj.save()
-            return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+            finished = True
+            await sync_to_async(_fail_streamed_prompt)(prompt_obj.id, str(e))
+            yield _sse({"error": str(e)}, event='error')
+        finally:
+            if not finished:
+                # Client went away mid-stream; record it without awaiting in a cancelled task.
+                submit_background(_fail_streamed_prompt, prompt_obj.id, "Stream closed before completion.")
+
+    response = StreamingHttpResponse(event_stream(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'  # Disable proxy buffering so tokens flush immediately
+    return response
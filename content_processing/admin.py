@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import ProcessedContent, PublishedContent
+from .models import NLPResult, ProcessedContent, PublishedContent
 
 @admin.register(ProcessedContent)
 class ProcessedContentAdmin(admin.ModelAdmin):
@@ -15,3 +15,10 @@ class PublishedContentAdmin(admin.ModelAdmin):
     fields = ('processed_content', 'title', 'body', 'fact_check_status', 'evidence', 'tags', 'image_url', 'video_url', 'published_at', 'manually_overridden')
     search_fields = ('title', 'fact_check_status')
     readonly_fields = ('published_at',)
+
+@admin.register(NLPResult)
+class NLPResultAdmin(admin.ModelAdmin):
+    list_display = ('body_hash', 'pipeline_version', 'categories', 'created_at')
+    list_filter = ('pipeline_version',)
+    search_fields = ('body_hash',)
+    readonly_fields = ('body_hash', 'pipeline_version', 'created_at')
@@ -0,0 +1,57 @@
+"""
+Single-pass text analysis.
+
+analyze_text() runs spaCy over a body once and wraps the resulting Doc in a
+TextAnalysis that categorization, tagging and claim extraction all read from, so an
+article goes through the pipeline once instead of once per stage.
+"""
+from functools import cached_property
+
+from .nlp import get_nlp
+
+
+class TextAnalysis:
+    """
+    The analyzed form of a text: its spaCy Doc plus the views of it stages need.
+    Built by analyze_text(); treat it as read-only, it may be shared between threads.
+    """
+
+    def __init__(self, text, doc, task):
+        self.text = text
+        self.doc = doc
+        self.task = task
+
+    @cached_property
+    def entities(self):
+        """
+        (text, label) pairs of the named entities, in order of appearance.
+        """
+        return [(ent.text, ent.label_) for ent in self.doc.ents]
+
+    @property
+    def has_sentences(self):
+        return self.doc.has_annotation('SENT_START')
+
+    @cached_property
+    def sentences(self):
+        """
+        Sentence spans, or an empty list when the pipeline sets no sentence boundaries.
+        """
+        return list(self.doc.sents) if self.has_sentences else []
+
+
+def analyze_text(text, task='analysis'):
+    """
+    Run the pipeline for task (see content_processing.nlp) over text once.
+    The default 'analysis' pipeline provides tokens, entities and sentences.
+    """
+    return TextAnalysis(text, get_nlp(task)(text), task)
+
+
+def as_analysis(text_or_analysis, task='analysis'):
+    """
+    Return the TextAnalysis passed in, or analyze a plain string with task's pipeline.
+    """
+    if isinstance(text_or_analysis, TextAnalysis):
+        return text_or_analysis
+    return analyze_text(text_or_analysis, task)
@@ -0,0 +1,200 @@
+"""
+Keyword categorization with a compiled phrase matcher.
+
+The category -> keywords table is compiled once into a spaCy PhraseMatcher on the
+lowercased token text, so every keyword (including multi-word ones such as
+"machine learning") is found in a single pass over the article's tokens, however
+large the table grows. Each category gets its hit count and a confidence: its share
+of all keyword hits in the text.
+
+The table comes from CONTENT_CATEGORIES['KEYWORDS_PATH'] (a JSON file of
+{"Category": ["keyword", ...]}) when set, else CONTENT_CATEGORIES['KEYWORDS'], else
+DEFAULT_CATEGORY_KEYWORDS. The file is re-checked at most every RELOAD_INTERVAL
+seconds and the matcher rebuilt when it changes, so edits apply without a restart.
+`version` identifies the table a result was computed with; get_category_table_version()
+returns it without compiling the matcher.
+"""
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+
+from .analysis import as_analysis
+from .nlp import get_nlp
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CATEGORY_KEYWORDS = {
+    "AI": ["artificial intelligence", "machine learning", "deep learning", "AI"],
+    "Technology": ["technology", "gadgets", "innovation", "tech"],
+    "Gadgets": ["smartphone", "tablet", "laptop", "gadget"],
+    "Politics": ["government", "election", "policy", "politics"],
+    "Health": ["medicine", "health", "wellness", "disease"],
+    "Environment": ["climate", "environment", "sustainability"]
+}
+
+
+def get_category_config():
+    config = {
+        'KEYWORDS': {},  # Replaces DEFAULT_CATEGORY_KEYWORDS when set
+        'KEYWORDS_PATH': '',  # Optional JSON file of {category: [keywords]}, takes precedence
+        'RELOAD_INTERVAL': 30,  # seconds between checks of KEYWORDS_PATH for changes
+    }
+    config.update(getattr(settings, 'CONTENT_CATEGORIES', {}))
+    return config
+
+
+def normalize_table(table):
+    """
+    {category: sorted unique lowercased keywords}, dropping blanks and empty categories.
+    """
+    normalized = {}
+    for category, keywords in table.items():
+        keywords = sorted({' '.join(keyword.lower().split()) for keyword in keywords if keyword and keyword.strip()})
+        if keywords:
+            normalized[str(category)] = keywords
+    return normalized
+
+
+def table_version(table):
+    """
+    Short hash identifying a normalized category table.
+    """
+    return hashlib.sha256(json.dumps(sorted(table.items())).encode('utf-8')).hexdigest()[:12]
+
+
+class CategoryEngine:
+    """
+    A category -> keywords table compiled into a PhraseMatcher. Immutable once built;
+    a table change builds a new engine.
+    """
+
+    def __init__(self, table, source=None):
+        from spacy.matcher import PhraseMatcher
+
+        self.table = normalize_table(table)
+        self.source = source
+        self.version = table_version(self.table)
+        nlp = get_nlp('tokenize')
+        self.matcher = PhraseMatcher(nlp.vocab, attr='LOWER')
+        self._categories = {}
+        for category, keywords in self.table.items():
+            self.matcher.add(category, list(nlp.tokenizer.pipe(keywords)))
+            self._categories[nlp.vocab.strings[category]] = category
+
+    def counts(self, doc):
+        """
+        Keyword hits per category in doc.
+        """
+        return Counter(self._categories[match_id] for match_id, _, _ in self.matcher(doc))
+
+    def score(self, doc):
+        """
+        {category: {'hits', 'confidence'}} for the categories matched in doc, most hits first.
+        """
+        counts = self.counts(doc)
+        total = sum(counts.values())
+        return {
+            category: {'hits': hits, 'confidence': round(hits / total, 4)}
+            for category, hits in counts.most_common()
+        }
+
+
+def _file_source(path):
+    try:
+        return (path, os.stat(path).st_mtime_ns)
+    except OSError:
+        return (path, None)
+
+
+def load_category_table(config=None):
+    """
+    The configured category table and its source ((path, mtime) for a file, else None).
+    """
+    config = config or get_category_config()
+    if config['KEYWORDS_PATH']:
+        source = _file_source(config['KEYWORDS_PATH'])
+        with open(config['KEYWORDS_PATH'], encoding='utf-8') as f:
+            return json.load(f), source
+    return config['KEYWORDS'] or DEFAULT_CATEGORY_KEYWORDS, None
+
+
+def build_category_engine(config=None):
+    table, source = load_category_table(config)
+    engine = CategoryEngine(table, source=source)
+    logger.info("Compiled category table %s (%d categories)", engine.version, len(engine.table))
+    return engine
+
+
+_engine = None
+_checked_at = 0.0
+_table_version = None  # (source, version) of the table, for lookups made before the engine is built
+_version_checked_at = 0.0
+_engine_lock = threading.Lock()
+
+
+def get_category_engine():
+    """
+    Return the process-wide engine, rebuilding it when KEYWORDS_PATH has changed since
+    it was compiled (checked at most every RELOAD_INTERVAL seconds). A table file that
+    can't be read keeps the current engine in place.
+    """
+    global _engine, _checked_at
+    config = get_category_config()
+    if _engine is not None and (not config['KEYWORDS_PATH'] or time.monotonic() - _checked_at < config['RELOAD_INTERVAL']):
+        return _engine
+    with _engine_lock:
+        if _engine is not None and config['KEYWORDS_PATH'] and time.monotonic() - _checked_at >= config['RELOAD_INTERVAL']:
+            _checked_at = time.monotonic()
+            if _file_source(config['KEYWORDS_PATH']) != _engine.source:
+                try:
+                    _engine = build_category_engine(config)
+                except (OSError, ValueError) as e:
+                    logger.warning("Keeping category table %s, reload failed: %s", _engine.version, e)
+        elif _engine is None:
+            _checked_at = time.monotonic()
+            _engine = build_category_engine(config)
+        return _engine
+
+
+def get_category_table_version():
+    """
+    Version of the current category table. Taken from the engine once it is built;
+    before that the table is only read and hashed, so callers that just need the
+    version (the NLP result cache) don't load spaCy to compile the matcher. A table
+    file is re-checked at most every RELOAD_INTERVAL seconds, like the engine.
+    """
+    global _table_version, _version_checked_at
+    if _engine is not None:
+        return get_category_engine().version
+    config = get_category_config()
+    with _engine_lock:
+        recheck = config['KEYWORDS_PATH'] and time.monotonic() - _version_checked_at >= config['RELOAD_INTERVAL']
+        if _table_version is None or (recheck and _file_source(config['KEYWORDS_PATH']) != _table_version[0]):
+            table, source = load_category_table(config)
+            _table_version = (source, table_version(normalize_table(table)))
+        if recheck:
+            _version_checked_at = time.monotonic()
+        return _table_version[1]
+
+
+def reset_category_engine():
+    """
+    Drop the cached engine so the next lookup rereads settings and the table file.
+    """
+    global _engine, _table_version
+    with _engine_lock:
+        _engine = None
+        _table_version = None
+
+
+def score_categories(text_or_analysis):
+    """
+    Per-category hit counts and confidence for a body or a TextAnalysis of it.
+    """
+    return get_category_engine().score(as_analysis(text_or_analysis, task='tokenize').doc)
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from content_processing.models import NLPResult
+from content_processing.nlp_cache import pipeline_version, purge_stale_results
+
+
+class Command(BaseCommand):
+    help = "Delete memoized NLP results from older pipeline versions (or all results with --all)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true', help="Delete every stored result, not just stale ones.")
+
+    def handle(self, *args, **options):
+        if options['all']:
+            deleted, _ = NLPResult.objects.all().delete()
+            self.stdout.write(self.style.SUCCESS(f"Deleted all {deleted} NLP results"))
+            return
+        deleted = purge_stale_results()
+        self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} NLP results older than pipeline version {pipeline_version()}"))
@@ -0,0 +1,29 @@
+# Generated by Django 5.1.4 on 2026-10-18 18:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('content_processing', '0002_processedcontent_fact_check'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NLPResult',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('body_hash', models.CharField(max_length=64)),
+                ('pipeline_version', models.CharField(db_index=True, max_length=16)),
+                ('categories', models.JSONField(blank=True, default=list)),
+                ('tags', models.JSONField(blank=True, default=list)),
+                ('entities', models.JSONField(blank=True, default=list)),
+                ('claims', models.JSONField(blank=True, default=list)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('body_hash', 'pipeline_version'), name='nlp_result_body_version_unique')],
+            },
+        ),
+    ]
@@ -7,11 +7,28 @@ PUBLISH_CHOICES = [
     ('withheld', 'Withheld')
 ]
 
+def publish_status_for(fact_check_status):
+    """
+    AI gatekeeping: content rated "verified" is withheld, everything else is published.
+    """
+    if fact_check_status.lower() == "unverified":
+        return "published"
+    elif fact_check_status.lower() == "verified":
+        return "withheld"
+    return "published"
+
+def is_auto_publishable(fact_check_status):
+    """
+    The pipeline's publication gate: only content rated "unverified" gets a PublishedContent.
+    """
+    return (fact_check_status or '').lower() == "unverified"
+
 class ProcessedContent(models.Model):
     """
     Model for processed content that has been categorized, tagged, and fact-checked.
     """
     content = models.OneToOneField(GeneratedContent, on_delete=models.CASCADE, related_name="processed_content")
+    fact_check = models.ForeignKey(FactCheckResult, on_delete=models.SET_NULL, null=True, blank=True, related_name="processed_contents")
     categories = models.JSONField(default=list, blank=True)  # e.g., ["AI", "Technology"]
     tags = models.JSONField(default=list, blank=True)  # Extracted tags/keywords
     fact_check_status = models.CharField(max_length=20, editable=False, blank=True)
@@ -26,19 +43,17 @@ class ProcessedContent(models.Model):
         Uses the fact-check result to determine publish_status:
           - If textual rating (TR) is "unverified", mark as 'published'
           - If TR is "verified", mark as 'withheld'
+        The fact check is taken from self.fact_check, then the article's own link, and only
+        then looked up by claim hash.
         """
-        fact_check = FactCheckResult.objects.filter(claim=self.content.body).first()
+        fact_check = self.fact_check or self.content.fact_check or FactCheckResult.for_claim(self.content.body)
+        self.fact_check = fact_check
         if fact_check:
             self.fact_check_status = fact_check.textual_rating
             self.composite_score = fact_check.verification_score
             self.evidence = fact_check.evidence  # Store the retrieved evidence
             # Determine publication status based on TR
-            if self.fact_check_status.lower() == "unverified":
-                self.publish_status = "published"
-            elif self.fact_check_status.lower() == "verified":
-                self.publish_status = "withheld"
-            else:
-                self.publish_status = "published"
+            self.publish_status = publish_status_for(self.fact_check_status)
         else:
             self.fact_check_status = "Unverified"
             self.composite_score = 0.0
@@ -82,13 +97,55 @@ class PublishedContent(models.Model):
     def __str__(self):
         return f"PublishedContent: {self.title}"
 
+def sync_publication(processed_contents):
+    """
+    Re-apply the publication gate to ProcessedContent rows whose verdict changed, with
+    the result the pipeline would have produced: publish the ones the gate now allows
+    and withdraw (delete) the PublishedContent of the ones it no longer does. Published
+    content that stays up gets the new status and evidence. Manually overridden
+    PublishedContent is left alone. Pass rows with `content` loaded.
+    Returns counters: {'published', 'withdrawn', 'updated'}.
+    """
+    processed_contents = list(processed_contents)
+    existing = {
+        processed_id: (published_id, overridden)
+        for published_id, processed_id, overridden in PublishedContent.objects.filter(
+            processed_content__in=processed_contents
+        ).values_list('id', 'processed_content_id', 'manually_overridden')
+    }
+    created, updated, withdrawn = [], [], []
+    for processed in processed_contents:
+        published_id, overridden = existing.get(processed.id, (None, False))
+        if overridden:
+            continue
+        if not is_auto_publishable(processed.fact_check_status):
+            if published_id is not None:
+                withdrawn.append(published_id)
+        elif published_id is None:
+            created.append(PublishedContent(
+                processed_content=processed,
+                title=processed.content.title,
+                body=processed.content.body,
+                fact_check_status=processed.fact_check_status,
+                evidence=processed.evidence,
+                tags=processed.tags,
+            ))
+        else:
+            updated.append(PublishedContent(
+                id=published_id, fact_check_status=processed.fact_check_status, evidence=processed.evidence
+            ))
+    PublishedContent.objects.bulk_create(created, batch_size=500, ignore_conflicts=True)
+    PublishedContent.objects.bulk_update(updated, ['fact_check_status', 'evidence'], batch_size=500)
+    PublishedContent.objects.filter(id__in=withdrawn, manually_overridden=False).delete()
+    return {'published': len(created), 'withdrawn': len(withdrawn), 'updated': len(updated)}
+
 # NEW Signal: When ProcessedContent is created, automatically create a PublishedContent record if TR is "unverified".
 from django.db.models.signals import post_save
 from django.dispatch import receiver
 
 @receiver(post_save, sender=ProcessedContent)
 def trigger_publication(sender, instance, created, **kwargs):
-    if created and instance.fact_check_status.lower() == "unverified":
+    if created and is_auto_publishable(instance.fact_check_status):
         # Automatically publish if TR is "unverified"
         PublishedContent.objects.create(
             processed_content=instance,
@@ -96,4 +153,26 @@ def trigger_publication(sender, instance, created, **kwargs):
             body=instance.content.body,
             fact_check_status=instance.fact_check_status,
             tags=instance.tags
-        )
\ No newline at end of file
+        )
+
+
+class NLPResult(models.Model):
+    """
+    Memoized NLP output for an article body, keyed by the SHA-256 of the body and the
+    version of the pipeline that produced it (see content_processing.nlp_cache).
+    """
+    body_hash = models.CharField(max_length=64)
+    pipeline_version = models.CharField(max_length=16, db_index=True)
+    categories = models.JSONField(default=list, blank=True)
+    tags = models.JSONField(default=list, blank=True)
+    entities = models.JSONField(default=list, blank=True)  # [text, label] pairs
+    claims = models.JSONField(default=list, blank=True)  # Check-worthy sentences for fact checking
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['body_hash', 'pipeline_version'], name='nlp_result_body_version_unique'),
+        ]
+
+    def __str__(self):
+        return f"NLPResult {self.body_hash[:12]} ({self.pipeline_version})"
@@ -0,0 +1,105 @@
+"""
+Lazily loaded spaCy pipelines, one per task.
+
+Nothing is loaded at import time, so migrations, management commands and workers that
+never run NLP don't pay for the model. Each task loads the model with only the
+components it needs (en_core_web_sm's ner and senter have their own tok2vec layers,
+so neither needs the shared tok2vec, tagger, parser or lemmatizer):
+
+  - 'tokenize':  tokenizer only (keyword categorization)
+  - 'sentences': sentence boundaries only (claim extraction, see fact_checking.claims)
+  - 'ner':       named entities (tagging)
+  - 'analysis':  sentence boundaries and named entities, the single pass shared by
+                 categorization, tagging and claim extraction (see content_processing.analysis)
+  - 'full':      the model's default pipeline
+
+Under gunicorn with preload_app, preload() runs in the master (see gunicorn.conf.py),
+so forked workers share the loaded pipelines copy-on-write instead of each loading
+its own.
+"""
+import logging
+import threading
+import time
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+# Components excluded (not loaded at all) and enabled per task.
+TASK_PIPELINES = {
+    'tokenize': {
+        'exclude': ['tok2vec', 'tagger', 'parser', 'attribute_ruler', 'lemmatizer', 'ner', 'senter'],
+        'enable': [],
+    },
+    'sentences': {
+        'exclude': ['tok2vec', 'tagger', 'parser', 'attribute_ruler', 'lemmatizer', 'ner'],
+        'enable': ['senter'],
+    },
+    'ner': {
+        'exclude': ['tok2vec', 'tagger', 'parser', 'attribute_ruler', 'lemmatizer', 'senter'],
+        'enable': ['ner'],
+    },
+    'analysis': {
+        'exclude': ['tok2vec', 'tagger', 'parser', 'attribute_ruler', 'lemmatizer'],
+        'enable': ['senter', 'ner'],
+    },
+    'full': {
+        'exclude': [],
+        'enable': None,
+    },
+}
+
+
+def get_nlp_config():
+    config = {
+        'MODEL': 'en_core_web_sm',
+        'PRELOAD': ['analysis'],
+        'PIPE_BATCH_SIZE': 256,  # docs per nlp.pipe() batch in bulk reprocessing
+        'PIPE_PROCESSES': 1,  # nlp.pipe() worker processes in bulk reprocessing (-1: one per CPU)
+    }
+    config.update(getattr(settings, 'NLP', {}))
+    return config
+
+
+_pipelines = {}
+_lock = threading.Lock()
+
+
+def load_pipeline(task, model=None):
+    """
+    Load a fresh pipeline for task (see TASK_PIPELINES).
+    """
+    import spacy
+
+    if task not in TASK_PIPELINES:
+        raise ValueError(f"Unknown NLP task: {task}")
+    model = model or get_nlp_config()['MODEL']
+    options = TASK_PIPELINES[task]
+    kwargs = {'exclude': options['exclude']}
+    if options['enable'] is not None:
+        kwargs['enable'] = options['enable']
+    started = time.monotonic()
+    nlp = spacy.load(model, **kwargs)
+    logger.info("Loaded spaCy %s pipeline for '%s' %s in %.2fs", model, task, nlp.pipe_names, time.monotonic() - started)
+    return nlp
+
+
+def get_nlp(task='full'):
+    """
+    Return the process-wide pipeline for task, loading it on first use.
+    """
+    nlp = _pipelines.get(task)
+    if nlp is None:
+        with _lock:
+            nlp = _pipelines.get(task)
+            if nlp is None:
+                nlp = _pipelines[task] = load_pipeline(task)
+    return nlp
+
+
+def preload(tasks=None):
+    """
+    Load the pipelines for tasks (default: NLP['PRELOAD']) now rather than on first use.
+    """
+    for task in tasks if tasks is not None else get_nlp_config()['PRELOAD']:
+        get_nlp(task)
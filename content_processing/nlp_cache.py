@@ -0,0 +1,141 @@
+"""
+Memoized NLP results per article body.
+
+analyze_content() looks up the body's NLPResult before any spaCy work: a body seen
+before under the current pipeline version gets its categories, tags, entities and
+check-worthy claims straight from the table, so republished and identical articles
+skip NLP entirely. On a miss the body is analyzed once and the result stored.
+
+The content pipeline uses the two halves separately (find_result, then
+compute_result on a miss) so it can extract claims with the cheap sentence pass and
+start fact-checking them before the entity pass runs; compute_result then reuses
+those claims.
+
+The pipeline version hashes everything the result depends on: the spaCy model and its
+installed version, the components of the pipelines involved, the category table version
+(see content_processing.categories) and the claim limit. Changing any of them changes
+the version, so older rows simply stop matching; purge them with
+`python manage.py purge_nlp_results`.
+"""
+import hashlib
+import json
+import logging
+from functools import lru_cache
+from importlib import metadata
+
+from django.db import IntegrityError, transaction
+
+from .analysis import analyze_text
+from .models import NLPResult
+from .nlp import TASK_PIPELINES, get_nlp_config
+
+logger = logging.getLogger(__name__)
+
+# Bump when categorize_content, tag_content or extract_claims change behaviour.
+RESULT_FORMAT = 2
+
+
+def body_hash(body):
+    return hashlib.sha256((body or '').encode('utf-8')).hexdigest()
+
+
+@lru_cache(maxsize=None)
+def _package_version(name):
+    try:
+        return metadata.version(name)
+    except metadata.PackageNotFoundError:
+        return ''
+
+
+def pipeline_version():
+    """
+    Version of everything an NLPResult depends on; changes when the model, the
+    keyword table or the claim limit does.
+    """
+    from fact_checking.claims import get_claim_check_config
+    from .categories import get_category_table_version
+
+    model = get_nlp_config()['MODEL']
+    return hashlib.sha256(json.dumps([
+        RESULT_FORMAT,
+        model,
+        _package_version(model),
+        _package_version('spacy'),
+        [TASK_PIPELINES[task] for task in ('analysis', 'sentences', 'ner')],
+        get_category_table_version(),
+        get_claim_check_config()['MAX_CLAIMS'],
+    ]).encode('utf-8')).hexdigest()[:16]
+
+
+def build_result(analysis, version=None, claims=None):
+    """
+    An unsaved NLPResult computed from a TextAnalysis. Pass claims when they were
+    already extracted (with the sentence pass) to skip extracting them again.
+    """
+    from fact_checking.claims import extract_claims
+    from .utils import categorize_content, tag_content
+
+    return NLPResult(
+        body_hash=body_hash(analysis.text),
+        pipeline_version=version or pipeline_version(),
+        categories=categorize_content(analysis),
+        tags=tag_content(analysis),
+        entities=[list(entity) for entity in analysis.entities],
+        claims=extract_claims(analysis) if claims is None else claims,
+    )
+
+
+def find_result(body, version=None):
+    """
+    The stored NLPResult for body under the current pipeline version, or None.
+    """
+    version = version or pipeline_version()
+    key = body_hash(body)
+    result = NLPResult.objects.filter(body_hash=key, pipeline_version=version).first()
+    if result is not None:
+        logger.debug("NLP result hit for %s (%s)", key[:12], version)
+    return result
+
+
+def compute_result(body, version=None, claims=None):
+    """
+    Analyze body (one spaCy pass) and store the result. With claims already extracted
+    only the entity pass is needed; otherwise the 'analysis' pass provides both.
+    """
+    version = version or pipeline_version()
+    analysis = analyze_text(body, 'analysis' if claims is None else 'ner')
+    result = build_result(analysis, version, claims=claims)
+    try:
+        with transaction.atomic():
+            result.save()
+    except IntegrityError:
+        # Another worker stored the same body first; its result is identical
+        return NLPResult.objects.get(body_hash=result.body_hash, pipeline_version=version)
+    return result
+
+
+def analyze_content(body):
+    """
+    NLPResult for body under the current pipeline version, from the table when the body
+    has been analyzed before, else computed (one spaCy pass) and stored.
+    """
+    version = pipeline_version()
+    result = find_result(body, version)
+    if result is not None:
+        return result
+    return compute_result(body, version)
+
+
+def store_results(results, batch_size=500):
+    """
+    Save computed NLPResults, keeping rows that already exist.
+    """
+    NLPResult.objects.bulk_create(results, batch_size=batch_size, ignore_conflicts=True)
+
+
+def purge_stale_results():
+    """
+    Delete results computed under any other pipeline version. Returns the number deleted.
+    """
+    deleted, _ = NLPResult.objects.exclude(pipeline_version=pipeline_version()).delete()
+    return deleted
@@ -0,0 +1,187 @@
+"""
+Bulk re-categorization and re-tagging of processed articles.
+
+Used after the keyword table or tagging rules change. GeneratedContent bodies are read
+in id-ordered keyset chunks and streamed through a single nlp.pipe() call (batch_size
+docs at a time, over n_process worker processes), so the model is loaded and the
+workers started once per run, not per article. Every analyzed article goes through
+the same categorize_content and tag_content as the pipeline. Only ProcessedContent
+rows whose categories or tags changed are written, with bulk_update, and new tags are
+carried over to PublishedContent that wasn't manually overridden. The results are also
+stored as NLPResults (see content_processing.nlp_cache), so the pipeline finds them.
+
+After each chunk the last id written is saved to a checkpoint file, together with the
+pipeline version it was computed under, so an interrupted run resumes where it stopped.
+A checkpoint from another pipeline version (the table or model changed since) is
+ignored and the run starts over. The file is removed once the last article has been
+done, including by a --limit run that reaches it.
+"""
+import json
+import logging
+import os
+import time
+
+from django.db import transaction
+
+from .analysis import TextAnalysis
+from .models import ProcessedContent, PublishedContent
+from .nlp import get_nlp, get_nlp_config
+
+logger = logging.getLogger(__name__)
+
+TASK = 'analysis'
+
+
+def read_checkpoint(path):
+    """
+    The saved progress {'last_id', 'scanned', 'changed', 'version'}, or None without a checkpoint.
+    """
+    if not path or not os.path.exists(path):
+        return None
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def write_checkpoint(path, state):
+    temporary = f"{path}.tmp"
+    with open(temporary, 'w', encoding='utf-8') as f:
+        json.dump(state, f)
+    os.replace(temporary, path)
+
+
+def _bodies(start_id, chunk_size, limit=None):
+    """
+    (body, id) for processed articles after start_id in id order, read chunk_size at a time.
+    """
+    from content_generation.models import GeneratedContent
+
+    last_id = start_id
+    remaining = limit
+    while remaining is None or remaining > 0:
+        size = chunk_size if remaining is None else min(chunk_size, remaining)
+        rows = list(
+            GeneratedContent.objects.filter(id__gt=last_id, processed_content__isnull=False)
+            .order_by('id').values_list('id', 'body')[:size]
+        )
+        if not rows:
+            return
+        for content_id, body in rows:
+            yield body, content_id
+        last_id = rows[-1][0]
+        if remaining is not None:
+            remaining -= len(rows)
+
+
+def _has_bodies_after(last_id):
+    from content_generation.models import GeneratedContent
+
+    return GeneratedContent.objects.filter(id__gt=last_id, processed_content__isnull=False).exists()
+
+
+def _changed_rows(results):
+    """
+    ProcessedContent rows whose categories or tags differ from {content id: (categories, tags)},
+    updated in memory.
+    """
+    changed = []
+    for row in ProcessedContent.objects.filter(content_id__in=list(results)).only('id', 'content_id', 'categories', 'tags'):
+        categories, tags = results[row.content_id]
+        if (categories, tags) != (row.categories, row.tags):
+            row.categories, row.tags = categories, tags
+            changed.append(row)
+    return changed
+
+
+def _save(changed):
+    """
+    Write changed ProcessedContent rows and carry their tags over to PublishedContent.
+    """
+    tags_by_processed = {row.id: row.tags for row in changed}
+    published = [
+        PublishedContent(id=published_id, tags=tags_by_processed[processed_id])
+        for published_id, processed_id, tags in PublishedContent.objects.filter(
+            processed_content_id__in=list(tags_by_processed), manually_overridden=False
+        ).values_list('id', 'processed_content_id', 'tags')
+        if tags != tags_by_processed[processed_id]
+    ]
+    with transaction.atomic():
+        ProcessedContent.objects.bulk_update(changed, ['categories', 'tags'], batch_size=500)
+        PublishedContent.objects.bulk_update(published, ['tags'], batch_size=500)
+
+
+def reprocess_content(chunk_size=1000, batch_size=None, n_process=None, checkpoint=None,
+                      restart=False, limit=None, dry_run=False, log=None):
+    """
+    Recompute categories and tags for every processed article. batch_size and n_process
+    default to NLP['PIPE_BATCH_SIZE'] and NLP['PIPE_PROCESSES']. Resumes from the
+    checkpoint file unless restart is set. Returns counters: {'scanned', 'changed',
+    'elapsed', 'rate'} (rate in articles per second for this run).
+    """
+    from .nlp_cache import build_result, pipeline_version, store_results
+
+    log = log or logger.info
+    config = get_nlp_config()
+    batch_size = batch_size or config['PIPE_BATCH_SIZE']
+    n_process = n_process or config['PIPE_PROCESSES']
+
+    version = pipeline_version()
+    state = None if restart else read_checkpoint(checkpoint)
+    if state and state.get('version') != version:
+        log(
+            f"[REPROCESS] Ignoring checkpoint from pipeline version {state.get('version')} "
+            f"(now {version}), starting over"
+        )
+        state = None
+    if state:
+        log(f"[REPROCESS] Resuming after content {state['last_id']} ({state['scanned']} already scanned)")
+    state = state or {'last_id': 0, 'scanned': 0, 'changed': 0, 'version': version}
+
+    nlp = get_nlp(TASK)
+    started = time.monotonic()
+    scanned = 0
+    results = {}
+    nlp_results = []
+
+    def flush():
+        nonlocal scanned
+        if not results:
+            return
+        changed = _changed_rows(results)
+        if not dry_run:
+            if changed:
+                _save(changed)
+            store_results(nlp_results)
+        scanned += len(results)
+        state['last_id'] = max(results)
+        state['scanned'] += len(results)
+        state['changed'] += len(changed)
+        results.clear()
+        nlp_results.clear()
+        if checkpoint and not dry_run:
+            write_checkpoint(checkpoint, state)
+        elapsed = time.monotonic() - started
+        log(
+            f"[REPROCESS] Up to content {state['last_id']}: scanned {state['scanned']}, "
+            f"changed {state['changed']} ({scanned / elapsed if elapsed else 0.0:.1f} articles/s)"
+        )
+
+    docs = nlp.pipe(
+        _bodies(state['last_id'], chunk_size, limit), as_tuples=True, batch_size=batch_size, n_process=n_process
+    )
+    for doc, content_id in docs:
+        nlp_result = build_result(TextAnalysis(doc.text, doc, TASK), version)
+        results[content_id] = (nlp_result.categories, nlp_result.tags)
+        nlp_results.append(nlp_result)
+        if len(results) >= chunk_size:
+            flush()
+    flush()
+
+    if checkpoint and not dry_run and not _has_bodies_after(state['last_id']) and os.path.exists(checkpoint):
+        os.remove(checkpoint)
+    elapsed = time.monotonic() - started
+    return {
+        'scanned': state['scanned'],
+        'changed': state['changed'],
+        'elapsed': round(elapsed, 3),
+        'rate': round(scanned / elapsed, 1) if elapsed else 0.0,
+    }
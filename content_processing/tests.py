@@ -1,3 +1,209 @@
-from django.test import TestCase
+import json
+import os
+import runpy
+import tempfile
+from unittest import mock
 
-# Create your tests here.
+import spacy
+
+from django.conf import settings
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from content_generation.models import APIPrompt, GeneratedContent
+from fact_checking.claims import extract_claims
+
+from . import nlp as nlp_module
+from .categories import (
+    DEFAULT_CATEGORY_KEYWORDS, get_category_engine, get_category_table_version, reset_category_engine, score_categories,
+)
+from .models import ProcessedContent
+from .nlp import TASK_PIPELINES
+from .nlp_cache import pipeline_version
+from .reprocess import read_checkpoint, reprocess_content, write_checkpoint
+from .utils import categorize_content, tag_content
+
+
+def blank_pipeline(model, **kwargs):
+    nlp = spacy.blank('en')
+    nlp.add_pipe('sentencizer')
+    return nlp
+
+
+class PipelineLoadingTests(SimpleTestCase):
+    def setUp(self):
+        patcher = mock.patch.dict('content_processing.nlp._pipelines', clear=True)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        reset_category_engine()
+        self.addCleanup(reset_category_engine)
+        patcher = mock.patch('spacy.load', side_effect=blank_pipeline)
+        self.load = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def loaded_tasks(self):
+        return set(nlp_module._pipelines)
+
+    def test_each_task_loads_only_its_components(self):
+        for task, options in TASK_PIPELINES.items():
+            self.load.reset_mock()
+            nlp_module.get_nlp(task)
+            nlp_module.get_nlp(task)
+            expected = {'exclude': options['exclude']}
+            if options['enable'] is not None:
+                expected['enable'] = options['enable']
+                self.assertFalse(set(options['enable']) & set(options['exclude']))
+            self.load.assert_called_once_with(nlp_module.get_nlp_config()['MODEL'], **expected)
+        with self.assertRaises(ValueError):
+            nlp_module.get_nlp('parse')
+
+    def test_stages_load_the_pipeline_they_need(self):
+        categorize_content("A new smartphone launched.")
+        self.assertEqual(self.loaded_tasks(), {'tokenize'})
+        extract_claims("The council approved the budget on Monday. It rained.")
+        self.assertEqual(self.loaded_tasks(), {'tokenize', 'sentences'})
+        tag_content("The council approved the budget on Monday.")
+        self.assertEqual(self.loaded_tasks(), {'tokenize', 'sentences', 'ner'})
+
+    def test_gunicorn_preloads_the_configured_pipelines_before_forking(self):
+        server = mock.Mock()
+        with mock.patch('gc.freeze') as freeze, override_settings(NLP={'PRELOAD': ['analysis', 'tokenize']}):
+            config = runpy.run_path(os.path.join(settings.BASE_DIR, 'gunicorn.conf.py'))
+            config['when_ready'](server)
+        self.assertEqual(self.loaded_tasks(), {'analysis', 'tokenize'})
+        freeze.assert_called_once()
+
+        nlp_module._pipelines.clear()
+        with mock.patch('gc.freeze') as freeze, mock.patch.dict(os.environ, {'GUNICORN_PRELOAD_APP': 'False'}):
+            config = runpy.run_path(os.path.join(settings.BASE_DIR, 'gunicorn.conf.py'))
+            config['when_ready'](server)
+        self.assertEqual(self.loaded_tasks(), set())
+        freeze.assert_not_called()
+
+
+@mock.patch('spacy.load', blank_pipeline)
+class CategoryMatchingTests(TestCase):
+    def setUp(self):
+        patcher = mock.patch.dict('content_processing.nlp._pipelines', clear=True)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        reset_category_engine()
+        self.addCleanup(reset_category_engine)
+
+    def test_multi_word_keywords_match_as_phrases(self):
+        self.assertEqual(categorize_content("Advances in Artificial Intelligence and machine learning."), ["AI"])
+        # The words of a phrase on their own don't count.
+        self.assertEqual(categorize_content("The artificial lake needs more intelligence."), ["General"])
+        self.assertEqual(score_categories("A laptop and a tablet, powered by deep learning."), {
+            'Gadgets': {'hits': 2, 'confidence': 0.6667}, 'AI': {'hits': 1, 'confidence': 0.3333},
+        })
+
+    def test_edited_table_file_is_reloaded(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'keywords.json')
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump({"Sports": ["football"]}, f)
+            with override_settings(CONTENT_CATEGORIES={'KEYWORDS_PATH': path, 'RELOAD_INTERVAL': 0}):
+                engine = get_category_engine()
+                self.assertEqual(categorize_content("The premier league football season."), ["Sports"])
+
+                with open(path, 'w', encoding='utf-8') as f:
+                    json.dump({"Sports": ["football", "premier league"]}, f)
+                os.utime(path, ns=(1, 1))
+                self.assertIsNot(get_category_engine(), engine)
+                self.assertEqual(score_categories("The premier league football season.")['Sports']['hits'], 2)
+
+                # A broken edit keeps the last good table.
+                with open(path, 'w', encoding='utf-8') as f:
+                    f.write("{not json")
+                os.utime(path, ns=(2, 2))
+                self.assertEqual(categorize_content("The premier league football season."), ["Sports"])
+
+    def test_process_view_uses_the_shared_categorizer(self):
+        prompt = APIPrompt.objects.create(prompt_text="x", status='completed')
+        content = GeneratedContent.objects.create(prompt=prompt, title="Article", body="A new smartphone launched.")
+        with mock.patch('content_processing.utils.categorize_content', return_value=["Gadgets"]) as categorize:
+            response = self.client.post(reverse('process_content', args=[content.id]))
+        self.assertEqual(response.status_code, 201)
+        categorize.assert_called_once()
+        self.assertEqual(response.json()['categories'], ["Gadgets"])
+        self.assertEqual(response.json()['category_table_version'], get_category_table_version())
+
+
+class CategoryTableVersionTests(SimpleTestCase):
+    def setUp(self):
+        patcher = mock.patch.dict('content_processing.nlp._pipelines', clear=True)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        reset_category_engine()
+        self.addCleanup(reset_category_engine)
+
+    def test_version_is_computed_without_loading_spacy(self):
+        with mock.patch('spacy.load', side_effect=AssertionError("spaCy loaded")):
+            version = get_category_table_version()
+            pipeline_version()
+        with mock.patch('spacy.load', blank_pipeline):
+            self.assertEqual(get_category_engine().version, version)
+        self.assertEqual(get_category_table_version(), version)
+
+    def test_version_follows_the_table_file(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'keywords.json')
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump(DEFAULT_CATEGORY_KEYWORDS, f)
+            with override_settings(CONTENT_CATEGORIES={'KEYWORDS_PATH': path, 'RELOAD_INTERVAL': 0}):
+                before = get_category_table_version()
+                with open(path, 'w', encoding='utf-8') as f:
+                    json.dump({"Sports": ["football"]}, f)
+                os.utime(path, ns=(1, 1))
+                self.assertNotEqual(get_category_table_version(), before)
+
+
+@mock.patch('spacy.load', blank_pipeline)
+class ReprocessCheckpointTests(TestCase):
+    def setUp(self):
+        patcher = mock.patch.dict('content_processing.nlp._pipelines', clear=True)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        reset_category_engine()
+        self.addCleanup(reset_category_engine)
+
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.checkpoint = os.path.join(directory.name, 'reprocess.json')
+
+        prompt = APIPrompt.objects.create(prompt_text="x", status='completed')
+        self.contents = []
+        for body in ("The election policy was debated.", "A new smartphone and laptop launched.", "Climate talks resumed."):
+            content = GeneratedContent.objects.create(prompt=prompt, title="Article", body=body)
+            ProcessedContent.objects.create(content=content)
+            self.contents.append(content)
+
+    def reprocess(self, **kwargs):
+        return reprocess_content(chunk_size=1, n_process=1, checkpoint=self.checkpoint, log=lambda message: None, **kwargs)
+
+    def test_limited_run_saves_progress_and_the_version(self):
+        stats = self.reprocess(limit=1)
+        self.assertEqual(stats['scanned'], 1)
+        self.assertEqual(read_checkpoint(self.checkpoint), {
+            'last_id': self.contents[0].id, 'scanned': 1, 'changed': 1, 'version': pipeline_version(),
+        })
+        self.assertEqual(ProcessedContent.objects.get(content=self.contents[0]).categories, ["Politics"])
+
+    def test_run_resumes_from_the_checkpoint(self):
+        self.reprocess(limit=1)
+        stats = self.reprocess(limit=1)
+        self.assertEqual(read_checkpoint(self.checkpoint)['last_id'], self.contents[1].id)
+        self.assertEqual(stats['scanned'], 2)
+
+    def test_limited_run_reaching_the_end_removes_the_checkpoint(self):
+        self.reprocess(limit=2)
+        stats = self.reprocess(limit=5)
+        self.assertEqual(stats['scanned'], 3)
+        self.assertFalse(os.path.exists(self.checkpoint))
+
+    def test_checkpoint_from_another_pipeline_version_is_ignored(self):
+        write_checkpoint(self.checkpoint, {'last_id': self.contents[-1].id, 'scanned': 3, 'changed': 0, 'version': 'old'})
+        stats = self.reprocess()
+        self.assertEqual((stats['scanned'], stats['changed']), (3, 3))
+        self.assertFalse(os.path.exists(self.checkpoint))
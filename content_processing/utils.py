@@ -1,47 +1,30 @@
-import spacy
-import re
 from collections import Counter
 from django.db import transaction
-from .models import ProcessedContent, PublishedContent
+from .models import ProcessedContent, PublishedContent, is_auto_publishable
+from .analysis import as_analysis
+from .categories import score_categories
 from fact_checking.models import FactCheckResult
 
-nlp = spacy.load("en_core_web_sm")
-
 def categorize_content(text):
     """
-    Dynamically categorize content based on predefined keyword mappings.
-    Returns a list of relevant categories.
+    Categorize content with the compiled keyword matcher (see content_processing.categories).
+    Returns the matched categories, most keyword hits first, or ["General"].
+    Accepts the body or a TextAnalysis of it (see content_processing.analysis).
     """
-    categories_keywords = {
-        "AI": ["artificial intelligence", "machine learning", "deep learning", "AI"],
-        "Technology": ["technology", "gadgets", "innovation", "tech"],
-        "Gadgets": ["smartphone", "tablet", "laptop", "gadget"],
-        "Politics": ["government", "election", "policy", "politics"],
-        "Health": ["medicine", "health", "wellness", "disease"],
-        "Environment": ["climate", "environment", "sustainability"]
-    }
-    text_clean = re.sub(r'[^a-zA-Z0-9\s]', ' ', text).lower()
-    doc = nlp(text_clean)
-    tokens = [token.text for token in doc]
-    matched_categories = []
-    for category, keywords in categories_keywords.items():
-        for keyword in keywords:
-            if keyword.lower() in tokens:
-                matched_categories.append(category)
-                break
-    return list(set(matched_categories)) if matched_categories else ["General"]
+    categories = list(score_categories(text))
+    return categories if categories else ["General"]
 
 def tag_content(text):
     """
     Extract tags from text using spaCy named entity recognition.
     Returns a list of unique tags (up to 10).
+    Accepts the body or a TextAnalysis of it.
     """
-    doc = nlp(text)
-    tags = [ent.text for ent in doc.ents]
+    tags = [entity for entity, _ in as_analysis(text, task='ner').entities]
     unique_tags = list(dict.fromkeys(tags))
     return unique_tags[:10]
 
-def process_generated_content(generated_instance):
+def process_generated_content(generated_instance, categories=None, tags=None, fact_check=None):
     """
     Process a GeneratedContent instance:
       - Categorize the content.
@@ -49,6 +32,9 @@ def process_generated_content(generated_instance):
       - Create a ProcessedContent record.
       - Automatically create PublishedContent if fact_check_status is "unverified"
     
+    The pipeline computes categories/tags while the fact check of the body's claims
+    is in flight and passes both in; anything not passed is computed (or looked up) here.
+    
     Note: This function is called by a signal from content_generation app.
     The signal in models.py (trigger_publication) will also try to create PublishedContent,
     so we use get_or_create to prevent duplicates.
@@ -62,13 +48,19 @@ def process_generated_content(generated_instance):
                 print(f"[PROCESS] Content already processed, skipping...")
                 return generated_instance.processed_content
 
-            # Categorize and tag the content
-            categories = categorize_content(generated_instance.body)
-            tags = tag_content(generated_instance.body)
+            # Categorize and tag the content unless the pipeline already did
+            if categories is None or tags is None:
+                from .nlp_cache import analyze_content
+                nlp_result = analyze_content(generated_instance.body)
+                if categories is None:
+                    categories = nlp_result.categories
+                if tags is None:
+                    tags = nlp_result.tags
             print(f"[PROCESS] Categories: {categories}, Tags: {tags[:3]}...")
 
             # Look for fact check result
-            fact_check = FactCheckResult.objects.filter(claim=generated_instance.body).first()
+            if fact_check is None:
+                fact_check = generated_instance.fact_check or FactCheckResult.for_claim(generated_instance.body)
             
             if fact_check:
                 print(f"[PROCESS] Fact check found: {fact_check.textual_rating}")
@@ -84,7 +76,7 @@ def process_generated_content(generated_instance):
             # Create ProcessedContent
             # Note: The save() method in ProcessedContent model will also fetch fact_check
             # and set publish_status, but we're being explicit here
-            processed = ProcessedContent.objects.create(
+            processed = ProcessedContent(
                 content=generated_instance,
                 categories=categories,
                 tags=tags,
@@ -93,6 +85,8 @@ def process_generated_content(generated_instance):
                 composite_score=composite_score,
                 evidence=evidence
             )
+            processed.fact_check = fact_check  # Direct link; save() skips its own lookup
+            processed.save()
             print(f"[PROCESS] ProcessedContent created (ID: {processed.id})")
             print(f"[PROCESS] Publish status: {processed.publish_status}")
 
@@ -100,7 +94,7 @@ def process_generated_content(generated_instance):
             # PublishedContent creation, so we DON'T create it here to avoid duplicates
             # If for some reason you want to ensure it's created, use get_or_create:
             
-            if processed.fact_check_status.lower() == "unverified":
+            if is_auto_publishable(processed.fact_check_status):
                 published, created = PublishedContent.objects.get_or_create(
                     processed_content=processed,
                     defaults={
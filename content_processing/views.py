@@ -19,27 +19,21 @@ class ProcessContentView(APIView):
             content = GeneratedContent.objects.get(id=content_id)
             if hasattr(content, 'processed_content'):
                 return Response({"message": "Content has already been processed."}, status=status.HTTP_400_BAD_REQUEST)
-            from .utils import categorize_content, tag_content
-            categories = categorize_content(content.body)
-            tags = tag_content(content.body)
-            processed = ProcessedContent.objects.create(
-                content=content,
-                categories=categories,
-                tags=tags
+            from .analysis import analyze_text
+            from .categories import get_category_table_version, score_categories
+            from .utils import categorize_content, process_generated_content, tag_content
+            analysis = analyze_text(content.body)
+            category_scores = score_categories(analysis)
+            # Same categorization, fact-check lookup and publication gate as the pipeline
+            processed = process_generated_content(
+                content, categories=categorize_content(analysis), tags=tag_content(analysis)
             )
-            if processed.publish_status == "published":
-                from .models import PublishedContent
-                PublishedContent.objects.create(
-                    processed_content=processed,
-                    title=content.title,
-                    body=content.body, 
-                    fact_check_status=processed.fact_check_status,
-                    tags=processed.tags
-                )
             return Response({
                 "message": "Content processed successfully.",
                 "processed_content_id": processed.id,
                 "categories": processed.categories,
+                "category_scores": category_scores,
+                "category_table_version": get_category_table_version(),
                 "tags": processed.tags,
                 "fact_check_status": processed.fact_check_status,
                 "composite_score": processed.composite_score,
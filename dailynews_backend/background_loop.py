@@ -0,0 +1,60 @@
+"""
+A long-lived per-process event loop that sync code submits coroutines to.
+
+Running coroutines here instead of with asyncio.run() keeps async HTTP clients and
+their pooled connections alive across calls.
+"""
+import asyncio
+import os
+import threading
+
+
+class BackgroundLoop:
+    """
+    An event loop running forever on a daemon thread, restarted after a fork.
+    """
+
+    def __init__(self, name='background-loop'):
+        self.name = name
+        self._loop = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def _ensure(self):
+        pid = os.getpid()
+        if self._loop is None or self._pid != pid:
+            with self._lock:
+                if self._loop is None or self._pid != pid:
+                    self._loop = asyncio.new_event_loop()
+                    self._pid = pid
+                    threading.Thread(target=self._loop.run_forever, name=self.name, daemon=True).start()
+        return self._loop
+
+    def run(self, coro):
+        """
+        Run coro on the loop and block until it finishes. Must not be called from the loop itself.
+        """
+        return self.submit(coro).result()
+
+    def submit(self, coro):
+        """
+        Schedule coro on the loop and return a concurrent.futures.Future for its result.
+        """
+        return asyncio.run_coroutine_threadsafe(coro, self._ensure())
+
+
+_loop = BackgroundLoop()
+
+
+def run_coroutine(coro):
+    """
+    Run coro on the shared background loop and return its result.
+    """
+    return _loop.run(coro)
+
+
+def submit_coroutine(coro):
+    """
+    Schedule coro on the shared background loop; returns a concurrent.futures.Future.
+    """
+    return _loop.submit(coro)
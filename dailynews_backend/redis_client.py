@@ -0,0 +1,24 @@
+"""
+Shared Redis connections for caches, rate limiting and locks.
+"""
+import threading
+
+from django.conf import settings
+
+_clients = {}
+_lock = threading.Lock()
+
+
+def get_redis_client(url=None):
+    """
+    Return a process-wide redis.Redis client (with its own connection pool) for url,
+    defaulting to settings.REDIS_URL.
+    """
+    import redis
+
+    url = url or settings.REDIS_URL
+    with _lock:
+        client = _clients.get(url)
+        if client is None:
+            client = _clients[url] = redis.Redis.from_url(url)
+    return client
@@ -24,8 +24,211 @@ import os
 # Retrieve the OpenAI API key
 OPENAI_API_KEY = os.environ.get('OPENAI_API_KEY')
 
+GOOGLE_FACT_CHECK_ENDPOINT = os.environ.get('GOOGLE_FACT_CHECK_ENDPOINT', 'https://factchecktools.googleapis.com/v1alpha1/claims:search')
 GOOGLE_FACT_CHECK_API_KEY = os.environ.get('GOOGLE_FACT_CHECK_API_KEY')
 
+ANTHROPIC_API_KEY = os.environ.get('ANTHROPIC_API_KEY')
+
+REDIS_URL = os.environ.get('REDIS_URL', 'redis://localhost:6379/0')
+
+# LLM providers used for content generation. LLM_PROVIDER selects the default;
+# 'fake' is a deterministic offline backend for development and load testing.
+LLM_DEFAULT_PROVIDER = os.environ.get('LLM_PROVIDER', 'openai')
+LLM_PROVIDERS = {
+    'openai': {
+        'BACKEND': 'content_generation.providers.OpenAIProvider',
+        'MODEL': os.environ.get('OPENAI_MODEL', 'gpt-4.1'),
+        'API_KEY': OPENAI_API_KEY,
+        'BASE_URL': os.environ.get('OPENAI_BASE_URL', 'https://api.openai.com/v1'),
+        'TIMEOUT': float(os.environ.get('LLM_TIMEOUT', 60)),  # read timeout, seconds
+        'CONNECT_TIMEOUT': float(os.environ.get('LLM_CONNECT_TIMEOUT', 5)),
+        'MAX_RETRIES': int(os.environ.get('LLM_MAX_RETRIES', 3)),
+    },
+    'anthropic': {
+        'BACKEND': 'content_generation.providers.AnthropicProvider',
+        'MODEL': os.environ.get('ANTHROPIC_MODEL', 'claude-3-5-sonnet-latest'),
+        'API_KEY': ANTHROPIC_API_KEY,
+        'BASE_URL': os.environ.get('ANTHROPIC_BASE_URL', 'https://api.anthropic.com/v1'),
+        'TIMEOUT': float(os.environ.get('LLM_TIMEOUT', 60)),
+        'CONNECT_TIMEOUT': float(os.environ.get('LLM_CONNECT_TIMEOUT', 5)),
+        'MAX_RETRIES': int(os.environ.get('LLM_MAX_RETRIES', 3)),
+    },
+    'fake': {
+        'BACKEND': 'content_generation.providers.FakeProvider',
+        'LATENCY': float(os.environ.get('FAKE_LLM_LATENCY', 0.5)),  # seconds
+        'JITTER': float(os.environ.get('FAKE_LLM_JITTER', 0.0)),
+    },
+}
+
+# Shared RPM/TPM limiter for LLM calls, one bucket pair per provider.
+# BACKEND is 'redis' (shared by all workers, falls back to in-process buckets), 'local' or 'none'.
+LLM_RATE_LIMIT = {
+    'BACKEND': os.environ.get('LLM_RATE_LIMIT_BACKEND', 'local'),
+    'REQUESTS_PER_MINUTE': int(os.environ.get('LLM_REQUESTS_PER_MINUTE', 500)),
+    'TOKENS_PER_MINUTE': int(os.environ.get('LLM_TOKENS_PER_MINUTE', 200000)),
+    'BATCH_RESERVE': float(os.environ.get('LLM_BATCH_RESERVE', 0.2)),  # capacity fraction kept for interactive calls
+    'MAX_WAIT': float(os.environ.get('LLM_RATE_LIMIT_MAX_WAIT', 120)),  # seconds
+}
+
+# Hedged LLM requests: if the primary call is slower than the PERCENTILE of recent
+# latencies (DEFAULT_DELAY until MIN_SAMPLES calls have been seen), send a second request
+# to PROVIDER/MODEL (default: the same provider and model) and keep the first answer.
+LLM_HEDGING = {
+    'ENABLED': os.environ.get('LLM_HEDGING_ENABLED', 'False') == 'True',
+    'PERCENTILE': float(os.environ.get('LLM_HEDGING_PERCENTILE', 95)),
+    'DEFAULT_DELAY': float(os.environ.get('LLM_HEDGING_DEFAULT_DELAY', 5.0)),  # seconds
+    'MIN_DELAY': float(os.environ.get('LLM_HEDGING_MIN_DELAY', 0.5)),  # seconds
+    'MIN_SAMPLES': 20,
+    'WINDOW': 500,
+    'PROVIDER': os.environ.get('LLM_HEDGING_PROVIDER') or None,
+    'MODEL': os.environ.get('LLM_HEDGING_MODEL') or None,
+}
+
+# Content generation queue
+# 'db' leaves prompts for `python manage.py process_prompts` workers, 'celery' sends them
+# to Celery, 'thread' runs them on an in-process pool (not durable: prompts running when
+# the process exits are only requeued by a process_prompts worker).
+CONTENT_GENERATION_BACKEND = os.environ.get('CONTENT_GENERATION_BACKEND', 'db')
+CONTENT_GENERATION_WORKERS = int(os.environ.get('CONTENT_GENERATION_WORKERS', 4))
+# Workers refresh a running prompt's heartbeat every HEARTBEAT_INTERVAL seconds; prompts
+# whose heartbeat is older than STALE_AFTER seconds (their worker died) are requeued.
+CONTENT_GENERATION_HEARTBEAT_INTERVAL = int(os.environ.get('CONTENT_GENERATION_HEARTBEAT_INTERVAL', 60))
+CONTENT_GENERATION_STALE_AFTER = int(os.environ.get('CONTENT_GENERATION_STALE_AFTER', 600))  # seconds
+CONTENT_GENERATION_BATCH_CONCURRENCY = int(os.environ.get('CONTENT_GENERATION_BATCH_CONCURRENCY', 8))
+CONTENT_GENERATION_BATCH_MAX_SIZE = int(os.environ.get('CONTENT_GENERATION_BATCH_MAX_SIZE', 500))
+
+# Cache for LLM responses, keyed on (normalized prompt, model, temperature, token limit).
+# BACKEND is 'locmem' (per-process LRU), 'redis' (shared) or 'none'.
+CONTENT_GENERATION_CACHE = {
+    'BACKEND': os.environ.get('CONTENT_GENERATION_CACHE_BACKEND', 'locmem'),
+    'TTL': int(os.environ.get('CONTENT_GENERATION_CACHE_TTL', 3600)),  # seconds
+    'MAX_ENTRIES': int(os.environ.get('CONTENT_GENERATION_CACHE_MAX_ENTRIES', 1024)),
+}
+
+# Near-duplicate detection for generated articles. Articles whose SimHash is within
+# MAX_DISTANCE bits (at most 3, the banded index guarantee) of an existing one skip the pipeline.
+CONTENT_DEDUP = {
+    'ENABLED': os.environ.get('CONTENT_DEDUP_ENABLED', 'True') == 'True',
+    'MAX_DISTANCE': int(os.environ.get('CONTENT_DEDUP_MAX_DISTANCE', 3)),
+}
+
+# Cache for Google Fact Check lookups, keyed on the normalized claim. BACKEND is 'db', 'redis' or 'none'.
+# "Unverified" results are kept for NEGATIVE_TTL so newly published reviews are picked up sooner.
+FACT_CHECK_CACHE = {
+    'BACKEND': os.environ.get('FACT_CHECK_CACHE_BACKEND', 'db'),
+    'TTL': int(os.environ.get('FACT_CHECK_CACHE_TTL', 86400)),  # seconds
+    'NEGATIVE_TTL': int(os.environ.get('FACT_CHECK_CACHE_NEGATIVE_TTL', 3600)),  # seconds
+}
+
+# Per-claim fact-checking: up to MAX_CLAIMS check-worthy sentences per article are
+# checked concurrently (CONCURRENCY in flight per article) over a pooled async client.
+FACT_CHECK_CLAIMS = {
+    'MAX_CLAIMS': int(os.environ.get('FACT_CHECK_MAX_CLAIMS', 5)),
+    'CONCURRENCY': int(os.environ.get('FACT_CHECK_CONCURRENCY', 4)),
+}
+
+# Google Fact Check API client: pooled connections, timeouts, jittered retries and a
+# circuit breaker that opens after FAILURE_THRESHOLD consecutive failures.
+FACT_CHECK_CLIENT = {
+    'TIMEOUT': float(os.environ.get('FACT_CHECK_TIMEOUT', 10)),  # read timeout, seconds
+    'CONNECT_TIMEOUT': float(os.environ.get('FACT_CHECK_CONNECT_TIMEOUT', 3)),
+    'MAX_CONNECTIONS': int(os.environ.get('FACT_CHECK_MAX_CONNECTIONS', 20)),
+    'MAX_RETRIES': int(os.environ.get('FACT_CHECK_MAX_RETRIES', 2)),
+    'FAILURE_THRESHOLD': int(os.environ.get('FACT_CHECK_FAILURE_THRESHOLD', 5)),
+    'RESET_TIMEOUT': float(os.environ.get('FACT_CHECK_RESET_TIMEOUT', 30)),  # seconds the circuit stays open
+}
+
+# Local ClaimReview index (filled by `import_claimreviews`), consulted before the Google API.
+# A review answers a claim when it covers MIN_COVERAGE of the claim's IDF weight and
+# MIN_REVIEW_COVERAGE of its own terms.
+FACT_CHECK_LOCAL_INDEX = {
+    'ENABLED': os.environ.get('FACT_CHECK_LOCAL_INDEX_ENABLED', 'True') == 'True',
+    'MIN_COVERAGE': float(os.environ.get('FACT_CHECK_LOCAL_MIN_COVERAGE', 0.8)),
+    'MIN_REVIEW_COVERAGE': float(os.environ.get('FACT_CHECK_LOCAL_MIN_REVIEW_COVERAGE', 0.5)),
+}
+
+# Verdict scoring: every returned review's rating is normalized through a lexicon and
+# weighted by publisher credibility. LEXICON and PUBLISHER_WEIGHTS extend the built-in
+# tables (see fact_checking.scoring); run `rescore_fact_checks` after changing them.
+FACT_CHECK_SCORING = {
+    'LEXICON_PATH': os.environ.get('FACT_CHECK_LEXICON_PATH', ''),  # JSON file of {"rating": score}
+    'DEFAULT_PUBLISHER_WEIGHT': float(os.environ.get('FACT_CHECK_DEFAULT_PUBLISHER_WEIGHT', 0.5)),
+}
+
+# Batch fact-check endpoint (/fact_check/check/batch/): at most MAX_SIZE claims per request,
+# CONCURRENCY lookups in flight, results saved in bulk_create chunks of up to CHUNK_SIZE.
+FACT_CHECK_BATCH = {
+    'MAX_SIZE': int(os.environ.get('FACT_CHECK_BATCH_MAX_SIZE', 5000)),
+    'CONCURRENCY': int(os.environ.get('FACT_CHECK_BATCH_CONCURRENCY', 16)),
+    'CHUNK_SIZE': int(os.environ.get('FACT_CHECK_BATCH_CHUNK_SIZE', 100)),
+}
+
+# Periodic re-verification of stale fact checks (`reverify_fact_checks` / Celery beat).
+# Verdicts behind published articles with at least HOT_ENGAGEMENT likes+comments+shares
+# are re-checked after HOT_MAX_AGE, other published ones after PUBLISHED_MAX_AGE and the
+# rest after MAX_AGE (seconds), within a budget of CLAIMS_PER_MINUTE API lookups shared
+# by all processes through Redis.
+FACT_CHECK_REVERIFY = {
+    'BATCH_SIZE': int(os.environ.get('FACT_CHECK_REVERIFY_BATCH_SIZE', 200)),
+    'HOT_MAX_AGE': int(os.environ.get('FACT_CHECK_REVERIFY_HOT_MAX_AGE', 86400)),
+    'HOT_ENGAGEMENT': int(os.environ.get('FACT_CHECK_REVERIFY_HOT_ENGAGEMENT', 50)),
+    'PUBLISHED_MAX_AGE': int(os.environ.get('FACT_CHECK_REVERIFY_PUBLISHED_MAX_AGE', 7 * 86400)),
+    'MAX_AGE': int(os.environ.get('FACT_CHECK_REVERIFY_MAX_AGE', 30 * 86400)),
+    'CLAIMS_PER_MINUTE': int(os.environ.get('FACT_CHECK_REVERIFY_CLAIMS_PER_MINUTE', 60)),
+    'LIMIT': int(os.environ.get('FACT_CHECK_REVERIFY_LIMIT', 1000)),  # re-checks per scheduled run
+}
+
+# Pipeline outbox: every GeneratedContent gets a PipelineOutbox row in the same transaction.
+# DISPATCH is 'worker' (leave it for `python manage.py run_pipeline_worker` processes) or
+# 'thread' (also start the event on the in-process pool after commit). Workers refresh a
+# running event's heartbeat every HEARTBEAT_INTERVAL seconds; events whose heartbeat is
+# older than STALE_AFTER seconds (their worker died) are requeued.
+CONTENT_PIPELINE = {
+    'DISPATCH': os.environ.get('CONTENT_PIPELINE_DISPATCH', 'worker'),
+    'BATCH_SIZE': int(os.environ.get('CONTENT_PIPELINE_BATCH_SIZE', 20)),
+    'MAX_ATTEMPTS': int(os.environ.get('CONTENT_PIPELINE_MAX_ATTEMPTS', 5)),
+    'RETRY_DELAY': int(os.environ.get('CONTENT_PIPELINE_RETRY_DELAY', 30)),  # seconds, doubled per attempt
+    'HEARTBEAT_INTERVAL': int(os.environ.get('CONTENT_PIPELINE_HEARTBEAT_INTERVAL', 60)),  # seconds
+    'STALE_AFTER': int(os.environ.get('CONTENT_PIPELINE_STALE_AFTER', 300)),  # seconds
+}
+
+# spaCy model for categorization, tagging and claim extraction. Pipelines load lazily per
+# task; PRELOAD lists the ones gunicorn loads in the master before forking (gunicorn.conf.py).
+# PIPE_BATCH_SIZE and PIPE_PROCESSES are the nlp.pipe() defaults for `reprocess_content`.
+NLP = {
+    'MODEL': os.environ.get('NLP_MODEL', 'en_core_web_sm'),
+    'PRELOAD': [task for task in os.environ.get('NLP_PRELOAD', 'analysis').split(',') if task],
+    'PIPE_BATCH_SIZE': int(os.environ.get('NLP_PIPE_BATCH_SIZE', 256)),
+    'PIPE_PROCESSES': int(os.environ.get('NLP_PIPE_PROCESSES', 1)),
+}
+
+# Keyword categorization (content_processing.categories). KEYWORDS_PATH points at a JSON
+# file of {"Category": ["keyword", "multi word keyword", ...]} replacing the built-in table;
+# it is re-checked every RELOAD_INTERVAL seconds and recompiled when it changes.
+CONTENT_CATEGORIES = {
+    'KEYWORDS_PATH': os.environ.get('CONTENT_CATEGORY_KEYWORDS_PATH', ''),
+    'RELOAD_INTERVAL': int(os.environ.get('CONTENT_CATEGORY_RELOAD_INTERVAL', 30)),  # seconds
+}
+
+# Request coalescing for identical in-flight fact-check and LLM calls. BACKEND is 'local'
+# (per process) or 'redis' (the first process holds a lock for up to LOCK_TTL and hands its
+# result to the others through a key kept for RESULT_TTL; waiters give up after WAIT_TIMEOUT).
+SINGLE_FLIGHT = {
+    'BACKEND': os.environ.get('SINGLE_FLIGHT_BACKEND', 'local'),
+    'LOCK_TTL': float(os.environ.get('SINGLE_FLIGHT_LOCK_TTL', 60)),  # seconds
+    'WAIT_TIMEOUT': float(os.environ.get('SINGLE_FLIGHT_WAIT_TIMEOUT', 60)),  # seconds
+    'RESULT_TTL': float(os.environ.get('SINGLE_FLIGHT_RESULT_TTL', 10)),  # seconds
+}
+
+# Celery
+CELERY_BROKER_URL = os.environ.get('CELERY_BROKER_URL', REDIS_URL)
+CELERY_BEAT_SCHEDULE = {
+    'reverify-stale-fact-checks': {
+        'task': 'fact_checking.tasks.reverify_fact_checks_task',
+        'schedule': int(os.environ.get('FACT_CHECK_REVERIFY_INTERVAL', 3600)),  # seconds
+    },
+}
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -0,0 +1,318 @@
+"""
+Single-flight request coalescing.
+
+Concurrent calls with the same key share one execution. Within a process, followers
+wait on the leader's future. Across processes (BACKEND 'redis'), the leader holds a
+Redis lock while it runs and hands its JSON result over through a short-lived Redis
+key; callers in other processes poll for that key instead of repeating the call. If
+the leader dies or fails, its lock expires or is released without a result and
+waiting callers run the call themselves.
+
+Only JSON-serializable results can be shared across processes.
+"""
+import asyncio
+import copy
+import json
+import logging
+import threading
+import time
+import uuid
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = 'singleflight:'
+
+# Delete the lock only if we still own it.
+RELEASE_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+
+def get_single_flight_config():
+    config = {
+        'BACKEND': 'local',
+        'LOCK_TTL': 60.0,
+        'WAIT_TIMEOUT': 60.0,
+        'RESULT_TTL': 10.0,
+        'POLL_INTERVAL': 0.05,
+    }
+    config.update(getattr(settings, 'SINGLE_FLIGHT', {}))
+    return config
+
+
+class _NoResult(Exception):
+    """The remote leader finished without publishing a result."""
+
+
+class SingleFlight:
+    """
+    A named group of coalesced calls (e.g. 'fact_check', 'llm').
+    """
+
+    def __init__(self, name, backend='local', lock_ttl=60.0, wait_timeout=60.0, result_ttl=10.0,
+                 poll_interval=0.05, redis_url=None):
+        self.name = name
+        self.backend = backend
+        self.lock_ttl = lock_ttl
+        self.wait_timeout = wait_timeout
+        self.result_ttl = result_ttl
+        self.poll_interval = poll_interval
+        self.redis_url = redis_url
+        self._calls = {}
+        self._async_calls = {}
+        self._lock = threading.Lock()
+        self._release = None
+        self._stats = {'leaders': 0, 'local_followers': 0, 'remote_followers': 0, 'fallbacks': 0}
+
+    # -- redis -------------------------------------------------------------------
+
+    @property
+    def client(self):
+        from dailynews_backend.redis_client import get_redis_client
+        return get_redis_client(self.redis_url)
+
+    def _lock_key(self, key):
+        return f"{KEY_PREFIX}{self.name}:{key}:lock"
+
+    def _result_key(self, key):
+        return f"{KEY_PREFIX}{self.name}:{key}:result"
+
+    def _try_lock(self, key):
+        """
+        Return a lock token if this process now leads key, None if another process does.
+        Falls back to leading locally when Redis is unavailable.
+        """
+        token = uuid.uuid4().hex
+        try:
+            if self.client.set(self._lock_key(key), token, nx=True, px=int(self.lock_ttl * 1000)):
+                return token
+            return None
+        except Exception as e:
+            logger.warning("Single-flight lock unavailable, running call locally: %s", e)
+            return ''
+
+    def _publish(self, key, token, value):
+        if not token:
+            return
+        try:
+            self.client.set(self._result_key(key), json.dumps(value), px=int(self.result_ttl * 1000))
+        except (TypeError, ValueError):
+            logger.warning("Single-flight result for %s:%s is not JSON-serializable", self.name, key)
+        except Exception as e:
+            logger.warning("Single-flight result handoff failed: %s", e)
+
+    def _unlock(self, key, token):
+        if not token:
+            return
+        try:
+            if self._release is None:
+                self._release = self.client.register_script(RELEASE_SCRIPT)
+            self._release(keys=[self._lock_key(key)], args=[token])
+        except Exception as e:
+            logger.warning("Single-flight unlock failed: %s", e)
+
+    def _poll_remote(self, key):
+        """
+        Check once for a remote leader's result. Returns ('result', value), ('wait', None)
+        while the leader is still running, or ('gone', None) if it finished without a result.
+        """
+        pipe = self.client.pipeline()
+        pipe.get(self._result_key(key))
+        pipe.exists(self._lock_key(key))
+        raw, locked = pipe.execute()
+        if raw is not None:
+            return 'result', json.loads(raw)
+        return ('wait', None) if locked else ('gone', None)
+
+    def _incr(self, field):
+        with self._lock:
+            self._stats[field] += 1
+
+    # -- sync --------------------------------------------------------------------
+
+    def do(self, key, fn, *args, **kwargs):
+        """
+        Return fn(*args, **kwargs), sharing one execution among concurrent callers with the same key.
+        """
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = self._calls[key] = Future()
+        if not leader:
+            self._incr('local_followers')
+            try:
+                return copy.deepcopy(future.result(timeout=self.wait_timeout))
+            except FutureTimeoutError:
+                # The leader is stuck: don't fail the caller, run the call ourselves
+                self._incr('fallbacks')
+                return fn(*args, **kwargs)
+
+        try:
+            result = self._lead(key, fn, args, kwargs)
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return copy.deepcopy(result)
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+
+    def _lead(self, key, fn, args, kwargs):
+        if self.backend != 'redis':
+            self._incr('leaders')
+            return fn(*args, **kwargs)
+        deadline = time.monotonic() + self.wait_timeout
+        while True:
+            token = self._try_lock(key)
+            if token is not None:
+                self._incr('leaders')
+                try:
+                    result = fn(*args, **kwargs)
+                    self._publish(key, token, result)
+                    return result
+                finally:
+                    self._unlock(key, token)
+            try:
+                return self._wait_remote(key, deadline)
+            except _NoResult:
+                # The remote leader failed or died: try to take over
+                if time.monotonic() >= deadline:
+                    self._incr('fallbacks')
+                    return fn(*args, **kwargs)
+
+    def _wait_remote(self, key, deadline):
+        while time.monotonic() < deadline:
+            try:
+                state, value = self._poll_remote(key)
+            except Exception as e:
+                logger.warning("Single-flight handoff unavailable: %s", e)
+                raise _NoResult()
+            if state == 'result':
+                self._incr('remote_followers')
+                return value
+            if state == 'gone':
+                raise _NoResult()
+            time.sleep(self.poll_interval)
+        raise _NoResult()
+
+    # -- async -------------------------------------------------------------------
+
+    async def ado(self, key, coro_fn, *args, **kwargs):
+        """
+        Async variant of do() for coroutine functions. Redis calls run in a worker
+        thread so the event loop is never blocked.
+
+        The shared call runs as its own task that every caller awaits through a shield,
+        so cancelling one caller (the first included) doesn't cancel the others. The
+        task is only cancelled once every caller waiting on it has been cancelled.
+        """
+        loop = asyncio.get_running_loop()
+        calls = self._async_calls.setdefault(loop, {})
+        call = calls.get(key)
+        if call is None:
+            task = loop.create_task(self._alead(key, coro_fn, args, kwargs))
+            call = calls[key] = {'task': task, 'waiters': 0}
+            task.add_done_callback(lambda done: self._forget(loop, key, done))
+        else:
+            self._incr('local_followers')
+        task = call['task']
+        call['waiters'] += 1
+        try:
+            return copy.deepcopy(await asyncio.shield(task))
+        finally:
+            call['waiters'] -= 1
+            if not call['waiters'] and not task.done():
+                # Nobody is waiting any more: stop the call and let the next caller start afresh
+                self._forget(loop, key, task)
+                task.cancel()
+
+    def _forget(self, loop, key, task):
+        calls = self._async_calls.get(loop, {})
+        if key in calls and calls[key]['task'] is task:
+            del calls[key]
+            if not calls:
+                self._async_calls.pop(loop, None)
+        if task.done() and not task.cancelled():
+            task.exception()  # Mark retrieved when every caller was cancelled
+
+    async def _alead(self, key, coro_fn, args, kwargs):
+        if self.backend != 'redis':
+            self._incr('leaders')
+            return await coro_fn(*args, **kwargs)
+        deadline = time.monotonic() + self.wait_timeout
+        while True:
+            token = await asyncio.to_thread(self._try_lock, key)
+            if token is not None:
+                self._incr('leaders')
+                try:
+                    result = await coro_fn(*args, **kwargs)
+                    await asyncio.to_thread(self._publish, key, token, result)
+                    return result
+                finally:
+                    await asyncio.to_thread(self._unlock, key, token)
+            try:
+                return await self._await_remote(key, deadline)
+            except _NoResult:
+                if time.monotonic() >= deadline:
+                    self._incr('fallbacks')
+                    return await coro_fn(*args, **kwargs)
+
+    async def _await_remote(self, key, deadline):
+        while time.monotonic() < deadline:
+            try:
+                state, value = await asyncio.to_thread(self._poll_remote, key)
+            except Exception as e:
+                logger.warning("Single-flight handoff unavailable: %s", e)
+                raise _NoResult()
+            if state == 'result':
+                self._incr('remote_followers')
+                return value
+            if state == 'gone':
+                raise _NoResult()
+            await asyncio.sleep(self.poll_interval)
+        raise _NoResult()
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats, in_flight=len(self._calls))
+        stats['backend'] = self.backend
+        return stats
+
+
+_groups = {}
+_groups_lock = threading.Lock()
+
+
+def get_single_flight(name):
+    """
+    Return the process-wide single-flight group for name, configured by settings.SINGLE_FLIGHT.
+    """
+    group = _groups.get(name)
+    if group is None:
+        with _groups_lock:
+            group = _groups.get(name)
+            if group is None:
+                config = get_single_flight_config()
+                group = _groups[name] = SingleFlight(
+                    name,
+                    backend=config['BACKEND'],
+                    lock_ttl=config['LOCK_TTL'],
+                    wait_timeout=config['WAIT_TIMEOUT'],
+                    result_ttl=config['RESULT_TTL'],
+                    poll_interval=config['POLL_INTERVAL'],
+                    redis_url=config.get('REDIS_URL'),
+                )
+    return group
+
+
+def single_flight_stats():
+    return {name: group.stats() for name, group in _groups.items()}
@@ -0,0 +1,150 @@
+import asyncio
+import threading
+import time
+
+from django.test import SimpleTestCase
+
+from .singleflight import SingleFlight
+
+
+class SingleFlightTests(SimpleTestCase):
+    def test_concurrent_calls_share_one_execution(self):
+        group = SingleFlight('test')
+        calls = []
+        started = threading.Event()
+        release = threading.Event()
+
+        def slow(value):
+            calls.append(value)
+            started.set()
+            release.wait(5)
+            return {'value': value}
+
+        results = []
+        leader = threading.Thread(target=lambda: results.append(group.do('k', slow, 1)))
+        leader.start()
+        started.wait(5)
+        followers = [threading.Thread(target=lambda: results.append(group.do('k', slow, 2))) for _ in range(4)]
+        for thread in followers:
+            thread.start()
+        time.sleep(0.05)
+        release.set()
+        for thread in [leader] + followers:
+            thread.join(5)
+
+        self.assertEqual(calls, [1])
+        self.assertEqual(results, [{'value': 1}] * 5)
+        self.assertEqual(group.stats()['local_followers'], 4)
+
+    def test_leader_failure_reaches_followers(self):
+        group = SingleFlight('test')
+        started = threading.Event()
+        release = threading.Event()
+
+        def failing():
+            started.set()
+            release.wait(5)
+            raise ValueError("upstream down")
+
+        errors = []
+
+        def call():
+            try:
+                group.do('k', failing)
+            except ValueError as e:
+                errors.append(str(e))
+
+        leader = threading.Thread(target=call)
+        leader.start()
+        started.wait(5)
+        follower = threading.Thread(target=call)
+        follower.start()
+        time.sleep(0.05)
+        release.set()
+        leader.join(5)
+        follower.join(5)
+
+        self.assertEqual(errors, ["upstream down", "upstream down"])
+        self.assertEqual(group.stats()['in_flight'], 0)
+
+    def test_follower_runs_the_call_itself_when_the_leader_is_stuck(self):
+        group = SingleFlight('test', wait_timeout=0.05)
+        started = threading.Event()
+        release = threading.Event()
+
+        def stuck():
+            started.set()
+            release.wait(5)
+            return 'leader'
+
+        leader = threading.Thread(target=group.do, args=('k', stuck))
+        leader.start()
+        started.wait(5)
+        try:
+            self.assertEqual(group.do('k', lambda: 'follower'), 'follower')
+            self.assertEqual(group.stats()['fallbacks'], 1)
+        finally:
+            release.set()
+            leader.join(5)
+
+    def test_async_calls_share_one_execution(self):
+        group = SingleFlight('test')
+        calls = []
+
+        async def fetch(value):
+            calls.append(value)
+            await asyncio.sleep(0.01)
+            return [value]
+
+        async def main():
+            return await asyncio.gather(*(group.ado('k', fetch, i) for i in range(5)))
+
+        self.assertEqual(asyncio.run(main()), [[0]] * 5)
+        self.assertEqual(calls, [0])
+
+    def test_cancelling_the_async_leader_does_not_cancel_followers(self):
+        group = SingleFlight('test')
+        calls = []
+
+        async def fetch():
+            calls.append(1)
+            await asyncio.sleep(0.05)
+            return 'verdict'
+
+        async def main():
+            leader = asyncio.create_task(group.ado('k', fetch))
+            await asyncio.sleep(0)
+            follower = asyncio.create_task(group.ado('k', fetch))
+            await asyncio.sleep(0.01)
+            leader.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await leader
+            return await follower
+
+        self.assertEqual(asyncio.run(main()), 'verdict')
+        self.assertEqual(calls, [1])
+
+    def test_call_is_cancelled_once_every_caller_is(self):
+        group = SingleFlight('test')
+        cancelled = []
+
+        async def fetch(value):
+            try:
+                await asyncio.sleep(1)
+            except asyncio.CancelledError:
+                cancelled.append(value)
+                raise
+            return value
+
+        async def main():
+            callers = [asyncio.create_task(group.ado('k', fetch, 'first')) for _ in range(2)]
+            await asyncio.sleep(0.01)
+            for caller in callers:
+                caller.cancel()
+            await asyncio.gather(*callers, return_exceptions=True)
+            await asyncio.sleep(0)
+            # A new caller starts a fresh call instead of joining the cancelled one
+            return await asyncio.wait_for(group.ado('k', asyncio.sleep, 0, 'second'), 1)
+
+        self.assertEqual(asyncio.run(main()), 'second')
+        self.assertEqual(cancelled, ['first'])
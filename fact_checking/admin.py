@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import FactCheckResult
+from .models import ClaimReview, FactCheckResult
 
 class FactCheckResultAdmin(admin.ModelAdmin):
     """
@@ -11,3 +11,19 @@ class FactCheckResultAdmin(admin.ModelAdmin):
     ordering = ('-created_at',)
 
 admin.site.register(FactCheckResult, FactCheckResultAdmin)
+
+
+class ClaimReviewAdmin(admin.ModelAdmin):
+    """
+    Admin interface for imported ClaimReviews in the local fact-check index.
+    """
+    list_display = ('claim_text', 'textual_rating', 'publisher_name', 'review_date')
+    search_fields = ('claim_text', 'publisher_name')
+    list_filter = ('publisher_name',)
+    exclude = ('review_key', 'length')
+
+    def has_add_permission(self, request):
+        # Reviews are added by `import_claimreviews`, which also indexes them
+        return False
+
+admin.site.register(ClaimReview, ClaimReviewAdmin)
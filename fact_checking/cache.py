@@ -0,0 +1,240 @@
+"""
+Cache for Google Fact Check lookups.
+
+Entries are keyed on the normalized claim (case, whitespace and punctuation folded)
+so repeat claims cost no network round trip. Definite ratings stay fresh for TTL
+seconds; "Unverified" (no review found yet) is cached for the shorter NEGATIVE_TTL
+so newly published reviews are picked up. Entries live in the database or in Redis.
+
+Entries scored under another scoring version (the rating lexicon and publisher weights,
+see fact_checking.scoring) count as misses, so a verdict cached before a lexicon change
+is fetched and scored again instead of outliving `rescore_fact_checks`.
+"""
+import hashlib
+import json
+import logging
+import re
+import threading
+import unicodedata
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+from .scoring import get_scoring_engine
+
+KEY_PREFIX = 'fact_checking:claim:'
+STATS_KEY = 'fact_checking:claim_stats'
+
+logger = logging.getLogger(__name__)
+
+_punctuation_re = re.compile(r'[^\w\s]+')
+
+
+def normalize_claim(claim):
+    """
+    Fold case, Unicode forms, punctuation and runs of whitespace so trivially
+    different spellings of a claim share an entry.
+    """
+    claim = unicodedata.normalize('NFKC', claim or '').casefold()
+    return ' '.join(_punctuation_re.sub(' ', claim).split())
+
+
+def make_claim_cache_key(claim):
+    return hashlib.sha256(normalize_claim(claim).encode('utf-8')).hexdigest()
+
+
+def is_negative_result(result):
+    return (result.get('textual_rating') or 'Unverified').lower() == 'unverified'
+
+
+def is_current_result(result):
+    """
+    False when the result was scored under an older lexicon or publisher weights.
+    Results that were never scored (no scoring version, e.g. local index answers) don't
+    go stale this way.
+    """
+    version = (result.get('evidence') or {}).get('scoring_version')
+    return version is None or version == get_scoring_engine().version
+
+
+class FactCheckCache:
+    """
+    Base cache: counts hits (positive and negative) and misses around the
+    backend-specific _get/_set. Backend failures are logged and treated as misses.
+    """
+    backend_name = 'none'
+
+    def __init__(self, ttl=86400, negative_ttl=3600):
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self._hits = 0
+        self._negative_hits = 0
+        self._misses = 0
+        self._stats_lock = threading.Lock()
+
+    def get(self, claim):
+        try:
+            value = self._get(make_claim_cache_key(claim))
+        except Exception as e:
+            logger.warning("Fact check cache lookup failed: %s", e)
+            return None
+        if value is not None and not is_current_result(value):
+            value = None
+        try:
+            self._record('misses' if value is None else 'negative_hits' if is_negative_result(value) else 'hits')
+        except Exception as e:
+            logger.warning("Fact check cache stats update failed: %s", e)
+        return value
+
+    def set(self, claim, result):
+        """
+        Store a lookup result. Errors are never cached; "Unverified" uses the negative TTL.
+        """
+        if (result.get('textual_rating') or '').lower() == 'error':
+            return
+        ttl = self.negative_ttl if is_negative_result(result) else self.ttl
+        if ttl <= 0:
+            return
+        try:
+            self._set(make_claim_cache_key(claim), result, ttl)
+        except Exception as e:
+            logger.warning("Fact check cache write failed: %s", e)
+
+    def clear(self):
+        pass
+
+    def purge_expired(self):
+        return 0
+
+    def _get(self, key):
+        return None
+
+    def _set(self, key, value, ttl):
+        pass
+
+    def _record(self, field):
+        with self._stats_lock:
+            setattr(self, f'_{field}', getattr(self, f'_{field}') + 1)
+
+    def _counts(self):
+        return self._hits, self._negative_hits, self._misses
+
+    def stats(self):
+        hits, negative_hits, misses = self._counts()
+        lookups = hits + negative_hits + misses
+        return {
+            'backend': self.backend_name,
+            'hits': hits,
+            'negative_hits': negative_hits,
+            'misses': misses,
+            'hit_rate': round((hits + negative_hits) / lookups, 4) if lookups else 0.0,
+            'ttl': self.ttl,
+            'negative_ttl': self.negative_ttl,
+        }
+
+
+class DatabaseFactCheckCache(FactCheckCache):
+    """
+    Cache stored in the FactCheckCacheEntry table, shared by every worker without
+    extra infrastructure. Hit/miss counters are per process.
+    """
+    backend_name = 'db'
+
+    def _get(self, key):
+        from .models import FactCheckCacheEntry
+        return (
+            FactCheckCacheEntry.objects.filter(key=key, expires_at__gt=timezone.now())
+            .values_list('result', flat=True).first()
+        )
+
+    def _set(self, key, value, ttl):
+        from .models import FactCheckCacheEntry
+        FactCheckCacheEntry.objects.update_or_create(
+            key=key, defaults={'result': value, 'expires_at': timezone.now() + timedelta(seconds=ttl)}
+        )
+
+    def clear(self):
+        from .models import FactCheckCacheEntry
+        FactCheckCacheEntry.objects.all().delete()
+
+    def purge_expired(self):
+        from .models import FactCheckCacheEntry
+        deleted, _ = FactCheckCacheEntry.objects.filter(expires_at__lte=timezone.now()).delete()
+        return deleted
+
+    def stats(self):
+        from .models import FactCheckCacheEntry
+        stats = super().stats()
+        try:
+            stats['size'] = FactCheckCacheEntry.objects.filter(expires_at__gt=timezone.now()).count()
+        except Exception:
+            pass
+        return stats
+
+
+class RedisFactCheckCache(FactCheckCache):
+    """
+    Cache shared by every worker. Expiry is handled by Redis; counters are kept in a
+    Redis hash so they cover all processes.
+    """
+    backend_name = 'redis'
+
+    def __init__(self, ttl=86400, negative_ttl=3600, url=None):
+        super().__init__(ttl, negative_ttl)
+        self.url = url
+
+    @property
+    def client(self):
+        from dailynews_backend.redis_client import get_redis_client
+        return get_redis_client(self.url)
+
+    def _get(self, key):
+        raw = self.client.get(KEY_PREFIX + key)
+        return json.loads(raw) if raw is not None else None
+
+    def _set(self, key, value, ttl):
+        self.client.set(KEY_PREFIX + key, json.dumps(value), ex=ttl)
+
+    def _record(self, field):
+        self.client.hincrby(STATS_KEY, field, 1)
+
+    def _counts(self):
+        counts = self.client.hgetall(STATS_KEY)
+        return int(counts.get(b'hits', 0)), int(counts.get(b'negative_hits', 0)), int(counts.get(b'misses', 0))
+
+    def clear(self):
+        for key in self.client.scan_iter(match=KEY_PREFIX + '*'):
+            self.client.delete(key)
+        self.client.delete(STATS_KEY)
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def build_fact_check_cache(config=None):
+    if config is None:
+        config = getattr(settings, 'FACT_CHECK_CACHE', {})
+    backend = config.get('BACKEND', 'db')
+    ttl = config.get('TTL', 86400)
+    negative_ttl = config.get('NEGATIVE_TTL', 3600)
+    if backend == 'db':
+        return DatabaseFactCheckCache(ttl=ttl, negative_ttl=negative_ttl)
+    if backend == 'redis':
+        return RedisFactCheckCache(ttl=ttl, negative_ttl=negative_ttl, url=config.get('REDIS_URL'))
+    if backend == 'none':
+        return FactCheckCache(ttl=ttl, negative_ttl=negative_ttl)
+    raise ValueError(f"Unknown FACT_CHECK_CACHE backend: {backend}")
+
+
+def get_fact_check_cache():
+    """
+    Return the process-wide fact check cache configured by settings.FACT_CHECK_CACHE.
+    """
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = build_fact_check_cache()
+    return _cache
@@ -0,0 +1,116 @@
+"""
+Readers for ClaimReview dumps.
+
+Accepted inputs, as a JSON document or NDJSON (one object per line):
+  - schema.org ClaimReview objects (with claimReviewed, reviewRating, itemReviewed, author)
+  - DataFeed documents ({"dataFeedElement": [{"item": [ClaimReview, ...]}, ...]})
+  - Google Fact Check API responses or claims ({"claims": [...]} / {"text", "claimReview": [...]})
+
+Every review is normalized to a dict of ClaimReview model fields.
+"""
+import json
+
+
+def _text(value, limit=None):
+    if isinstance(value, list):
+        value = value[0] if value else ''
+    if isinstance(value, dict):
+        value = value.get('name') or value.get('url') or ''
+    value = str(value or '').strip()
+    return value[:limit] if limit else value
+
+
+def _from_schema_org(item):
+    rating = item.get('reviewRating') or {}
+    if isinstance(rating, list):
+        rating = rating[0] if rating else {}
+    item_reviewed = item.get('itemReviewed') or {}
+    if isinstance(item_reviewed, list):
+        item_reviewed = item_reviewed[0] if item_reviewed else {}
+    author = item.get('author') or {}
+    if isinstance(author, list):
+        author = author[0] if author else {}
+    return {
+        'claim_text': _text(item.get('claimReviewed')),
+        'claimant': _text(item_reviewed.get('author'), 255),
+        'claim_date': _text(item_reviewed.get('datePublished'), 40),
+        'textual_rating': _text(rating.get('alternateName') or rating.get('name'), 255),
+        'review_url': _text(item.get('url'), 1000),
+        'review_title': _text(item.get('name') or item.get('headline')),
+        'review_date': _text(item.get('datePublished'), 40),
+        'publisher_name': _text(author.get('name'), 255),
+        'publisher_site': _text(author.get('url'), 255),
+        'language': _text(item.get('inLanguage'), 16),
+    }
+
+
+def _from_api_claim(claim):
+    for review in claim.get('claimReview') or []:
+        publisher = review.get('publisher') or {}
+        yield {
+            'claim_text': _text(claim.get('text')),
+            'claimant': _text(claim.get('claimant'), 255),
+            'claim_date': _text(claim.get('claimDate'), 40),
+            'textual_rating': _text(review.get('textualRating'), 255),
+            'review_url': _text(review.get('url'), 1000),
+            'review_title': _text(review.get('title')),
+            'review_date': _text(review.get('reviewDate'), 40),
+            'publisher_name': _text(publisher.get('name'), 255),
+            'publisher_site': _text(publisher.get('site'), 255),
+            'language': _text(review.get('languageCode'), 16),
+        }
+
+
+def iter_reviews(obj):
+    """
+    Yield normalized reviews from any supported JSON value. Reviews without claim
+    text or a rating are skipped.
+    """
+    if isinstance(obj, list):
+        for item in obj:
+            yield from iter_reviews(item)
+        return
+    if not isinstance(obj, dict):
+        return
+    if 'dataFeedElement' in obj:
+        for element in obj['dataFeedElement'] or []:
+            yield from iter_reviews(element.get('item') if isinstance(element, dict) else None)
+        return
+    if 'claims' in obj:
+        yield from iter_reviews(obj['claims'])
+        return
+    if 'claimReview' in obj:
+        reviews = _from_api_claim(obj)
+    elif obj.get('@type') == 'ClaimReview' or 'claimReviewed' in obj:
+        reviews = [_from_schema_org(obj)]
+    else:
+        return
+    for review in reviews:
+        if review['claim_text'] and review['textual_rating']:
+            yield review
+
+
+def iter_file_reviews(path):
+    """
+    Stream reviews from a JSON or NDJSON file. NDJSON is read line by line, so large
+    dumps are never loaded whole.
+    """
+    with open(path, encoding='utf-8') as handle:
+        first = handle.read(1)
+        while first and first.isspace():
+            first = handle.read(1)
+        handle.seek(0)
+        if path.endswith(('.ndjson', '.jsonl')) or first not in ('[', '{'):
+            lines = handle
+        else:
+            try:
+                yield from iter_reviews(json.load(handle))
+                return
+            except json.JSONDecodeError:
+                # A '{' file that isn't one JSON document is NDJSON
+                handle.seek(0)
+                lines = handle
+        for line in lines:
+            line = line.strip()
+            if line:
+                yield from iter_reviews(json.loads(line))
@@ -0,0 +1,93 @@
+"""
+Claim extraction: pick the check-worthy sentences out of an article so each can be
+fact-checked on its own instead of sending the whole body as one query.
+
+A sentence is check-worthy when it makes a concrete, verifiable statement: it
+mentions numbers, dates, people, organisations or places, or uses reporting and
+statistical language. Questions, very short or very long sentences and first-person
+opinions are skipped.
+
+Names and dates are recognised by their capitalisation rather than by NER, so claims
+only need the cheap sentence-boundary pass ('sentences' task) and the pipeline can
+start fact-checking them while the entity pass for tagging is still running.
+"""
+import re
+
+from django.conf import settings
+
+MIN_TOKENS = 6
+MAX_TOKENS = 60
+
+MAX_NAMES = 2  # Capitalised words counted per sentence, so lists of names don't dominate
+
+CLAIM_CUES = {
+    'according', 'announced', 'reported', 'said', 'says', 'confirmed', 'found', 'shows',
+    'showed', 'percent', 'million', 'billion', 'increase', 'increased', 'decrease',
+    'decreased', 'rose', 'fell', 'record', 'study', 'survey', 'data', 'law', 'banned',
+    'approved', 'elected', 'killed', 'died', 'cure', 'causes', 'caused', 'first', 'largest',
+}
+
+OPINION_OPENERS = ('i think', 'i believe', 'in my opinion', 'we think', 'we believe', 'imagine', 'perhaps')
+
+_sentence_re = re.compile(r'(?<=[.!?])\s+')
+
+
+def get_claim_check_config():
+    config = {
+        'MAX_CLAIMS': 5,
+        'CONCURRENCY': 4,
+    }
+    config.update(getattr(settings, 'FACT_CHECK_CLAIMS', {}))
+    return config
+
+
+def _sentences(text):
+    """
+    Sentence spans of text: from its TextAnalysis when one is passed, else from the
+    sentence-only pipeline, or a punctuation split when there are no sentence boundaries.
+    """
+    from content_processing.analysis import as_analysis
+    from content_processing.nlp import get_nlp
+
+    analysis = as_analysis(text, task='sentences')
+    if analysis.has_sentences:
+        return analysis.sentences
+    nlp = get_nlp(analysis.task)
+    return [nlp(sentence) for sentence in _sentence_re.split(analysis.text) if sentence.strip()]
+
+
+def score_sentence(sentence):
+    """
+    Check-worthiness score for a spaCy sentence span (0 means not worth checking).
+    """
+    text = sentence.text.strip()
+    words = [token for token in sentence if not token.is_punct and not token.is_space]
+    if not MIN_TOKENS <= len(words) <= MAX_TOKENS or text.endswith('?'):
+        return 0
+    if text.lower().startswith(OPINION_OPENERS):
+        return 0
+    # Capitalised words past the first are names, places, organisations or dates.
+    names = {token.lower_ for token in words[1:] if token.is_title and not token.is_stop}
+    score = 0
+    score += 2 * min(MAX_NAMES, len(names))
+    score += 2 if any(token.like_num for token in words) else 0
+    score += sum(1 for token in words if token.lower_ in CLAIM_CUES)
+    return score
+
+
+def extract_claims(text, max_claims=None):
+    """
+    Return up to max_claims check-worthy sentences from text (a string or a
+    TextAnalysis), in their original order.
+    Falls back to the first sentence when nothing qualifies.
+    """
+    if max_claims is None:
+        max_claims = get_claim_check_config()['MAX_CLAIMS']
+    sentences = [sentence for sentence in _sentences(text) if sentence.text.strip()]
+    if not sentences:
+        return []
+    scored = [(score_sentence(sentence), index) for index, sentence in enumerate(sentences)]
+    best = sorted((item for item in scored if item[0] > 0), key=lambda item: (-item[0], item[1]))[:max_claims]
+    if not best:
+        return [sentences[0].text.strip()]
+    return [sentences[index].text.strip() for _, index in sorted(best, key=lambda item: item[1])]
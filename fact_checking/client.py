@@ -0,0 +1,369 @@
+"""
+HTTP client for the Google Fact Check Tools claims:search API.
+
+The client keeps pooled keep-alive connections (a requests.Session for sync callers,
+an httpx.AsyncClient per event loop for async ones), applies connect/read timeouts,
+retries 429/5xx and connection errors a bounded number of times with jittered
+backoff, and trips a circuit breaker after repeated 429/5xx or connection failures so
+callers fail fast while the upstream is unhealthy (other 4xx responses don't count). Latency and error counters are kept for metrics.
+"""
+import asyncio
+import logging
+import os
+import random
+import threading
+import time
+import weakref
+from collections import deque
+
+import httpx
+import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+class FactCheckClientError(Exception):
+    """Raised when a claims:search request fails after all retries."""
+
+
+class CircuitOpenError(FactCheckClientError):
+    """Raised without making a request while the circuit breaker is open."""
+
+
+def get_client_config():
+    config = {
+        'ENDPOINT': getattr(settings, 'GOOGLE_FACT_CHECK_ENDPOINT',
+                            'https://factchecktools.googleapis.com/v1alpha1/claims:search'),
+        'TIMEOUT': 10.0,
+        'CONNECT_TIMEOUT': 3.0,
+        'MAX_CONNECTIONS': 20,
+        'MAX_RETRIES': 2,
+        'BACKOFF_BASE': 0.5,
+        'BACKOFF_MAX': 8.0,
+        'FAILURE_THRESHOLD': 5,
+        'RESET_TIMEOUT': 30.0,
+    }
+    config.update(getattr(settings, 'FACT_CHECK_CLIENT', {}))
+    return config
+
+
+class CircuitBreaker:
+    """
+    Opens after `failure_threshold` consecutive failures and rejects calls for
+    `reset_timeout` seconds. After that a single probe call is let through
+    (half-open): success closes the circuit, failure opens it again. A probe that
+    ends without either (cancelled, or rejected as a client error) is released so
+    the next call can probe.
+    """
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, failure_threshold=5, reset_timeout=30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probing = False
+        self._probe = None
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        with self._lock:
+            if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+                return self.HALF_OPEN
+            return self._state
+
+    def allow(self):
+        """
+        Return a truthy ticket if the call may go ahead (pass it to release()), else False.
+        """
+        with self._lock:
+            if self._state == self.CLOSED:
+                return True
+            if self._state == self.OPEN and time.monotonic() - self._opened_at < self.reset_timeout:
+                return False
+            # Half-open: only one probe at a time
+            if self._probing:
+                return False
+            self._state = self.HALF_OPEN
+            self._probing = True
+            self._probe = object()
+            return self._probe
+
+    def release(self, ticket):
+        """
+        End a call; if it was the half-open probe and recorded no outcome, let another probe through.
+        """
+        with self._lock:
+            if ticket is not True and ticket is self._probe:
+                self._probing = False
+                self._probe = None
+
+    def record_success(self):
+        with self._lock:
+            self._state = self.CLOSED
+            self._failures = 0
+            self._probing = False
+            self._probe = None
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            self._probing = False
+            self._probe = None
+            if self._state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                if self._state != self.OPEN:
+                    logger.warning("Google Fact Check circuit opened after %d failure(s)", self._failures)
+                self._state = self.OPEN
+                self._opened_at = time.monotonic()
+
+
+class ClientMetrics:
+    def __init__(self, window=1000):
+        self.requests = 0
+        self.successes = 0
+        self.failures = 0
+        self.retries = 0
+        self.short_circuited = 0
+        self._latencies = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def incr(self, field):
+        with self._lock:
+            setattr(self, field, getattr(self, field) + 1)
+
+    def record_latency(self, seconds):
+        with self._lock:
+            self._latencies.append(seconds)
+
+    def as_dict(self):
+        with self._lock:
+            latencies = sorted(self._latencies)
+            stats = {
+                'requests': self.requests,
+                'successes': self.successes,
+                'failures': self.failures,
+                'retries': self.retries,
+                'short_circuited': self.short_circuited,
+                'error_rate': round(self.failures / self.requests, 4) if self.requests else 0.0,
+            }
+        for pct in (50, 95, 99):
+            stats[f'p{pct}_latency'] = (
+                round(latencies[min(len(latencies) - 1, int(len(latencies) * pct / 100.0))], 4) if latencies else 0.0
+            )
+        return stats
+
+
+class GoogleFactCheckClient:
+    """
+    Pooled, retrying, circuit-broken client for claims:search.
+    search() and asearch() return the decoded JSON response or raise FactCheckClientError.
+    """
+
+    def __init__(self, api_key=None, endpoint=None, timeout=10.0, connect_timeout=3.0, max_connections=20,
+                 max_retries=2, backoff_base=0.5, backoff_max=8.0, failure_threshold=5, reset_timeout=30.0):
+        self.api_key = api_key
+        self.endpoint = endpoint
+        self.timeout = timeout
+        self.connect_timeout = connect_timeout
+        self.max_connections = max_connections
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.breaker = CircuitBreaker(failure_threshold, reset_timeout)
+        self.metrics = ClientMetrics()
+        self._session = None
+        self._session_pid = None
+        self._async_clients = weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+
+    # -- clients ---------------------------------------------------------------
+
+    @property
+    def session(self):
+        """
+        Keep-alive session shared by all threads. Recreated after a fork so workers
+        never share sockets with their parent.
+        """
+        pid = os.getpid()
+        if self._session is None or self._session_pid != pid:
+            with self._lock:
+                if self._session is None or self._session_pid != pid:
+                    session = requests.Session()
+                    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.max_connections)
+                    session.mount('https://', adapter)
+                    session.mount('http://', adapter)
+                    self._session = session
+                    self._session_pid = pid
+        return self._session
+
+    @property
+    def async_client(self):
+        """
+        Connection-pooled AsyncClient for the running event loop (one per loop).
+        """
+        loop = asyncio.get_running_loop()
+        client = self._async_clients.get(loop)
+        if client is None:
+            client = httpx.AsyncClient(
+                timeout=httpx.Timeout(self.timeout, connect=self.connect_timeout),
+                limits=httpx.Limits(max_connections=self.max_connections,
+                                    max_keepalive_connections=self.max_connections),
+            )
+            self._async_clients[loop] = client
+        return client
+
+    def close(self):
+        if self._session is not None:
+            self._session.close()
+            self._session = None
+
+    # -- retries ---------------------------------------------------------------
+
+    def backoff_delay(self, attempt, retry_after=None):
+        """
+        Exponential backoff with full jitter, honouring Retry-After when the server sends it.
+        """
+        if retry_after:
+            try:
+                return min(float(retry_after), self.backoff_max)
+            except ValueError:
+                pass
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    def _params(self, claim):
+        return {'query': claim, 'key': self.api_key}
+
+    def _before_request(self):
+        ticket = self.breaker.allow()
+        if not ticket:
+            self.metrics.incr('short_circuited')
+            raise CircuitOpenError("Google Fact Check API circuit is open.")
+        self.metrics.incr('requests')
+        return ticket
+
+    def _succeeded(self, started):
+        self.metrics.record_latency(time.monotonic() - started)
+        self.metrics.incr('successes')
+        self.breaker.record_success()
+
+    def _failed(self, started, message):
+        self.metrics.record_latency(time.monotonic() - started)
+        self.metrics.incr('failures')
+        self.breaker.record_failure()
+        return FactCheckClientError(message)
+
+    def _rejected(self, started, message):
+        """
+        A client error (bad query, bad key): the upstream is healthy, so the breaker isn't told.
+        """
+        self.metrics.record_latency(time.monotonic() - started)
+        self.metrics.incr('failures')
+        return FactCheckClientError(message)
+
+    # -- requests --------------------------------------------------------------
+
+    def search(self, claim):
+        ticket = self._before_request()
+        try:
+            return self._search(claim)
+        finally:
+            self.breaker.release(ticket)
+
+    def _search(self, claim):
+        started = time.monotonic()
+        attempt = 0
+        while True:
+            try:
+                response = self.session.get(
+                    self.endpoint, params=self._params(claim), timeout=(self.connect_timeout, self.timeout)
+                )
+            except requests.RequestException as e:
+                if attempt >= self.max_retries:
+                    raise self._failed(started, f"Google Fact Check request failed: {e}") from e
+                delay = self.backoff_delay(attempt)
+            else:
+                if response.status_code in RETRYABLE_STATUS_CODES and attempt < self.max_retries:
+                    delay = self.backoff_delay(attempt, response.headers.get('retry-after'))
+                elif response.status_code in RETRYABLE_STATUS_CODES or response.status_code >= 500:
+                    raise self._failed(started, f"Google Fact Check request failed with HTTP {response.status_code}")
+                elif response.status_code >= 400:
+                    raise self._rejected(started, f"Google Fact Check request rejected with HTTP {response.status_code}")
+                else:
+                    self._succeeded(started)
+                    return response.json()
+            self.metrics.incr('retries')
+            time.sleep(delay)
+            attempt += 1
+
+    async def asearch(self, claim):
+        ticket = self._before_request()
+        try:
+            return await self._asearch(claim)
+        finally:
+            # Also runs when the lookup is cancelled mid-probe
+            self.breaker.release(ticket)
+
+    async def _asearch(self, claim):
+        started = time.monotonic()
+        attempt = 0
+        while True:
+            try:
+                response = await self.async_client.get(self.endpoint, params=self._params(claim))
+            except httpx.TransportError as e:
+                if attempt >= self.max_retries:
+                    raise self._failed(started, f"Google Fact Check request failed: {e}") from e
+                delay = self.backoff_delay(attempt)
+            else:
+                if response.status_code in RETRYABLE_STATUS_CODES and attempt < self.max_retries:
+                    delay = self.backoff_delay(attempt, response.headers.get('retry-after'))
+                elif response.status_code in RETRYABLE_STATUS_CODES or response.status_code >= 500:
+                    raise self._failed(started, f"Google Fact Check request failed with HTTP {response.status_code}")
+                elif response.status_code >= 400:
+                    raise self._rejected(started, f"Google Fact Check request rejected with HTTP {response.status_code}")
+                else:
+                    self._succeeded(started)
+                    return response.json()
+            self.metrics.incr('retries')
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    def stats(self):
+        stats = self.metrics.as_dict()
+        stats['circuit'] = self.breaker.state
+        return stats
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_fact_check_client():
+    """
+    Return the process-wide client configured by settings.FACT_CHECK_CLIENT.
+    """
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                config = get_client_config()
+                _client = GoogleFactCheckClient(
+                    api_key=settings.GOOGLE_FACT_CHECK_API_KEY,
+                    endpoint=config['ENDPOINT'],
+                    timeout=config['TIMEOUT'],
+                    connect_timeout=config['CONNECT_TIMEOUT'],
+                    max_connections=config['MAX_CONNECTIONS'],
+                    max_retries=config['MAX_RETRIES'],
+                    backoff_base=config['BACKOFF_BASE'],
+                    backoff_max=config['BACKOFF_MAX'],
+                    failure_threshold=config['FAILURE_THRESHOLD'],
+                    reset_timeout=config['RESET_TIMEOUT'],
+                )
+    return _client
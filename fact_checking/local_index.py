@@ -0,0 +1,271 @@
+"""
+Local ClaimReview index.
+
+Imported ClaimReviews are tokenized into an inverted index (ClaimReviewTerm rows).
+A lookup ranks candidate reviews with BM25 over the query's terms and accepts the
+best one only if it covers most of the query's IDF weight, so answers come from
+reviews of the same claim rather than loosely related ones. Scoring is aggregated in
+the database, so only the top candidates come back rather than every posting of the
+query's terms. Lookups take a couple of indexed queries and keep working when the
+Google API is throttled or down.
+"""
+import hashlib
+import logging
+import math
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Avg, Case, Count, ExpressionWrapper, F, FloatField, Sum, Value, When
+from django.utils import timezone
+
+from .cache import normalize_claim
+from .models import ClaimReview, ClaimReviewTerm
+
+logger = logging.getLogger(__name__)
+
+K1 = 1.2
+B = 0.75
+
+STOPWORDS = frozenset("""
+a an and are as at be been but by for from has have he her his i if in into is it its of on or
+our she so that the their them there they this to was we were what when which who will with
+would you your not no do does did than then these those about after before over under just
+""".split())
+
+
+def get_local_index_config():
+    config = {
+        'ENABLED': True,
+        'MIN_TERMS': 3,
+        'MIN_COVERAGE': 0.8,
+        'MIN_REVIEW_COVERAGE': 0.5,
+        'MAX_DF_RATIO': 0.25,
+        'MAX_CANDIDATES': 50,
+    }
+    config.update(getattr(settings, 'FACT_CHECK_LOCAL_INDEX', {}))
+    return config
+
+
+def tokenize(text):
+    """
+    Index terms of a claim: normalized words without stopwords or single characters.
+    """
+    return [term[:64] for term in normalize_claim(text).split() if len(term) > 1 and term not in STOPWORDS]
+
+
+def make_review_key(review_url, claim_text):
+    return hashlib.sha256(f"{review_url}\n{normalize_claim(claim_text)}".encode('utf-8')).hexdigest()
+
+
+# -- indexing ------------------------------------------------------------------
+
+def index_reviews(reviews):
+    """
+    Insert or update normalized review dicts (see fact_checking.claimreview) and their
+    postings. Reviews already in the index are updated in place; their postings only
+    change with their claim text, which is part of the key. Returns (created, updated).
+    """
+    by_key = {}
+    for review in reviews:
+        review = dict(review)
+        review['review_key'] = make_review_key(review.get('review_url', ''), review['claim_text'])
+        by_key[review['review_key']] = review
+    if not by_key:
+        return 0, 0
+
+    with transaction.atomic():
+        existing = {row.review_key: row for row in ClaimReview.objects.filter(review_key__in=list(by_key))}
+        updated = []
+        now = timezone.now()
+        for key, row in existing.items():
+            for field, value in by_key[key].items():
+                setattr(row, field, value)
+            row.imported_at = now  # bulk_update doesn't apply auto_now
+            updated.append(row)
+        fields = [field for field in by_key[next(iter(by_key))] if field != 'review_key'] + ['imported_at']
+        if updated:
+            ClaimReview.objects.bulk_update(updated, fields)
+
+        new_rows = []
+        term_counts = []
+        for key, review in by_key.items():
+            if key in existing:
+                continue
+            counts = Counter(tokenize(review['claim_text']))
+            new_rows.append(ClaimReview(length=sum(counts.values()), **review))
+            term_counts.append(counts)
+        created = ClaimReview.objects.bulk_create(new_rows)
+        ClaimReviewTerm.objects.bulk_create(
+            [
+                ClaimReviewTerm(term=term, review=row, frequency=frequency)
+                for row, counts in zip(created, term_counts)
+                for term, frequency in counts.items()
+            ],
+            batch_size=2000,
+        )
+    _corpus_stats.invalidate()
+    return len(created), len(updated)
+
+
+class _CorpusStats:
+    """
+    Document count and average length, cached briefly since BM25 needs them on every lookup.
+    """
+    TTL = 60.0
+
+    def __init__(self):
+        self._value = None
+        self._expires = 0.0
+        self._lock = threading.Lock()
+
+    def get(self):
+        with self._lock:
+            if self._value is None or time.monotonic() > self._expires:
+                stats = ClaimReview.objects.aggregate(count=Count('id'), avg_length=Avg('length'))
+                self._value = (stats['count'] or 0, float(stats['avg_length'] or 0.0))
+                self._expires = time.monotonic() + self.TTL
+            return self._value
+
+    def invalidate(self):
+        with self._lock:
+            self._value = None
+
+
+_corpus_stats = _CorpusStats()
+
+
+# -- search --------------------------------------------------------------------
+
+def search(claim, limit=5):
+    """
+    Rank indexed reviews against claim with BM25. Returns a list of
+    (ClaimReview, score, coverage, review_coverage) sorted by score, where coverage is
+    the share of the query's IDF weight found in the review's claim text and
+    review_coverage the share of the review's terms that appear in the query.
+    """
+    config = get_local_index_config()
+    query_terms = set(tokenize(claim))
+    if not query_terms:
+        return []
+    doc_count, avg_length = _corpus_stats.get()
+    if not doc_count:
+        return []
+
+    document_frequency = dict(
+        ClaimReviewTerm.objects.filter(term__in=query_terms).values('term').annotate(df=Count('id')).values_list('term', 'df')
+    )
+    idf = {
+        term: math.log(1 + (doc_count - document_frequency.get(term, 0) + 0.5) / (document_frequency.get(term, 0) + 0.5))
+        for term in query_terms
+    }
+    total_weight = sum(idf.values())
+    # Very common terms only add noise and large posting lists; they still count towards total_weight.
+    searchable = [term for term, df in document_frequency.items() if df <= max(1, config['MAX_DF_RATIO'] * doc_count)]
+    if not searchable:
+        return []
+
+    weight = Case(*[When(term=term, then=Value(idf[term])) for term in searchable], output_field=FloatField())
+    norm = Value(K1 * (1 - B)) + Value(K1 * B / avg_length) * F('review__length') if avg_length else Value(K1)
+    term_score = ExpressionWrapper(
+        weight * F('frequency') * Value(K1 + 1) / (F('frequency') + norm), output_field=FloatField()
+    )
+    top = list(
+        ClaimReviewTerm.objects.filter(term__in=searchable)
+        .values('review_id')
+        .annotate(score=Sum(term_score), matched_weight=Sum(weight), matched_terms=Sum('frequency'))
+        .order_by('-score', 'review_id')
+        .values_list('review_id', 'score', 'matched_weight', 'matched_terms')[:min(limit, config['MAX_CANDIDATES'])]
+    )
+    reviews = ClaimReview.objects.in_bulk([review_id for review_id, _, _, _ in top])
+    return [
+        (
+            reviews[review_id],
+            score,
+            matched_weight / total_weight,
+            matched_terms / max(1, reviews[review_id].length),
+        )
+        for review_id, score, matched_weight, matched_terms in top if review_id in reviews
+    ]
+
+
+def lookup_claim(claim):
+    """
+    Return the best local ClaimReview for claim if it is a confident match, else None.
+    Claims with fewer than MIN_TERMS index terms are too vague to match locally.
+    """
+    config = get_local_index_config()
+    if not config['ENABLED'] or len(set(tokenize(claim))) < config['MIN_TERMS']:
+        return None
+    try:
+        for review, score, coverage, review_coverage in search(claim, limit=5):
+            if coverage >= config['MIN_COVERAGE'] and review_coverage >= config['MIN_REVIEW_COVERAGE']:
+                _stats.incr('hits')
+                return review
+    except Exception as e:
+        logger.warning("Local ClaimReview lookup failed: %s", e)
+    _stats.incr('misses')
+    return None
+
+
+def lookup_local_result(claim):
+    """
+    Answer claim from the local index in the same shape as a live lookup, or None.
+    """
+    from .utils import parse_fact_check_response
+
+    review = lookup_claim(claim)
+    if review is None:
+        return None
+    return parse_fact_check_response({'claims': [review_as_api_claim(review)]})
+
+
+class _LookupStats:
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def incr(self, field):
+        with self._lock:
+            setattr(self, field, getattr(self, field) + 1)
+
+    def as_dict(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+
+_stats = _LookupStats()
+
+
+def local_index_stats():
+    stats = _stats.as_dict()
+    stats['reviews'] = _corpus_stats.get()[0]
+    return stats
+
+
+def review_as_api_claim(review):
+    """
+    Shape a ClaimReview like one entry of the claims:search response so it goes
+    through the same parsing as live results.
+    """
+    return {
+        'text': review.claim_text,
+        'claimant': review.claimant,
+        'claimDate': review.claim_date,
+        'claimReview': [{
+            'publisher': {'name': review.publisher_name or 'Unknown Source', 'site': review.publisher_site},
+            'url': review.review_url,
+            'title': review.review_title,
+            'reviewDate': review.review_date,
+            'textualRating': review.textual_rating,
+            'languageCode': review.language,
+        }],
+    }
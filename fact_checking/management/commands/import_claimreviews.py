@@ -0,0 +1,40 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from fact_checking.claimreview import iter_file_reviews
+from fact_checking.local_index import index_reviews
+
+
+class Command(BaseCommand):
+    help = ("Import ClaimReview dumps (JSON, NDJSON or DataFeed) into the local fact-check index. "
+            "Re-importing a file updates existing reviews and only indexes new ones.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('paths', nargs='+', help="ClaimReview dump files.")
+        parser.add_argument('--batch-size', type=int, default=500, help="Reviews written per transaction.")
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        total_created = total_updated = 0
+        started = time.monotonic()
+        for path in options['paths']:
+            batch = []
+            try:
+                for review in iter_file_reviews(path):
+                    batch.append(review)
+                    if len(batch) >= batch_size:
+                        created, updated = index_reviews(batch)
+                        total_created += created
+                        total_updated += updated
+                        batch = []
+                        self.stdout.write(f"[CLAIMREVIEW] {path}: {total_created} new, {total_updated} updated so far")
+                if batch:
+                    created, updated = index_reviews(batch)
+                    total_created += created
+                    total_updated += updated
+            except (OSError, ValueError) as e:
+                raise CommandError(f"Failed to import {path}: {e}")
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {total_created} new and updated {total_updated} ClaimReviews in {time.monotonic() - started:.1f}s"
+        ))
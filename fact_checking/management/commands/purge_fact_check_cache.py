@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from fact_checking.cache import get_fact_check_cache
+
+
+class Command(BaseCommand):
+    help = "Delete expired fact check cache entries (or all entries with --all)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true', help="Clear the whole cache, not just expired entries.")
+
+    def handle(self, *args, **options):
+        cache = get_fact_check_cache()
+        if options['all']:
+            cache.clear()
+            self.stdout.write(self.style.SUCCESS(f"Cleared the {cache.backend_name} fact check cache"))
+            return
+        deleted = cache.purge_expired()
+        self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} expired fact check cache entries"))
@@ -0,0 +1,27 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from fact_checking.rescore import rescore_fact_checks
+from fact_checking.scoring import get_scoring_engine
+
+
+class Command(BaseCommand):
+    help = (
+        "Rescore stored fact-check verdicts from their saved reviews with the current rating lexicon "
+        "and publisher weights (FACT_CHECK_SCORING). No API calls are made."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help="Rows scored and updated per chunk.")
+        parser.add_argument('--dry-run', action='store_true', help="Count changed verdicts without saving them.")
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        stats = rescore_fact_checks(batch_size=options['batch_size'], dry_run=options['dry_run'], log=self.stdout.write)
+        elapsed = time.monotonic() - started
+        verb = "would change" if options['dry_run'] else "changed"
+        self.stdout.write(self.style.SUCCESS(
+            f"Scanned {stats['scanned']} verdict(s) in {elapsed:.1f}s with scoring {get_scoring_engine().version}, "
+            f"{verb} {stats['changed']}"
+        ))
@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+
+from fact_checking.reverify import TIERS, reverify_stale_fact_checks
+
+
+class Command(BaseCommand):
+    help = "Re-check stale fact-check verdicts, published and high-engagement articles first."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--limit', type=int, default=None, help="Maximum number of verdicts to re-check.")
+        parser.add_argument('--batch-size', type=int, default=None, help="Rows read per keyset page.")
+        parser.add_argument('--tier', choices=TIERS, action='append', help="Only run the given tier(s).")
+        parser.add_argument('--dry-run', action='store_true', help="Count due verdicts without re-checking them.")
+
+    def handle(self, *args, **options):
+        stats = reverify_stale_fact_checks(
+            limit=options['limit'],
+            tiers=options['tier'] or TIERS,
+            batch_size=options['batch_size'],
+            dry_run=options['dry_run'],
+            log=self.stdout.write,
+        )
+        verb = "would re-check" if options['dry_run'] else "re-checked"
+        self.stdout.write(self.style.SUCCESS(
+            f"Scanned {stats['scanned']}, {verb} {stats['rechecked']}, "
+            f"{stats['changed']} verdict(s) changed, {stats['failed']} failed"
+        ))
@@ -0,0 +1,34 @@
+# Generated by Django 5.1.4 on 2026-10-18 18:15
+
+import hashlib
+
+from django.db import migrations, models
+
+
+def backfill_claim_hashes(apps, schema_editor):
+    FactCheckResult = apps.get_model('fact_checking', 'FactCheckResult')
+    batch = []
+    for result in FactCheckResult.objects.filter(claim_hash='').only('id', 'claim').iterator(chunk_size=1000):
+        result.claim_hash = hashlib.sha256((result.claim or '').encode('utf-8')).hexdigest()
+        batch.append(result)
+        if len(batch) >= 1000:
+            FactCheckResult.objects.bulk_update(batch, ['claim_hash'])
+            batch = []
+    if batch:
+        FactCheckResult.objects.bulk_update(batch, ['claim_hash'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('fact_checking', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='factcheckresult',
+            name='claim_hash',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=64),
+        ),
+        migrations.RunPython(backfill_claim_hashes, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.1.4 on 2026-10-18 18:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('fact_checking', '0002_factcheckresult_claim_hash'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FactCheckCacheEntry',
+            fields=[
+                ('key', models.CharField(max_length=64, primary_key=True, serialize=False)),
+                ('result', models.JSONField(default=dict)),
+                ('expires_at', models.DateTimeField(db_index=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 5.1.4 on 2026-10-18 18:20
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('fact_checking', '0003_fact_check_cache'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ClaimReview',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('review_key', models.CharField(max_length=64, unique=True)),
+                ('claim_text', models.TextField()),
+                ('claimant', models.CharField(blank=True, max_length=255)),
+                ('claim_date', models.CharField(blank=True, max_length=40)),
+                ('textual_rating', models.CharField(blank=True, max_length=255)),
+                ('review_url', models.URLField(blank=True, max_length=1000)),
+                ('review_title', models.TextField(blank=True)),
+                ('review_date', models.CharField(blank=True, max_length=40)),
+                ('publisher_name', models.CharField(blank=True, max_length=255)),
+                ('publisher_site', models.CharField(blank=True, max_length=255)),
+                ('language', models.CharField(blank=True, max_length=16)),
+                ('length', models.IntegerField(default=0)),
+                ('imported_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ClaimReviewTerm',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('term', models.CharField(max_length=64)),
+                ('frequency', models.IntegerField(default=1)),
+                ('review', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='terms', to='fact_checking.claimreview')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['term'], name='fact_checki_term_cce5e5_idx')],
+                'unique_together': {('term', 'review')},
+            },
+        ),
+    ]
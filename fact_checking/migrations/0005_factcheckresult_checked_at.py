@@ -0,0 +1,47 @@
+# Generated by Django 5.1.4 on 2026-10-18 18:21
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+def backfill_checked_at(apps, schema_editor):
+    """
+    Existing verdicts were last checked when they were created. Walk the table in
+    primary-key ranges so no single statement touches every row.
+    """
+    FactCheckResult = apps.get_model('fact_checking', 'FactCheckResult')
+    last_id = 0
+    while True:
+        ids = list(
+            FactCheckResult.objects.filter(id__gt=last_id).order_by('id').values_list('id', flat=True)[:5000]
+        )
+        if not ids:
+            break
+        FactCheckResult.objects.filter(id__in=ids, checked_at__isnull=True).update(checked_at=models.F('created_at'))
+        last_id = ids[-1]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('fact_checking', '0004_claimreview_index'),
+    ]
+
+    operations = [
+        # Added without a database default so large tables aren't rewritten, then backfilled.
+        migrations.AddField(
+            model_name='factcheckresult',
+            name='checked_at',
+            field=models.DateTimeField(null=True),
+        ),
+        migrations.RunPython(backfill_checked_at, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='factcheckresult',
+            name='checked_at',
+            field=models.DateTimeField(default=django.utils.timezone.now, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='factcheckresult',
+            index=models.Index(fields=['checked_at', 'id'], name='fact_checki_checked_518b5c_idx'),
+        ),
+    ]
@@ -1,14 +1,94 @@
+import hashlib
+
 from django.db import models
+from django.utils import timezone
+
+
+def hash_claim(claim):
+    """
+    Return the SHA-256 hex digest used to look up fact checks by claim text.
+    """
+    return hashlib.sha256((claim or '').encode('utf-8')).hexdigest()
+
 
 class FactCheckResult(models.Model):
     """
     Model to store fact-checking results for a given claim using the Google Fact Check API.
     """
     claim = models.TextField()  # The claim or content being fact checked
+    claim_hash = models.CharField(max_length=64, db_index=True, editable=False, blank=True)  # SHA-256 of claim, set on save
     verification_score = models.FloatField(default=0.0)  # Composite score computed from factors
     textual_rating = models.CharField(max_length=50, blank=True)  # E.g., "TRUE", "FALSE", etc.
     evidence = models.JSONField(default=dict, null=True, blank=True)  # Stores evidence details (e.g., URLs, excerpts)
     created_at = models.DateTimeField(auto_now_add=True)  # Timestamp for when the fact check was performed
+    checked_at = models.DateTimeField(default=timezone.now, null=True)  # Last time the verdict was (re)verified
+
+    class Meta:
+        indexes = [models.Index(fields=['checked_at', 'id'])]
+
+    def save(self, *args, **kwargs):
+        self.claim_hash = hash_claim(self.claim)
+        super().save(*args, **kwargs)
+
+    @classmethod
+    def for_claim(cls, claim):
+        """
+        Return the fact check stored for this exact claim text, or None.
+        """
+        return cls.objects.filter(claim_hash=hash_claim(claim)).first()
 
     def __str__(self):
         return f"FactCheckResult ({self.textual_rating}) for: {self.claim[:50]}..."
+
+
+class FactCheckCacheEntry(models.Model):
+    """
+    Cached Google Fact Check lookup, keyed by the SHA-256 of the normalized claim.
+    Used by the 'db' FACT_CHECK_CACHE backend.
+    """
+    key = models.CharField(max_length=64, primary_key=True)
+    result = models.JSONField(default=dict)  # textual_rating, evidence, verification_score
+    expires_at = models.DateTimeField(db_index=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"FactCheckCacheEntry {self.key[:12]} ({self.result.get('textual_rating', '')})"
+
+
+class ClaimReview(models.Model):
+    """
+    A ClaimReview imported from a fact-checker dump, used to answer lookups locally
+    before calling the Google Fact Check API.
+    """
+    review_key = models.CharField(max_length=64, unique=True)  # SHA-256 of review URL and claim text
+    claim_text = models.TextField()
+    claimant = models.CharField(max_length=255, blank=True)
+    claim_date = models.CharField(max_length=40, blank=True)  # As given in the dump (ISO dates, sometimes partial)
+    textual_rating = models.CharField(max_length=255, blank=True)
+    review_url = models.URLField(max_length=1000, blank=True)
+    review_title = models.TextField(blank=True)
+    review_date = models.CharField(max_length=40, blank=True)
+    publisher_name = models.CharField(max_length=255, blank=True)
+    publisher_site = models.CharField(max_length=255, blank=True)
+    language = models.CharField(max_length=16, blank=True)
+    length = models.IntegerField(default=0)  # Indexed term count of claim_text, for BM25
+    imported_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"ClaimReview ({self.textual_rating}) for: {self.claim_text[:50]}..."
+
+
+class ClaimReviewTerm(models.Model):
+    """
+    Inverted index posting: `term` occurs `frequency` times in a ClaimReview's claim text.
+    """
+    term = models.CharField(max_length=64)
+    review = models.ForeignKey(ClaimReview, on_delete=models.CASCADE, related_name='terms')
+    frequency = models.IntegerField(default=1)
+
+    class Meta:
+        unique_together = ('term', 'review')
+        indexes = [models.Index(fields=['term'])]
+
+    def __str__(self):
+        return f"{self.term} -> {self.review_id} ({self.frequency})"
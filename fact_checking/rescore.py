@@ -0,0 +1,150 @@
+"""
+Rescoring stored verdicts after the rating lexicon or publisher weights change.
+
+No API calls are made: the reviews kept in each FactCheckResult's evidence are
+rescored with the current engine. Rows are read in id-ordered chunks; each chunk's
+reviews are flattened into arrays and scored in one pass (per claim, then the
+article takes its lowest-scoring claim, as in aggregate_verdicts). Only rows whose
+verdict changed are written, with bulk_update, and the change is carried over to
+ProcessedContent, publishing or withdrawing articles that cross the publication gate.
+"""
+import copy
+import logging
+
+import numpy as np
+from django.db import transaction
+
+from .models import FactCheckResult
+from .scoring import build_evidence, get_scoring_engine, stored_reviews, verdict
+
+logger = logging.getLogger(__name__)
+
+
+def _claim_units(evidence):
+    """
+    The per-claim review lists of a row: one per checked claim for articles, or the
+    row's own reviews for single claims.
+    """
+    if evidence and 'claims' in evidence:
+        units = []
+        for claim in evidence['claims']:
+            reviews = claim.get('reviews')
+            if reviews is None:
+                # Saved before claim verdicts kept their reviews: rescore the stored rating
+                reviews = [] if claim.get('textual_rating') in (None, '', "Unverified", "Error") else [
+                    {'rating': claim['textual_rating'], 'publisher': '', 'site': '', 'url': claim.get('url', '')}
+                ]
+            units.append(reviews)
+        return units
+    return [stored_reviews(evidence)]
+
+
+def score_rows(rows, engine=None):
+    """
+    Rescore FactCheckResult rows. Returns {row id: (textual_rating, verification_score, claim_scores)}
+    where claim_scores holds each claim's new score (NaN when unscored).
+    """
+    engine = engine or get_scoring_engine()
+    reviews, review_unit, unit_row, units_per_row = [], [], [], []
+    for row_index, row in enumerate(rows):
+        units = _claim_units(row.evidence)
+        units_per_row.append(len(units))
+        for unit in units:
+            unit_index = len(unit_row)
+            unit_row.append(row_index)
+            reviews.extend(unit)
+            review_unit.extend([unit_index] * len(unit))
+
+    if reviews:
+        scores, weights = engine.review_arrays(reviews)
+        unit_scores = engine.group_scores(scores, weights, review_unit, len(unit_row))
+    else:
+        unit_scores = np.full(len(unit_row), np.nan)
+    row_scores = np.full(len(rows), np.nan)
+    if len(unit_row):
+        np.fmin.at(row_scores, np.asarray(unit_row, dtype=np.int64), unit_scores)
+
+    results = {}
+    offsets = np.concatenate(([0], np.cumsum(units_per_row))).astype(int)
+    for row_index, row in enumerate(rows):
+        textual_rating, verification_score = verdict(row_scores[row_index])
+        results[row.pk] = (textual_rating, verification_score, unit_scores[offsets[row_index]:offsets[row_index + 1]])
+    return results
+
+
+def _rescored_evidence(evidence, textual_rating, verification_score, claim_scores, engine):
+    evidence = copy.deepcopy(evidence or {})
+    if 'claims' not in evidence:
+        reviews = stored_reviews(evidence)
+        engine.score_reviews(reviews)
+        return build_evidence(reviews, textual_rating, verification_score, engine.version)
+    for claim, score in zip(evidence['claims'], claim_scores):
+        claim['textual_rating'], claim['verification_score'] = verdict(score)
+        if claim.get('reviews'):
+            engine.score_reviews(claim['reviews'])
+    evidence['verification_status'] = textual_rating
+    evidence['correctness_score'] = verification_score
+    evidence['scoring_version'] = engine.version
+    return evidence
+
+
+def _propagate(changed):
+    """
+    Copy changed verdicts ({fact check id: FactCheckResult}) to processed content and
+    re-apply the publication gate (see content_processing.models.sync_publication).
+    """
+    from content_processing.models import ProcessedContent, publish_status_for, sync_publication
+
+    processed = list(
+        ProcessedContent.objects.filter(fact_check_id__in=list(changed)).select_related('content')
+        .only('id', 'fact_check_id', 'tags', 'content__title', 'content__body')
+    )
+    for row in processed:
+        fact_check = changed[row.fact_check_id]
+        row.fact_check_status = fact_check.textual_rating
+        row.composite_score = fact_check.verification_score
+        row.evidence = fact_check.evidence
+        row.publish_status = publish_status_for(fact_check.textual_rating)
+    ProcessedContent.objects.bulk_update(
+        processed, ['fact_check_status', 'composite_score', 'evidence', 'publish_status'], batch_size=500
+    )
+    sync_publication(processed)
+
+
+def rescore_fact_checks(batch_size=1000, dry_run=False, log=None):
+    """
+    Rescore every stored verdict with the current lexicon and publisher weights.
+    Returns counters: {'scanned', 'changed'}.
+    """
+    log = log or logger.info
+    engine = get_scoring_engine()
+    stats = {'scanned': 0, 'changed': 0}
+    last_id = 0
+    while True:
+        rows = list(
+            FactCheckResult.objects.filter(id__gt=last_id).exclude(textual_rating="Error")
+            .order_by('id').only('id', 'textual_rating', 'verification_score', 'evidence')[:batch_size]
+        )
+        if not rows:
+            return stats
+        last_id = rows[-1].id
+        stats['scanned'] += len(rows)
+
+        changed = {}
+        scores = score_rows(rows, engine)
+        for row in rows:
+            textual_rating, verification_score, claim_scores = scores[row.pk]
+            if (textual_rating, verification_score) == (row.textual_rating, row.verification_score):
+                continue
+            row.evidence = _rescored_evidence(row.evidence, textual_rating, verification_score, claim_scores, engine)
+            row.textual_rating = textual_rating
+            row.verification_score = verification_score
+            changed[row.pk] = row
+        stats['changed'] += len(changed)
+        if changed and not dry_run:
+            with transaction.atomic():
+                FactCheckResult.objects.bulk_update(
+                    list(changed.values()), ['textual_rating', 'verification_score', 'evidence'], batch_size=500
+                )
+                _propagate(changed)
+        log(f"[RESCORE] scanned {stats['scanned']}, changed {stats['changed']}")
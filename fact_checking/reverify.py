@@ -0,0 +1,247 @@
+"""
+Incremental re-verification of stale fact-check verdicts.
+
+Rows are walked by (checked_at, id) keyset pagination over an index, so each batch is
+one short indexed query no matter how large the table is, and every row is updated
+in its own small transaction. Three tiers run in order, each selected entirely in SQL:
+
+  - hot: verdicts behind published content whose engagement (likes + comments +
+    shares) reaches HOT_ENGAGEMENT, due after HOT_MAX_AGE;
+  - published: other verdicts behind published content, due after PUBLISHED_MAX_AGE;
+  - other: everything else, due after MAX_AGE.
+
+Re-checks share a global budget of claim lookups per minute through a Redis-backed
+rate scheduler, and ProcessedContent/PublishedContent are only touched when a verdict
+actually changes.
+"""
+import logging
+import threading
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, IntegerField, OuterRef, Q, Subquery, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .models import FactCheckResult
+
+logger = logging.getLogger(__name__)
+
+TIERS = ('hot', 'published', 'other')
+
+# Engagement models and their path to the fact check behind the published article.
+ENGAGEMENT_RELATIONS = (
+    ('content_modality.WrittenContentLike', 'written_content__published_content__processed_content__fact_check'),
+    ('content_modality.WrittenContentComment', 'written_content__published_content__processed_content__fact_check'),
+    ('content_modality.WrittenContentShare', 'written_content__published_content__processed_content__fact_check'),
+    ('content_modality.WrittenImageContentLike', 'written_image_content__published_content__processed_content__fact_check'),
+    ('content_modality.WrittenImageContentComment', 'written_image_content__published_content__processed_content__fact_check'),
+    ('content_modality.WrittenImageContentShare', 'written_image_content__published_content__processed_content__fact_check'),
+    ('content_modality.VideoContentLike', 'video_content__published_content__processed_content__fact_check'),
+    ('content_modality.VideoContentComment', 'video_content__published_content__processed_content__fact_check'),
+    ('content_modality.VideoContentShare', 'video_content__published_content__processed_content__fact_check'),
+)
+
+
+def get_reverify_config():
+    config = {
+        'BATCH_SIZE': 200,
+        'HOT_MAX_AGE': 86400,
+        'HOT_ENGAGEMENT': 50,
+        'PUBLISHED_MAX_AGE': 7 * 86400,
+        'MAX_AGE': 30 * 86400,
+        'CLAIMS_PER_MINUTE': 60,
+        'MAX_WAIT': 300.0,
+    }
+    config.update(getattr(settings, 'FACT_CHECK_REVERIFY', {}))
+    return config
+
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+def get_reverify_scheduler():
+    """
+    Process-wide rate scheduler holding the re-verification budget (claim lookups per
+    minute). Its buckets always live in Redis (which scheduled runs already need as the
+    Celery broker), so every run and every process draws on one global budget; the
+    scheduler only falls back to in-process buckets while Redis is unreachable.
+    """
+    from content_generation.ratelimit import RateScheduler
+
+    global _scheduler
+    if _scheduler is None:
+        with _scheduler_lock:
+            if _scheduler is None:
+                config = get_reverify_config()
+                _scheduler = RateScheduler(
+                    'fact_check_reverify',
+                    requests_per_minute=config['CLAIMS_PER_MINUTE'],
+                    tokens_per_minute=config['CLAIMS_PER_MINUTE'],
+                    batch_reserve=0.0,
+                    max_wait=config['MAX_WAIT'],
+                    backend='redis',
+                )
+    return _scheduler
+
+
+# -- selection -----------------------------------------------------------------
+
+def engagement_expression():
+    """
+    Likes + comments + shares of the published articles behind each FactCheckResult,
+    as a SQL expression.
+    """
+    from django.apps import apps
+
+    total = Value(0)
+    for label, path in ENGAGEMENT_RELATIONS:
+        count = (
+            apps.get_model(label).objects.filter(**{path: OuterRef('pk')})
+            .values(path).annotate(n=Count('id')).values('n')
+        )
+        total = total + Coalesce(Subquery(count, output_field=IntegerField()), Value(0))
+    return total
+
+
+def tier_queryset(tier, now=None):
+    """
+    Stale FactCheckResults of a tier (see the module docstring).
+    """
+    config = get_reverify_config()
+    now = now or timezone.now()
+    published = Q(processed_contents__published_content__isnull=False)
+    if tier == 'hot':
+        return (
+            FactCheckResult.objects.filter(published, checked_at__lt=now - timedelta(seconds=config['HOT_MAX_AGE']))
+            .alias(engagement=engagement_expression())
+            .filter(engagement__gte=config['HOT_ENGAGEMENT'])
+        )
+    if tier == 'published':
+        return FactCheckResult.objects.filter(published, checked_at__lt=now - timedelta(seconds=config['PUBLISHED_MAX_AGE']))
+    return FactCheckResult.objects.filter(checked_at__lt=now - timedelta(seconds=config['MAX_AGE'])).exclude(published)
+
+
+def iter_stale_batches(tier, batch_size=None, now=None):
+    """
+    Yield lists of stale FactCheckResults for a tier, oldest first, using keyset
+    pagination on (checked_at, id).
+    """
+    batch_size = batch_size or get_reverify_config()['BATCH_SIZE']
+    queryset = tier_queryset(tier, now).distinct()
+    last = None
+    while True:
+        page = queryset
+        if last is not None:
+            page = page.filter(Q(checked_at__gt=last[0]) | Q(checked_at=last[0], id__gt=last[1]))
+        batch = list(page.order_by('checked_at', 'id')[:batch_size])
+        if not batch:
+            return
+        last = (batch[-1].checked_at, batch[-1].id)
+        yield batch
+
+
+# -- re-checking ---------------------------------------------------------------
+
+def _claim_row(fact_check, now):
+    """
+    Optimistically claim a row by moving its checked_at forward, so concurrent runs
+    never re-check the same verdict twice.
+    """
+    claimed = FactCheckResult.objects.filter(pk=fact_check.pk, checked_at=fact_check.checked_at).update(checked_at=now)
+    return claimed == 1
+
+
+def recheck(fact_check, scheduler=None):
+    """
+    Re-run the fact check for one row. Returns the new result dict, or None when the
+    lookup failed and the old verdict should stand.
+    """
+    from content_generation.ratelimit import BATCH
+    from .claims import extract_claims
+    from .utils import aggregate_verdicts, query_google_fact_check, query_google_fact_check_many
+
+    if fact_check.generated_contents.exists():
+        claims = extract_claims(fact_check.claim)
+    else:
+        claims = [fact_check.claim]
+    if scheduler is not None:
+        scheduler.acquire(len(claims), priority=BATCH)
+    if len(claims) == 1 and claims[0] == fact_check.claim:
+        result = query_google_fact_check(fact_check.claim, use_cache=False)
+    else:
+        result = aggregate_verdicts(claims, query_google_fact_check_many(claims, use_cache=False))
+    if result['textual_rating'] == "Error":
+        return None
+    return result
+
+
+def apply_verdict(fact_check, result):
+    """
+    Store a changed verdict and propagate it to processed content, then re-apply the
+    publication gate (see content_processing.models.sync_publication): articles it now
+    allows are published and ones it no longer allows are withdrawn. Manually overridden
+    PublishedContent is left alone. Returns True if anything changed.
+    """
+    from content_processing.models import ProcessedContent, publish_status_for, sync_publication
+
+    if (result['textual_rating'], result['verification_score']) == (fact_check.textual_rating, fact_check.verification_score):
+        return False
+    with transaction.atomic():
+        FactCheckResult.objects.filter(pk=fact_check.pk).update(
+            textual_rating=result['textual_rating'],
+            verification_score=result['verification_score'],
+            evidence=result['evidence'],
+        )
+        ProcessedContent.objects.filter(fact_check=fact_check).update(
+            fact_check_status=result['textual_rating'],
+            composite_score=result['verification_score'],
+            evidence=result['evidence'],
+            publish_status=publish_status_for(result['textual_rating']),
+        )
+        sync_publication(ProcessedContent.objects.filter(fact_check=fact_check).select_related('content'))
+    logger.info(
+        "Fact check %s verdict changed: %s -> %s", fact_check.pk, fact_check.textual_rating, result['textual_rating']
+    )
+    return True
+
+
+def reverify_stale_fact_checks(limit=None, tiers=TIERS, batch_size=None, dry_run=False, log=None):
+    """
+    Re-check up to `limit` stale verdicts, most important tier first. Stops early if
+    the Google API circuit breaker opens, so an outage never overwrites verdicts.
+    Returns counters: {'scanned', 'rechecked', 'changed', 'failed'}.
+    """
+    from .client import CircuitBreaker, get_fact_check_client
+
+    log = log or logger.info
+    stats = {'scanned': 0, 'rechecked': 0, 'changed': 0, 'failed': 0}
+    scheduler = None if dry_run else get_reverify_scheduler()
+    client = get_fact_check_client()
+    for tier in tiers:
+        for batch in iter_stale_batches(tier, batch_size=batch_size):
+            stats['scanned'] += len(batch)
+            for fact_check in batch:
+                if limit is not None and stats['rechecked'] >= limit:
+                    return stats
+                if dry_run:
+                    stats['rechecked'] += 1
+                    continue
+                if client.breaker.state == CircuitBreaker.OPEN:
+                    log("[REVERIFY] Google Fact Check circuit is open, stopping")
+                    return stats
+                if not _claim_row(fact_check, timezone.now()):
+                    continue
+                stats['rechecked'] += 1
+                result = recheck(fact_check, scheduler)
+                if client.breaker.state == CircuitBreaker.OPEN:
+                    # Lookups were short-circuited to Unverified; don't let that overwrite the verdict
+                    result = None
+                if result is None:
+                    stats['failed'] += 1
+                elif apply_verdict(fact_check, result):
+                    stats['changed'] += 1
+            log(f"[REVERIFY] {tier}: scanned {stats['scanned']}, rechecked {stats['rechecked']}, changed {stats['changed']}")
+    return stats
@@ -0,0 +1,328 @@
+"""
+Verdict scoring for claims:search responses.
+
+Every review of every returned claim is scored: its free-text rating is normalized
+through a lexicon (exact phrases first, then keyword fallbacks such as "false" in
+"False, the photo is from 2015") to a truth score between 0 and 1, and weighted by
+the credibility of its publisher. A claim's composite score is the weighted mean of
+its scored reviews, and its textual rating is the canonical label for that score.
+Reviews whose rating can't be interpreted (e.g. "Satire") are kept in the evidence
+but don't count; a claim with no scored reviews stays "Unverified".
+
+Scoring works on flat NumPy arrays of reviews with a group index per review, so
+rescoring a whole table after a lexicon change costs one dictionary lookup per
+distinct rating string plus a few array operations, instead of Python per review.
+"""
+import hashlib
+import json
+import re
+import threading
+import unicodedata
+
+import numpy as np
+from django.conf import settings
+
+DEFAULT_LEXICON = {
+    'true': 1.0, 'correct': 1.0, 'accurate': 1.0, 'verified': 1.0, 'correct attribution': 1.0,
+    'mostly true': 0.8, 'mostly correct': 0.8, 'mostly accurate': 0.8, 'largely accurate': 0.8,
+    'half true': 0.5, 'half truth': 0.5, 'partly true': 0.5, 'partially true': 0.5, 'mixture': 0.5,
+    'mixed': 0.5, 'partly correct': 0.5, 'partially correct': 0.5, 'unsupported': 0.4,
+    'misleading': 0.3, 'missing context': 0.3, 'lacks context': 0.3, 'needs context': 0.3,
+    'out of context': 0.3, 'exaggerated': 0.3, 'exaggeration': 0.3, 'distorts the facts': 0.3,
+    'partly false': 0.3, 'partially false': 0.3, 'cherry picks': 0.3, 'spins the facts': 0.3,
+    'mostly false': 0.2, 'mostly incorrect': 0.2, 'two pinocchios': 0.5, 'three pinocchios': 0.2,
+    'false': 0.0, 'incorrect': 0.0, 'inaccurate': 0.0, 'wrong': 0.0, 'fake': 0.0, 'hoax': 0.0,
+    'fabricated': 0.0, 'pants on fire': 0.0, 'four pinocchios': 0.0, 'baseless': 0.0,
+    'no evidence': 0.0, 'debunked': 0.0, 'altered': 0.0, 'manipulated': 0.0, 'scam': 0.0,
+    'misattributed': 0.0, 'false headline': 0.0, 'one pinocchio': 0.8, 'not true': 0.0, 'untrue': 0.0,
+}
+
+# Tried in order against ratings not in the lexicon; the first phrase contained wins.
+DEFAULT_KEYWORDS = (
+    ('mostly false', 0.2), ('partly false', 0.3), ('partially false', 0.3), ('mostly true', 0.8),
+    ('half true', 0.5), ('partly true', 0.5), ('misleading', 0.3), ('context', 0.3),
+    ('exaggerat', 0.3), ('not true', 0.0), ('false', 0.0), ('fake', 0.0), ('incorrect', 0.0), ('no evidence', 0.0),
+    ('true', 1.0), ('correct', 1.0),
+)
+
+DEFAULT_PUBLISHER_WEIGHTS = {
+    'politifact.com': 1.0, 'snopes.com': 1.0, 'factcheck.org': 1.0, 'fullfact.org': 1.0,
+    'apnews.com': 1.0, 'reuters.com': 1.0, 'factcheck.afp.com': 1.0, 'washingtonpost.com': 0.9,
+    'usatoday.com': 0.9, 'leadstories.com': 0.8, 'checkyourfact.com': 0.7, 'africacheck.org': 1.0,
+    'healthfeedback.org': 0.9, 'sciencefeedback.co': 0.9, 'climatefeedback.org': 0.9,
+}
+
+# Canonical labels by minimum score, highest first.
+RATING_LABELS = (
+    (0.9, 'True'),
+    (0.7, 'Mostly True'),
+    (0.4, 'Half True'),
+    (0.25, 'Misleading'),
+    (0.1, 'Mostly False'),
+    (0.0, 'False'),
+)
+
+_non_word_re = re.compile(r'[^\w\s]+')
+_whitespace_re = re.compile(r'\s+')
+
+
+def normalize_rating(rating):
+    rating = unicodedata.normalize('NFKC', rating or '').casefold().replace('-', ' ')
+    return _whitespace_re.sub(' ', _non_word_re.sub(' ', rating)).strip()
+
+
+def normalize_site(site):
+    site = (site or '').casefold().strip()
+    site = re.sub(r'^https?://', '', site).split('/')[0]
+    return site[4:] if site.startswith('www.') else site
+
+
+def get_scoring_config():
+    config = {
+        'LEXICON': {},  # Extra or overriding entries, merged over DEFAULT_LEXICON
+        'LEXICON_PATH': '',  # Optional JSON file of {rating: score} entries, merged last
+        'PUBLISHER_WEIGHTS': {},  # By site (e.g. "politifact.com") or publisher name
+        'DEFAULT_PUBLISHER_WEIGHT': 0.5,
+    }
+    config.update(getattr(settings, 'FACT_CHECK_SCORING', {}))
+    return config
+
+
+def label_for_score(score):
+    for minimum, label in RATING_LABELS:
+        if score >= minimum:
+            return label
+    return RATING_LABELS[-1][1]
+
+
+class ScoringEngine:
+    """
+    Rating lexicon plus publisher weights. `version` changes whenever either does, so
+    stored evidence can tell which scoring produced it.
+    """
+
+    def __init__(self, lexicon=None, keywords=DEFAULT_KEYWORDS, publisher_weights=None, default_weight=0.5):
+        self.lexicon = {normalize_rating(rating): float(score) for rating, score in (lexicon or DEFAULT_LEXICON).items()}
+        self.keywords = tuple((normalize_rating(phrase), float(score)) for phrase, score in keywords)
+        self.publisher_weights = {
+            (normalize_site(key) if '.' in key else key.casefold().strip()): float(weight)
+            for key, weight in (publisher_weights or DEFAULT_PUBLISHER_WEIGHTS).items()
+        }
+        self.default_weight = float(default_weight)
+        self._rating_scores = {}
+        self._lock = threading.Lock()
+        self.version = hashlib.sha256(json.dumps(
+            [sorted(self.lexicon.items()), self.keywords, sorted(self.publisher_weights.items()), self.default_weight]
+        ).encode('utf-8')).hexdigest()[:12]
+
+    # -- per-value lookups -----------------------------------------------------
+
+    def rating_score(self, rating):
+        """
+        Truth score in [0, 1] for a free-text rating, or NaN when it can't be interpreted.
+        """
+        score = self._rating_scores.get(rating)
+        if score is None:
+            normalized = normalize_rating(rating)
+            score = self.lexicon.get(normalized)
+            if score is None:
+                score = next((value for phrase, value in self.keywords if phrase and phrase in normalized), np.nan)
+            with self._lock:
+                self._rating_scores[rating] = score
+        return score
+
+    def publisher_weight(self, name, site):
+        weight = self.publisher_weights.get(normalize_site(site))
+        if weight is None:
+            weight = self.publisher_weights.get((name or '').casefold().strip(), self.default_weight)
+        return weight
+
+    # -- vectorized scoring ----------------------------------------------------
+
+    def review_arrays(self, reviews):
+        """
+        (scores, weights) arrays for review dicts with 'rating', 'publisher' and 'site'.
+        Each distinct rating string and publisher is looked up once.
+        """
+        ratings, rating_index = np.unique(
+            np.array([review.get('rating') or '' for review in reviews], dtype=str), return_inverse=True
+        )
+        scores = np.array([self.rating_score(rating) for rating in ratings], dtype=float)[rating_index]
+        publishers, publisher_index = np.unique(
+            np.array([f"{review.get('publisher') or ''}\n{review.get('site') or ''}" for review in reviews], dtype=str),
+            return_inverse=True,
+        )
+        weights = np.array(
+            [self.publisher_weight(*publisher.split('\n', 1)) for publisher in publishers], dtype=float
+        )[publisher_index]
+        return scores.reshape(-1), weights.reshape(-1)
+
+    @staticmethod
+    def group_scores(scores, weights, groups, n_groups):
+        """
+        Weighted mean score per group (NaN for groups without a scored review).
+        """
+        groups = np.asarray(groups, dtype=np.int64)
+        scored = ~np.isnan(scores)
+        weights = np.where(scored, weights, 0.0)
+        total_weight = np.bincount(groups, weights=weights, minlength=n_groups)
+        weighted = np.bincount(groups, weights=np.where(scored, scores, 0.0) * weights, minlength=n_groups)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.where(total_weight > 0, weighted / total_weight, np.nan)
+
+    def score_reviews(self, reviews):
+        """
+        Annotate review dicts in place with 'score' and 'weight' and return the claim's
+        composite score (NaN when none of them could be scored).
+        """
+        if not reviews:
+            return np.nan
+        scores, weights = self.review_arrays(reviews)
+        for review, score, weight in zip(reviews, scores, weights):
+            review['score'] = None if np.isnan(score) else round(float(score), 4)
+            review['weight'] = round(float(weight), 4)
+        return float(self.group_scores(scores, weights, np.zeros(len(reviews)), 1)[0])
+
+
+def _load_lexicon_file(path):
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+_engine = None
+_engine_lock = threading.Lock()
+
+
+def build_scoring_engine():
+    config = get_scoring_config()
+    lexicon = dict(DEFAULT_LEXICON)
+    lexicon.update(config['LEXICON'])
+    if config['LEXICON_PATH']:
+        lexicon.update(_load_lexicon_file(config['LEXICON_PATH']))
+    weights = dict(DEFAULT_PUBLISHER_WEIGHTS)
+    weights.update(config['PUBLISHER_WEIGHTS'])
+    return ScoringEngine(lexicon=lexicon, publisher_weights=weights, default_weight=config['DEFAULT_PUBLISHER_WEIGHT'])
+
+
+def get_scoring_engine():
+    """
+    Return the process-wide engine configured by settings.FACT_CHECK_SCORING.
+    """
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                _engine = build_scoring_engine()
+    return _engine
+
+
+def reset_scoring_engine():
+    """
+    Drop the cached engine so the next lookup rereads settings and the lexicon file.
+    """
+    global _engine
+    with _engine_lock:
+        _engine = None
+
+
+# -- responses and stored evidence ---------------------------------------------
+
+def reviews_from_response(data):
+    """
+    Flatten every review of every claim in a claims:search response.
+    """
+    reviews = []
+    for claim in data.get('claims') or []:
+        for review in claim.get('claimReview') or []:
+            publisher = review.get('publisher') or {}
+            reviews.append({
+                'claim': claim.get('text', ''),
+                'claimant': claim.get('claimant', ''),
+                'publisher': publisher.get('name', '') or 'Unknown Source',
+                'site': publisher.get('site', ''),
+                'url': review.get('url', ''),
+                'title': review.get('title', ''),
+                'rating': review.get('textualRating', ''),
+                'review_date': review.get('reviewDate', ''),
+            })
+    return reviews
+
+
+def stored_reviews(evidence):
+    """
+    Reviews kept in a claim's evidence. Evidence saved before every review was kept
+    only describes the first one, so it is rebuilt from those fields.
+    """
+    if not evidence:
+        return []
+    if 'reviews' in evidence:
+        return evidence['reviews']
+    rating = evidence.get('verification_status') or ''
+    if not rating:
+        return []
+    return [{
+        'claim': '',
+        'publisher': evidence.get('source', ''),
+        'site': '',
+        'url': evidence.get('url', ''),
+        'title': evidence.get('summary', ''),
+        'rating': rating,
+    }]
+
+
+def verdict(score):
+    """
+    (textual_rating, verification_score) for a composite score.
+    """
+    if score is None or np.isnan(score):
+        return "Unverified", 0.0
+    return label_for_score(score), round(float(score), 4)
+
+
+def build_evidence(reviews, textual_rating, verification_score, version):
+    """
+    Evidence for a scored claim in the shape the frontend expects. The summary fields
+    describe the most credible scored review; every review is kept under 'reviews'.
+    """
+    if not reviews:
+        return {}
+    primary = max(reviews, key=lambda review: (review.get('score') is not None, review.get('weight') or 0.0))
+    documents = []
+    for review in reviews:
+        if review.get('url') and review['url'] not in [document['url'] for document in documents]:
+            documents.append({"url": review['url'], "title": review.get('title') or 'Source Document'})
+    title = primary.get('title') or ''
+    return {
+        "url": primary.get('url', ''),
+        "source": primary.get('publisher') or 'Unknown Source',
+        "summary": title or 'No summary available',
+        "details": [
+            {
+                "clarity": title or 'No details available',
+                "accuracy": primary.get('rating') or 'No rating available',
+                "disclosure": title or 'No disclosure available',
+                "source_identification": title or 'No source identification available'
+            }
+        ],
+        "verification_status": textual_rating,
+        "correctness_score": verification_score,
+        "what's_accurate": title or 'No accuracy details available',
+        "what's_not": title or 'No inaccuracy details available',
+        "supporting_documents": documents,
+        "reviews": reviews,
+        "scoring_version": version,
+    }
+
+
+def score_response(data, engine=None):
+    """
+    Score a claims:search response into {'textual_rating', 'evidence', 'verification_score'}.
+    """
+    engine = engine or get_scoring_engine()
+    reviews = reviews_from_response(data)
+    textual_rating, verification_score = verdict(engine.score_reviews(reviews))
+    return {
+        'textual_rating': textual_rating,
+        'evidence': build_evidence(reviews, textual_rating, verification_score, engine.version),
+        'verification_score': verification_score
+    }
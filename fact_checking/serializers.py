@@ -7,6 +7,7 @@ class FactCheckResultSerializer(serializers.ModelSerializer):
         fields = [
             'id',
             'claim',
+            'claim_hash',
             'textual_rating',
             'verification_score',
             'evidence',
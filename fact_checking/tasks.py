@@ -0,0 +1,13 @@
+from celery import shared_task
+from django.conf import settings
+
+@shared_task
+def reverify_fact_checks_task(limit=None):
+    """
+    Celery (beat) task that re-checks stale fact-check verdicts.
+    Returns the run's counters (scanned, rechecked, changed, failed).
+    """
+    from .reverify import reverify_stale_fact_checks
+    if limit is None:
+        limit = getattr(settings, 'FACT_CHECK_REVERIFY', {}).get('LIMIT', 1000)
+    return reverify_stale_fact_checks(limit=limit)
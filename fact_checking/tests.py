@@ -1,3 +1,464 @@
-from django.test import TestCase
+import asyncio
+import importlib
+import threading
+import time
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+import httpx
+import spacy
+
+from django.apps import apps as django_apps
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+
+from content_generation.models import APIPrompt, GeneratedContent
+from content_modality.models import UserSession, WrittenContent, WrittenContentComment, WrittenContentLike
+from content_processing.models import ProcessedContent, PublishedContent
+
+from . import local_index
+from .cache import build_fact_check_cache, make_claim_cache_key, normalize_claim
+from .claims import _sentences, extract_claims, score_sentence
+from .client import CircuitBreaker, CircuitOpenError, FactCheckClientError, GoogleFactCheckClient
+from .models import ClaimReview, FactCheckCacheEntry, FactCheckResult, hash_claim
+from .rescore import rescore_fact_checks
+from .reverify import apply_verdict, tier_queryset
+from .scoring import score_response
+from .utils import (
+    _arequest_google_fact_check, _request_google_fact_check, process_fact_check_batch, query_google_fact_check,
+)
+from .views import stream_in_thread
+
+
+def make_article(textual_rating, body="The council approved the budget on Monday."):
+    """
+    A processed article whose fact check has the given rating; published when the
+    pipeline's gate allows it.
+    """
+    prompt = APIPrompt.objects.create(prompt_text="x", status='completed')
+    content = GeneratedContent.objects.create(prompt=prompt, title="Budget", body=body)
+    fact_check = FactCheckResult.objects.create(claim=body, textual_rating=textual_rating, evidence={})
+    processed = ProcessedContent.objects.create(content=content, fact_check=fact_check)
+    return fact_check, processed
+
+
+def review(claim_text, textual_rating="False", url=""):
+    return {
+        'claim_text': claim_text, 'claimant': "", 'claim_date': "", 'textual_rating': textual_rating,
+        'review_url': url or f"https://checker.test/{abs(hash(claim_text))}", 'review_title': "",
+        'review_date': "", 'publisher_name': "Checker", 'publisher_site': "checker.test", 'language': "en",
+    }
+
+
+def verdict(textual_rating, score=0.0):
+    return {'textual_rating': textual_rating, 'verification_score': score, 'evidence': {'verification_status': textual_rating}}
+
+
+class ApplyVerdictTests(TestCase):
+    def test_published_article_rated_false_is_withdrawn(self):
+        fact_check, processed = make_article("Unverified")
+        self.assertTrue(PublishedContent.objects.filter(processed_content=processed).exists())
+
+        self.assertTrue(apply_verdict(fact_check, verdict("False")))
+
+        processed.refresh_from_db()
+        self.assertEqual(processed.fact_check_status, "False")
+        self.assertFalse(PublishedContent.objects.filter(processed_content=processed).exists())
+
+    def test_article_rated_unverified_is_published(self):
+        fact_check, processed = make_article("False")
+        self.assertFalse(PublishedContent.objects.filter(processed_content=processed).exists())
+
+        apply_verdict(fact_check, verdict("Unverified"))
+
+        published = PublishedContent.objects.get(processed_content=processed)
+        self.assertEqual(published.fact_check_status, "Unverified")
+        self.assertEqual(published.title, "Budget")
+        self.assertEqual(published.evidence, {'verification_status': "Unverified"})
+
+    def test_manually_overridden_content_is_left_alone(self):
+        fact_check, processed = make_article("Unverified")
+        PublishedContent.objects.filter(processed_content=processed).update(manually_overridden=True)
+
+        apply_verdict(fact_check, verdict("False"))
+
+        published = PublishedContent.objects.get(processed_content=processed)
+        self.assertEqual(published.fact_check_status, "Unverified")
+
+    def test_unchanged_verdict_touches_nothing(self):
+        fact_check, processed = make_article("Unverified")
+        self.assertFalse(apply_verdict(fact_check, verdict("Unverified")))
+        self.assertTrue(PublishedContent.objects.filter(processed_content=processed).exists())
+
+
+class RescoreTests(TestCase):
+    def test_rescore_moves_articles_across_the_publication_gate(self):
+        debunked, debunked_processed = make_article("Unverified", body="The moon landing was staged.")
+        debunked.evidence = {'reviews': [{'rating': "Pants on Fire", 'publisher': "PolitiFact", 'site': "politifact.com"}]}
+        debunked.save()
+        unrated, unrated_processed = make_article("False", body="A celebrity endorsed the product.")
+        unrated.evidence = {'reviews': [{'rating': "Satire", 'publisher': "Snopes", 'site': "snopes.com"}]}
+        unrated.save()
+
+        stats = rescore_fact_checks()
+
+        self.assertEqual(stats, {'scanned': 2, 'changed': 2})
+        debunked.refresh_from_db()
+        self.assertEqual(debunked.textual_rating, "False")
+        self.assertFalse(PublishedContent.objects.filter(processed_content=debunked_processed).exists())
+        unrated_processed.refresh_from_db()
+        self.assertEqual(unrated_processed.fact_check_status, "Unverified")
+        self.assertTrue(PublishedContent.objects.filter(processed_content=unrated_processed).exists())
+
+    def test_rescore_is_idempotent(self):
+        fact_check, _ = make_article("Unverified")
+        fact_check.evidence = {'reviews': [{'rating': "Mostly true", 'publisher': "AFP", 'site': "factcheck.afp.com"}]}
+        fact_check.save()
+
+        self.assertEqual(rescore_fact_checks()['changed'], 1)
+        self.assertEqual(rescore_fact_checks()['changed'], 0)
+
+
+@override_settings(FACT_CHECK_REVERIFY={'HOT_MAX_AGE': 86400, 'HOT_ENGAGEMENT': 3, 'PUBLISHED_MAX_AGE': 7 * 86400, 'MAX_AGE': 30 * 86400})
+class ReverifyTierTests(TestCase):
+    def make_checked(self, textual_rating, days_ago, body):
+        fact_check, processed = make_article(textual_rating, body=body)
+        FactCheckResult.objects.filter(pk=fact_check.pk).update(checked_at=timezone.now() - timedelta(days=days_ago))
+        return fact_check, processed
+
+    def engage(self, processed, likes, comments):
+        written = WrittenContent.objects.create(
+            published_content=processed.published_content, title="Budget", content="Budget"
+        )
+        for i in range(likes):
+            WrittenContentLike.objects.create(user=UserSession.objects.create(user_id=f"like-{processed.pk}-{i}"), written_content=written)
+        for i in range(comments):
+            WrittenContentComment.objects.create(
+                user=UserSession.objects.create(user_id=f"comment-{processed.pk}-{i}"), written_content=written, text="!"
+            )
+
+    def tier_ids(self, tier):
+        return set(tier_queryset(tier).distinct().values_list('id', flat=True))
+
+    def test_tiers_select_by_age_and_engagement(self):
+        hot, hot_processed = self.make_checked("Unverified", 2, "Hot article.")
+        self.engage(hot_processed, likes=2, comments=1)
+        quiet, quiet_processed = self.make_checked("Unverified", 2, "Quiet article.")
+        self.engage(quiet_processed, likes=1, comments=1)
+        old, _ = self.make_checked("Unverified", 8, "Old published article.")
+        fresh_other, _ = self.make_checked("False", 8, "Unpublished article.")
+        stale_other, _ = self.make_checked("False", 31, "Old unpublished article.")
+
+        self.assertEqual(self.tier_ids('hot'), {hot.pk})
+        self.assertEqual(self.tier_ids('published'), {old.pk})
+        self.assertEqual(self.tier_ids('other'), {stale_other.pk})
+
+
+@override_settings(FACT_CHECK_LOCAL_INDEX={'MAX_DF_RATIO': 0.5})
+class LocalIndexTests(TestCase):
+    def setUp(self):
+        local_index._corpus_stats.invalidate()
+        local_index.index_reviews([
+            review("Drinking bleach cures the flu virus", "False"),
+            review("The city council approved a new stadium budget", "True"),
+            review("Vaccines contain tracking microchips from the government", "Pants on Fire"),
+            review("The stadium opening was delayed by flooding", "Mostly true"),
+        ])
+
+    def test_search_ranks_the_review_of_the_same_claim_first(self):
+        results = local_index.search("council approved the stadium budget")
+        self.assertEqual(results[0][0].textual_rating, "True")
+        self.assertAlmostEqual(results[0][2], 1.0)  # every query term found
+        self.assertGreater(results[0][1], results[1][1])
+
+    def test_lookup_rejects_loosely_related_reviews(self):
+        self.assertEqual(local_index.lookup_claim("vaccines contain government microchips").textual_rating, "Pants on Fire")
+        self.assertIsNone(local_index.lookup_claim("government stadium flooding plans"))
+
+    def test_reimport_refreshes_imported_at(self):
+        row = ClaimReview.objects.get(claim_text__startswith="Drinking bleach")
+        ClaimReview.objects.filter(pk=row.pk).update(imported_at=timezone.now() - timedelta(days=3))
+
+        self.assertEqual(local_index.index_reviews([review("Drinking bleach cures the flu virus", "False", row.review_url)]), (0, 1))
+
+        row.refresh_from_db()
+        self.assertGreater(row.imported_at, timezone.now() - timedelta(minutes=1))
+
+    def test_cache_is_checked_before_the_index(self):
+        cache = mock.Mock()
+        cache.get.return_value = verdict("True")
+        with mock.patch('fact_checking.utils.get_fact_check_cache', return_value=cache), \
+                mock.patch('fact_checking.utils.lookup_local_result') as lookup:
+            self.assertEqual(query_google_fact_check("Drinking bleach cures the flu virus"), verdict("True"))
+        lookup.assert_not_called()
+
+    def test_local_answer_is_cached(self):
+        cache = mock.Mock()
+        cache.get.return_value = None
+        with mock.patch('fact_checking.utils.get_fact_check_cache', return_value=cache):
+            result = query_google_fact_check("Drinking bleach cures the flu virus")
+        self.assertEqual(result['textual_rating'], "False")
+        cache.set.assert_called_once_with("Drinking bleach cures the flu virus", result)
+
+
+class ClaimHashTests(TestCase):
+    CLAIM = "The council approved the budget on Monday."
+
+    def test_save_sets_the_hash_and_for_claim_finds_the_row(self):
+        fact_check = FactCheckResult.objects.create(claim=self.CLAIM, textual_rating="True")
+        self.assertEqual(fact_check.claim_hash, hash_claim(self.CLAIM))
+        self.assertEqual(FactCheckResult.for_claim(self.CLAIM), fact_check)
+        self.assertIsNone(FactCheckResult.for_claim(self.CLAIM.lower()))
+
+    def test_batch_rows_get_the_hash(self):
+        claims = [self.CLAIM, "Unemployment fell to 4.2 percent in March."]
+        with mock.patch('fact_checking.utils._lookup_offline', side_effect=lambda claim, use_cache: verdict("False")):
+            saved = dict(process_fact_check_batch(claims))
+        self.assertEqual(sorted(saved), [0, 1])
+        for index, claim in enumerate(claims):
+            self.assertEqual(saved[index].claim_hash, hash_claim(claim))
+            self.assertEqual(FactCheckResult.for_claim(claim), saved[index])
+
+    def test_backfill_migration_hashes_existing_rows(self):
+        migration = importlib.import_module('fact_checking.migrations.0002_factcheckresult_claim_hash')
+        fact_check = FactCheckResult.objects.create(claim=self.CLAIM, textual_rating="True")
+        FactCheckResult.objects.filter(pk=fact_check.pk).update(claim_hash='')
+        self.assertIsNone(FactCheckResult.for_claim(self.CLAIM))
+
+        migration.backfill_claim_hashes(django_apps, None)
+
+        self.assertEqual(FactCheckResult.for_claim(self.CLAIM), fact_check)
+
+
+class FactCheckCacheTests(TestCase):
+    def setUp(self):
+        self.cache = build_fact_check_cache({'BACKEND': 'db'})
+
+    def test_entry_scored_under_another_version_is_a_miss(self):
+        current = score_response({'claims': [{'text': "x", 'claimReview': [
+            {'textualRating': "False", 'publisher': {'name': "Checker", 'site': "checker.test"}},
+        ]}]})
+        stale = dict(current, evidence=dict(current['evidence'], scoring_version='old'))
+
+        self.cache.set("The moon landing was staged.", stale)
+        self.assertIsNone(self.cache.get("The moon landing was staged."))
+        self.cache.set("The moon landing was staged.", current)
+        self.assertEqual(self.cache.get("The moon landing was staged."), current)
+        self.assertEqual((self.cache.stats()['hits'], self.cache.stats()['misses']), (1, 1))
+
+    def expiry(self, claim):
+        return FactCheckCacheEntry.objects.get(key=make_claim_cache_key(claim)).expires_at - timezone.now()
+
+    def test_unverified_results_use_the_negative_ttl(self):
+        cache = build_fact_check_cache({'BACKEND': 'db', 'TTL': 86400, 'NEGATIVE_TTL': 600})
+        cache.set("Drinking bleach cures the flu.", verdict("False"))
+        cache.set("The stadium opens next spring.", verdict("Unverified"))
+        self.assertGreater(self.expiry("Drinking bleach cures the flu."), timedelta(hours=23))
+        self.assertLess(self.expiry("The stadium opens next spring."), timedelta(minutes=11))
+
+        # A non-positive negative TTL disables negative caching.
+        cache = build_fact_check_cache({'BACKEND': 'db', 'NEGATIVE_TTL': 0})
+        cache.set("The bridge reopens in May.", verdict("Unverified"))
+        self.assertIsNone(cache.get("The bridge reopens in May."))
+
+    def test_errors_are_never_cached(self):
+        self.cache.set("The council approved the budget.", verdict("Error"))
+        self.assertFalse(FactCheckCacheEntry.objects.exists())
+
+    def test_trivially_different_spellings_share_an_entry(self):
+        self.cache.set("The Moon landing was STAGED!", verdict("False"))
+        for spelling in ("the moon landing was staged", "  The moon  landing, was staged. ", "The Moon landing was staged"):
+            self.assertEqual(self.cache.get(spelling), verdict("False"))
+        self.assertEqual(normalize_claim("Ｔｈｅ ＭＯＯＮ landing… was staged"), "the moon landing was staged")
+        self.assertIsNone(self.cache.get("The moon landing was real"))
+
+    def test_stats_count_hits_negative_hits_and_misses(self):
+        self.cache.set("Drinking bleach cures the flu.", verdict("False"))
+        self.cache.set("The stadium opens next spring.", verdict("Unverified"))
+        for claim in ("Drinking bleach cures the flu.", "Drinking bleach cures the flu.",
+                      "The stadium opens next spring.", "Nobody has checked this one."):
+            self.cache.get(claim)
+
+        stats = self.cache.stats()
+        self.assertEqual((stats['hits'], stats['negative_hits'], stats['misses']), (2, 1, 1))
+        self.assertEqual(stats['hit_rate'], 0.75)
+        self.assertEqual(stats['size'], 2)
+
+
+class FactCheckApiErrorTests(SimpleTestCase):
+    def test_api_errors_are_logged_and_not_cacheable(self):
+        client = mock.Mock(
+            search=mock.Mock(side_effect=FactCheckClientError("HTTP 500")),
+            asearch=mock.AsyncMock(side_effect=FactCheckClientError("HTTP 500")),
+        )
+        with mock.patch('fact_checking.utils.get_fact_check_client', return_value=client):
+            with self.assertLogs('fact_checking.utils', 'WARNING') as logs:
+                result, cacheable = _request_google_fact_check("The council approved the budget.")
+                aresult, acacheable = asyncio.run(_arequest_google_fact_check("The council approved the budget."))
+        self.assertEqual((result['textual_rating'], cacheable), ("Error", False))
+        self.assertEqual((aresult['textual_rating'], acacheable), ("Error", False))
+        self.assertEqual(logs.output, ["WARNING:fact_checking.utils:Google Fact Check API error: HTTP 500"] * 2)
+
+
+def blank_pipeline(model, **kwargs):
+    nlp = spacy.blank('en')
+    nlp.add_pipe('sentencizer')
+    return nlp
+
+
+@mock.patch('spacy.load', blank_pipeline)
+class ClaimExtractionTests(SimpleTestCase):
+    FILLER = "It was a busy week for everyone involved in the project here."
+
+    def setUp(self):
+        patcher = mock.patch.dict('content_processing.nlp._pipelines', clear=True)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_numeric_and_attributed_sentences_outrank_filler(self):
+        claim = "Unemployment fell to 4.2 percent in March, the Labor Department said."
+        body = " ".join([self.FILLER, "Things are looking up for the people who live here now.", claim])
+        self.assertEqual(extract_claims(body, max_claims=1), [claim])
+        self.assertGreater(score_sentence(_sentences(claim)[0]), score_sentence(_sentences(self.FILLER)[0]))
+
+    def test_questions_and_opinions_are_skipped(self):
+        claim = "The city council approved a 12 million budget on Monday."
+        body = " ".join([
+            "Did the city council really approve a 12 million budget on Monday?",
+            "I think the city council approved far too large a budget on Monday.",
+            claim,
+        ])
+        self.assertEqual(extract_claims(body), [claim])
+
+    def test_claims_are_capped_and_kept_in_order(self):
+        claims = [f"Officials said {n} million people visited Paris in {2010 + n}." for n in range(1, 9)]
+        self.assertEqual(extract_claims(" ".join(claims)), claims[:5])
+        with override_settings(FACT_CHECK_CLAIMS={'MAX_CLAIMS': 2}):
+            self.assertEqual(extract_claims(" ".join(claims)), claims[:2])
+
+    def test_short_bodies_fall_back_to_the_first_sentence(self):
+        self.assertEqual(extract_claims("Big news today. More soon."), ["Big news today."])
+        self.assertEqual(extract_claims(self.FILLER), [self.FILLER])
+        self.assertEqual(extract_claims("   "), [])
+
+
+class StreamInThreadTests(SimpleTestCase):
+    def test_items_are_yielded_as_they_are_produced(self):
+        release = threading.Event()
+
+        def lines():
+            yield "first\n"
+            release.wait(5)  # The second line only exists once the first was received
+            yield "second\n"
+
+        async def consume():
+            received = []
+            async for line in stream_in_thread(lines()):
+                received.append(line)
+                release.set()
+            return received
+
+        self.assertEqual(asyncio.run(consume()), ["first\n", "second\n"])
+
+    def test_closing_the_stream_closes_the_generator(self):
+        closed = threading.Event()
+
+        def lines():
+            try:
+                while True:
+                    yield "line\n"
+            finally:
+                closed.set()
+
+        async def consume():
+            stream = stream_in_thread(lines())
+            await stream.__anext__()
+            await stream.aclose()
+
+        asyncio.run(consume())
+        self.assertTrue(closed.wait(5))
+
+
+class CircuitBreakerTests(SimpleTestCase):
+    def test_opens_after_threshold_and_probes_once_when_half_open(self):
+        breaker = CircuitBreaker(failure_threshold=2, reset_timeout=0.05)
+        breaker.record_failure()
+        self.assertEqual(breaker.state, CircuitBreaker.CLOSED)
+        breaker.record_failure()
+        self.assertEqual(breaker.state, CircuitBreaker.OPEN)
+        self.assertFalse(breaker.allow())
+
+        time.sleep(0.06)
+        self.assertEqual(breaker.state, CircuitBreaker.HALF_OPEN)
+        probe = breaker.allow()
+        self.assertTrue(probe)
+        self.assertFalse(breaker.allow())  # Only one probe at a time
+
+        breaker.record_success()
+        self.assertEqual(breaker.state, CircuitBreaker.CLOSED)
+        self.assertTrue(breaker.allow())
+
+    def test_failed_probe_reopens(self):
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.05)
+        breaker.record_failure()
+        time.sleep(0.06)
+        self.assertTrue(breaker.allow())
+        breaker.record_failure()
+        self.assertEqual(breaker.state, CircuitBreaker.OPEN)
+        self.assertFalse(breaker.allow())
+
+    def test_released_probe_lets_the_next_call_probe(self):
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.05)
+        breaker.record_failure()
+        time.sleep(0.06)
+        probe = breaker.allow()
+        breaker.release(probe)
+        self.assertTrue(breaker.allow())
+
+
+class GoogleFactCheckClientTests(SimpleTestCase):
+    def make_client(self):
+        return GoogleFactCheckClient(
+            api_key='key', endpoint='https://factcheck.test/claims:search',
+            max_retries=0, failure_threshold=1, reset_timeout=0.05,
+        )
+
+    def test_client_errors_do_not_open_the_circuit(self):
+        client = self.make_client()
+        for status_code in (400, 403, 404):
+            with mock.patch('requests.Session.get', return_value=mock.Mock(status_code=status_code, headers={})):
+                with self.assertRaises(FactCheckClientError):
+                    client.search("claim")
+        self.assertEqual(client.breaker.state, CircuitBreaker.CLOSED)
+
+        with mock.patch('requests.Session.get', return_value=mock.Mock(status_code=503, headers={})):
+            with self.assertRaises(FactCheckClientError):
+                client.search("claim")
+        self.assertEqual(client.breaker.state, CircuitBreaker.OPEN)
+        with self.assertRaises(CircuitOpenError):
+            client.search("claim")
+
+    def test_cancelled_probe_does_not_leave_the_circuit_stuck(self):
+        client = self.make_client()
+        client.breaker.record_failure()
+        time.sleep(0.06)
+
+        async def hang(request):
+            await asyncio.sleep(10)
+
+        async def ok(request):
+            return httpx.Response(200, json={'claims': []})
+
+        async def main():
+            loop = asyncio.get_running_loop()
+            client._async_clients[loop] = httpx.AsyncClient(transport=httpx.MockTransport(hang))
+            probe = asyncio.create_task(client.asearch("claim"))
+            await asyncio.sleep(0.01)
+            probe.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await probe
+            client._async_clients[loop] = httpx.AsyncClient(transport=httpx.MockTransport(ok))
+            return await client.asearch("claim")
+
+        self.assertEqual(asyncio.run(main()), {'claims': []})
+        self.assertEqual(client.breaker.state, CircuitBreaker.CLOSED)
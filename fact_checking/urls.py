@@ -1,6 +1,8 @@
 from django.urls import path
-from .views import FactCheckView
+from .views import FactCheckBatchView, FactCheckMetricsView, FactCheckView
 
 urlpatterns = [
     path('check/', FactCheckView.as_view(), name='fact_check'),
+    path('check/batch/', FactCheckBatchView.as_view(), name='fact_check_batch'),
+    path('metrics/', FactCheckMetricsView.as_view(), name='fact_check_metrics'),
 ]
@@ -1,11 +1,27 @@
-import requests
+import asyncio
+import logging
+from concurrent.futures import FIRST_COMPLETED, wait
+
 from django.conf import settings
-from .models import FactCheckResult
+from dailynews_backend.background_loop import submit_coroutine
+from dailynews_backend.singleflight import get_single_flight
+from .cache import get_fact_check_cache, make_claim_cache_key
+from .claims import extract_claims, get_claim_check_config
+from .local_index import lookup_local_result
+from .client import CircuitOpenError, get_fact_check_client
+from .models import FactCheckResult, hash_claim
+from .scoring import score_response
+
+logger = logging.getLogger(__name__)
 
-def query_google_fact_check(claim):
+def query_google_fact_check(claim, use_cache=True):
     """
     Query the Google Fact Check Explorer API using the given claim.
     Process the response to extract the textual rating, evidence, and compute a verification score.
+    Results are cached by normalized claim (see fact_checking.cache), so repeat claims
+    are answered without a network round trip; pass use_cache=False to bypass the cache.
+    Claims not in the cache but known to the local ClaimReview index (see
+    fact_checking.local_index) are answered from it before calling the API.
     
     Returns:
         dict: {
@@ -14,78 +30,234 @@ def query_google_fact_check(claim):
             'verification_score': <float>
         }
     """
-    endpoint = "https://factchecktools.googleapis.com/v1alpha1/claims:search"
-    params = {
-        "query": claim,
-        "key": settings.GOOGLE_FACT_CHECK_API_KEY
+    known = _lookup_offline(claim, use_cache)
+    if known is not None:
+        return known
+    result, cacheable = _fetch_google_fact_check(claim)
+    if cacheable:
+        get_fact_check_cache().set(claim, result)
+    return result
+
+def _lookup_offline(claim, use_cache=True):
+    """
+    Answer a claim without the network: the cache first (one key lookup), then the local
+    ClaimReview index, whose answer is cached so the next lookup skips the BM25 search.
+    """
+    cache = get_fact_check_cache() if use_cache else None
+    if cache is not None:
+        cached = cache.get(claim)
+        if cached is not None:
+            return cached
+    local = lookup_local_result(claim)
+    if local is not None and cache is not None:
+        cache.set(claim, local)
+    return local
+
+def _error_result():
+    return {
+        'textual_rating': "Error",
+        'evidence': {},  # ✅ Return empty dict on error
+        'verification_score': 0.0
+    }
+
+def _unavailable_result():
+    """
+    Result used while the circuit breaker is open: the claim is simply not verified yet.
+    """
+    return {
+        'textual_rating': "Unverified",
+        'evidence': {},
+        'verification_score': 0.0
     }
+
+def _fetch_google_fact_check(claim):
+    """
+    Call the Google Fact Check Explorer API for a claim (no caching).
+    Returns (result, cacheable): failures and short-circuited calls must not be cached.
+    Concurrent lookups of the same normalized claim share one request (single-flight),
+    across processes when SINGLE_FLIGHT uses Redis.
+    """
+    result, cacheable = get_single_flight('fact_check').do(make_claim_cache_key(claim), _request_google_fact_check, claim)
+    return result, cacheable
+
+def _request_google_fact_check(claim):
     try:
-        response = requests.get(endpoint, params=params)
-        response.raise_for_status()
-        data = response.json()
+        return parse_fact_check_response(get_fact_check_client().search(claim)), True
+    except CircuitOpenError:
+        return _unavailable_result(), False
+    except Exception as e:
+        logger.warning("Google Fact Check API error: %s", e)
+        return _error_result(), False
 
-        # Default values if no claims found
-        textual_rating = "Unverified"
-        evidence = {}  # ✅ FIXED: Now returns dict instead of None/string
-        verification_score = 0.0
+def parse_fact_check_response(data):
+    """
+    Turn a claims:search response into {'textual_rating', 'evidence', 'verification_score'}.
+    Every review of every returned claim is scored (see fact_checking.scoring); all of
+    them are kept in evidence['reviews'].
+    """
+    return score_response(data)
 
-        if 'claims' in data and data['claims']:
-            # Get the first claimReview if available
-            claim_reviews = data['claims'][0].get('claimReview', [])
-            if claim_reviews:
-                first_review = claim_reviews[0]
-                textual_rating = first_review.get('textualRating', "Unverified")
-                
-                # ✅ FIXED: Structure evidence as object matching frontend expectations
-                evidence = {
-                    "url": first_review.get('url', ''),
-                    "source": first_review.get('publisher', {}).get('name', 'Unknown Source'),
-                    "summary": first_review.get('title', 'No summary available'),
-                    "details": [
-                        {
-                            "clarity": first_review.get('title', 'No details available'),
-                            "accuracy": first_review.get('textualRating', 'No rating available'),
-                            "disclosure": first_review.get('title', 'No disclosure available'),
-                            "source_identification": first_review.get('title', 'No source identification available')
-                        }
-                    ],
-                    "verification_status": textual_rating,
-                    "correctness_score": verification_score,
-                    "what's_accurate": first_review.get('title', 'No accuracy details available'),
-                    "what's_not": first_review.get('title', 'No inaccuracy details available'),
-                    "supporting_documents": [
-                        {
-                            "url": first_review.get('url', ''),
-                            "title": first_review.get('title', 'Source Document')
-                        }
-                    ] if first_review.get('url') else []
-                }
-                
-                # Compute a simple verification score based on textual_rating
-                rating_map = {
-                    "TRUE": 1.0,
-                    "True": 1.0,
-                    "Mostly True": 0.8,
-                    "Partly True": 0.5,
-                    "Mostly False": 0.2,
-                    "FALSE": 0.0,
-                    "False": 0.0
-                }
-                verification_score = rating_map.get(textual_rating, 0.0)
-                
-        return {
-            'textual_rating': textual_rating,
-            'evidence': evidence,
-            'verification_score': verification_score
-        }
+async def _afetch_google_fact_check(claim):
+    """
+    Async variant of _fetch_google_fact_check over the client's pooled AsyncClient.
+    """
+    result, cacheable = await get_single_flight('fact_check').ado(
+        make_claim_cache_key(claim), _arequest_google_fact_check, claim
+    )
+    return result, cacheable
+
+async def _arequest_google_fact_check(claim):
+    try:
+        return parse_fact_check_response(await get_fact_check_client().asearch(claim)), True
+    except CircuitOpenError:
+        return _unavailable_result(), False
     except Exception as e:
-        # Log or print the error as needed
-        print("Google Fact Check API error:", e)
-        return {
-            'textual_rating': "Error",
-            'evidence': {},  # ✅ Return empty dict on error
-            'verification_score': 0.0
+        logger.warning("Google Fact Check API error: %s", e)
+        return _error_result(), False
+
+async def _afetch_all(claims, concurrency):
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def _fetch(claim):
+        async with semaphore:
+            return await _afetch_google_fact_check(claim)
+
+    return await asyncio.gather(*(_fetch(claim) for claim in claims))
+
+def query_google_fact_check_many(claims, concurrency=None, use_cache=True):
+    """
+    Fact-check several claims at once. Cached and locally known claims are answered up front; the rest
+    are queried concurrently (at most `concurrency` in flight), so the total time is
+    bounded by the slowest claim. Returns one result dict per claim, in order.
+    """
+    return submit_fact_check_many(claims, concurrency=concurrency, use_cache=use_cache)()
+
+def submit_fact_check_many(claims, concurrency=None, use_cache=True):
+    """
+    Start query_google_fact_check_many without waiting for it: cached and locally known
+    claims are answered now, the rest are queried on the background event loop while
+    the caller gets on with other work. Returns a function that waits for the lookups
+    and returns the results (caching the new ones on the calling thread).
+    """
+    if concurrency is None:
+        concurrency = get_claim_check_config()['CONCURRENCY']
+    cache = get_fact_check_cache()
+    results = [_lookup_offline(claim, use_cache) for claim in claims]
+    missing = [index for index, result in enumerate(results) if result is None]
+    future = submit_coroutine(_afetch_all([claims[index] for index in missing], max(1, concurrency))) if missing else None
+
+    def collect():
+        if future is not None:
+            for index, (result, cacheable) in zip(missing, future.result()):
+                if cacheable:
+                    cache.set(claims[index], result)
+                results[index] = result
+        return results
+
+    return collect
+
+def aggregate_verdicts(claims, results):
+    """
+    Combine per-claim results into one verdict. The article takes the rating of its
+    lowest-scoring rated claim; if no claim was rated it is "Unverified" (or "Error"
+    when every lookup failed). Every claim's verdict is kept in evidence['claims'].
+    """
+    rated = [
+        (result, claim) for claim, result in zip(claims, results)
+        if result['textual_rating'] not in ("Unverified", "Error")
+    ]
+    claim_verdicts = [
+        {
+            "claim": claim,
+            "textual_rating": result['textual_rating'],
+            "verification_score": result['verification_score'],
+            "url": result.get('evidence', {}).get('url', ''),
+            "reviews": result.get('evidence', {}).get('reviews', [])
         }
+        for claim, result in zip(claims, results)
+    ]
+    if rated:
+        worst, _ = min(rated, key=lambda item: item[0]['verification_score'])
+        textual_rating = worst['textual_rating']
+        verification_score = worst['verification_score']
+        evidence = dict(worst.get('evidence', {}))
+    else:
+        all_failed = bool(results) and all(result['textual_rating'] == "Error" for result in results)
+        textual_rating = "Error" if all_failed else "Unverified"
+        verification_score = 0.0
+        evidence = {}
+    evidence['claims'] = claim_verdicts
+    return {
+        'textual_rating': textual_rating,
+        'evidence': evidence,
+        'verification_score': verification_score
+    }
+
+def process_fact_check_batch(claims, concurrency=None, chunk_size=None, use_cache=True):
+    """
+    Fact-check many claims with at most `concurrency` lookups in flight and yield
+    (index, FactCheckResult) pairs as they complete, in completion order.
+    Finished results are saved with bulk_create, in chunks of up to `chunk_size`
+    or whatever has completed so far, so only the in-flight window and one chunk
+    are held in memory.
+    """
+    config = getattr(settings, 'FACT_CHECK_BATCH', {})
+    if concurrency is None:
+        concurrency = config.get('CONCURRENCY', 16)
+    if chunk_size is None:
+        chunk_size = config.get('CHUNK_SIZE', 100)
+    cache = get_fact_check_cache()
+    in_flight = {}
+    ready = []  # (index, claim, result) waiting to be saved
+    claims_iter = iter(enumerate(claims))
+    exhausted = False
+
+    def _flush():
+        rows = FactCheckResult.objects.bulk_create([
+            FactCheckResult(
+                claim=claim,
+                claim_hash=hash_claim(claim),  # bulk_create bypasses save()
+                textual_rating=result.get('textual_rating', "Unverified"),
+                evidence=result.get('evidence', {}),
+                verification_score=result.get('verification_score', 0.0)
+            )
+            for _, claim, result in ready
+        ])
+        saved = [(index, row) for (index, _, _), row in zip(ready, rows)]
+        ready.clear()
+        return saved
+
+    try:
+        while True:
+            # Top up the window; locally known and cached claims complete without a request.
+            while not exhausted and len(in_flight) < concurrency and len(ready) < chunk_size:
+                try:
+                    index, claim = next(claims_iter)
+                except StopIteration:
+                    exhausted = True
+                    break
+                known = _lookup_offline(claim, use_cache)
+                if known is not None:
+                    ready.append((index, claim, known))
+                else:
+                    in_flight[submit_coroutine(_afetch_google_fact_check(claim))] = (index, claim)
+
+            if not in_flight and not ready:
+                break
+            if in_flight and len(ready) < chunk_size:
+                done, _ = wait(in_flight, timeout=0 if ready else None, return_when=FIRST_COMPLETED)
+                for future in done:
+                    index, claim = in_flight.pop(future)
+                    result, cacheable = future.result()
+                    if cacheable:
+                        cache.set(claim, result)
+                    ready.append((index, claim, result))
+            if ready:
+                yield from _flush()
+    finally:
+        # Client went away: stop lookups that nobody will read
+        for future in in_flight:
+            future.cancel()
 
 def process_fact_check_manual(claim):
     """
@@ -104,10 +276,36 @@ def process_fact_check_manual(claim):
     )
     return fact_check_result
 
-def process_fact_check_for_content(generated_content):
+def process_fact_check_for_content(generated_content, analysis=None, claims=None, lookups=None):
     """
     Automatically process fact checking for a GeneratedContent instance.
-    Uses the generated content's body as the claim.
+    The check-worthy sentences of the body are fact-checked concurrently and their
+    verdicts aggregated into one FactCheckResult whose claim is the whole body.
+    Pass the body's TextAnalysis, or its already extracted claims, when the caller has
+    them, so the body isn't run through spaCy again. Callers that started the lookups
+    themselves (submit_fact_check_many for the same claims) pass what it returned as
+    lookups, and only the verdict is stored here.
+    An article that already has a fact check (e.g. a retried pipeline event whose
+    fact check succeeded before a later step failed) keeps it: nothing is re-queried
+    or created.
+    
+    Returns:
+        FactCheckResult instance.
     """
-    claim = generated_content.body
-    process_fact_check_manual(claim)
\ No newline at end of file
+    if generated_content.fact_check_id is not None:
+        existing = FactCheckResult.objects.filter(pk=generated_content.fact_check_id).first()
+        if existing is not None:
+            return existing
+    if claims is None:
+        claims = extract_claims(analysis or generated_content.body)
+    results = lookups() if lookups is not None else query_google_fact_check_many(claims)
+    result = aggregate_verdicts(claims, results)
+    fact_check_result = FactCheckResult.objects.create(
+        claim=generated_content.body,
+        textual_rating=result['textual_rating'],
+        evidence=result['evidence'],
+        verification_score=result['verification_score']
+    )
+    generated_content.fact_check = fact_check_result
+    generated_content.save(update_fields=['fact_check'])
+    return fact_check_result
@@ -1,7 +1,19 @@
+import asyncio
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.db import connections
+from django.http import StreamingHttpResponse
+from dailynews_backend.singleflight import single_flight_stats
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
-from .utils import process_fact_check_manual
+from .cache import get_fact_check_cache
+from .client import get_fact_check_client
+from .local_index import local_index_stats
+from .utils import process_fact_check_batch, process_fact_check_manual
 from .models import FactCheckResult
 from .serializers import FactCheckResultSerializer
 
@@ -20,3 +32,87 @@ class FactCheckView(APIView):
             return Response(serializer.data, status=status.HTTP_200_OK)
         except Exception as e:
             return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+async def stream_in_thread(lines):
+    """
+    Yield the items of a blocking generator, advanced on a thread of its own, to the
+    event loop. Under ASGI, StreamingHttpResponse buffers a sync iterator completely
+    before sending anything; this lets it send each item as soon as it is produced.
+    Closing the stream (e.g. on client disconnect) closes the generator on its thread.
+    """
+    loop = asyncio.get_running_loop()
+    executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='stream')
+    finished = object()
+
+    def close():
+        try:
+            lines.close()
+        finally:
+            connections.close_all()  # This thread's connections
+
+    try:
+        while True:
+            line = await loop.run_in_executor(executor, next, lines, finished)
+            if line is finished:
+                return
+            yield line
+    finally:
+        # Runs after any next() still in progress; don't wait for it
+        executor.submit(close)
+        executor.shutdown(wait=False)
+
+
+class FactCheckBatchView(APIView):
+    """
+    API view for fact checking many claims in one request.
+    Accepts {"claims": [...], "concurrency": <optional int>} and streams one NDJSON
+    line per claim as soon as its result is saved ({"index", "result"}), in completion
+    order, followed by a final {"summary": ...} line. Streams under both WSGI and ASGI.
+    """
+
+    def post(self, request):
+        claims = request.data.get('claims')
+        if not isinstance(claims, list) or not claims:
+            return Response({"error": "A non-empty list of claims is required."}, status=status.HTTP_400_BAD_REQUEST)
+        if not all(isinstance(claim, str) and claim.strip() for claim in claims):
+            return Response({"error": "Every claim must be a non-empty string."}, status=status.HTTP_400_BAD_REQUEST)
+        batch_config = getattr(settings, 'FACT_CHECK_BATCH', {})
+        max_size = batch_config.get('MAX_SIZE', 5000)
+        if len(claims) > max_size:
+            return Response({"error": f"A batch may contain at most {max_size} claims."}, status=status.HTTP_400_BAD_REQUEST)
+
+        max_concurrency = batch_config.get('CONCURRENCY', 16)
+        concurrency = request.data.get('concurrency', max_concurrency)
+        if not str(concurrency).isdigit() or int(concurrency) < 1:
+            return Response({"error": "concurrency must be a positive integer."}, status=status.HTTP_400_BAD_REQUEST)
+        concurrency = min(int(concurrency), max_concurrency)
+
+        def result_lines():
+            counts = {}
+            for index, result in process_fact_check_batch(claims, concurrency=concurrency):
+                counts[result.textual_rating] = counts.get(result.textual_rating, 0) + 1
+                yield json.dumps({"index": index, "result": FactCheckResultSerializer(result).data}, default=str) + "\n"
+            yield json.dumps({"summary": {"total": len(claims), "ratings": counts}}) + "\n"
+
+        lines = result_lines()
+        if isinstance(request._request, ASGIRequest):
+            lines = stream_in_thread(lines)
+        response = StreamingHttpResponse(lines, content_type='application/x-ndjson')
+        response['Cache-Control'] = 'no-cache'
+        response['X-Accel-Buffering'] = 'no'  # Stop nginx buffering the stream
+        return response
+
+class FactCheckMetricsView(APIView):
+    """
+    API view exposing fact check cache and local ClaimReview index hit/miss counters,
+    and Google Fact Check client latency, error and circuit breaker state.
+    """
+
+    def get(self, request):
+        return Response({
+            "cache": get_fact_check_cache().stats(),
+            "local_index": local_index_stats(),
+            "client": get_fact_check_client().stats(),
+            "single_flight": single_flight_stats(),
+        }, status=status.HTTP_200_OK)
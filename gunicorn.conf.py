@@ -0,0 +1,22 @@
+"""
+Gunicorn settings, read automatically by `gunicorn dailynews_backend.wsgi`.
+
+The app is loaded once in the master and the spaCy pipelines are loaded there before
+workers are forked, so every worker shares their memory copy-on-write instead of
+loading its own copy. gc.freeze() moves everything loaded so far out of the garbage
+collector's reach, so collections in the workers don't touch (and copy) those pages.
+"""
+import gc
+import os
+
+preload_app = os.environ.get('GUNICORN_PRELOAD_APP', 'True') == 'True'
+
+
+def when_ready(server):
+    if not preload_app:
+        return
+    from content_processing.nlp import preload
+
+    preload()
+    gc.freeze()
+    server.log.info("Preloaded NLP pipelines; %d objects frozen for copy-on-write sharing", gc.get_freeze_count())